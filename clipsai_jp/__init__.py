@@ -39,15 +39,18 @@ from .media.audio_file import AudioFile
 from .media.audiovideo_file import AudioVideoFile
 from .media.editor import MediaEditor
 from .media.video_file import VideoFile
-from .resize.resize import resize
+from .resize.resize import calc_crops_from_roi_file, resize, resize_to_aspect_ratios
 from .transcribe.transcriber import Transcriber
+from .utils.model_registry import get_model_registry
 
 # Types
 from .clip.clip import Clip
 from .resize.crops import Crops
+from .resize.rois import Rois
 from .resize.segment import Segment
 from .transcribe.transcription import Transcription
 from .transcribe.transcription_element import Sentence, Word, Character
+from .utils.model_registry import ModelRegistry
 
 __all__ = [
     "__version__",
@@ -58,11 +61,16 @@ __all__ = [
     "Clip",
     "Crops",
     "MediaEditor",
+    "ModelRegistry",
+    "Rois",
     "Segment",
     "Sentence",
     "Transcriber",
     "Transcription",
     "VideoFile",
     "Word",
+    "calc_crops_from_roi_file",
+    "get_model_registry",
     "resize",
+    "resize_to_aspect_ratios",
 ]
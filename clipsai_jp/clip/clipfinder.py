@@ -20,6 +20,7 @@ from clipsai_jp.utils.pytorch import get_compute_device, assert_compute_device_a
 from clipsai_jp.utils.utils import find_missing_dict_keys
 
 # 3rd party imports
+import numpy as np
 import torch
 
 BOUNDARY = 1
@@ -490,7 +491,8 @@ class ClipFinder:
         List[dict]
             クリップ形式の辞書リスト
         """
-        clips = []
+        # 有効な境界の時間範囲
+        time_ranges = []
         video_duration = transcription.end_time
 
         for boundary in gemini_boundaries:
@@ -518,21 +520,32 @@ class ClipFinder:
             if duration < self._min_clip_duration or duration > self._max_clip_duration:
                 continue
 
-            # 時間から文字インデックスを取得
-            try:
-                start_char_index = transcription.find_char_index(
-                    start_time, type_of_time="start"
-                )
-                end_char_index = transcription.find_char_index(
-                    end_time, type_of_time="end"
-                )
-            except Exception as e:
-                logging.warning(
-                    f"Failed to convert time to char index for "
-                    f"clip ({start_time:.2f}s - {end_time:.2f}s): {e}"
-                )
-                continue
+            time_ranges.append((start_time, end_time))
+
+        if len(time_ranges) == 0:
+            return []
+
+        # 時間から文字インデックスを一括で取得
+        start_times = np.array([start_time for start_time, _ in time_ranges])
+        end_times = np.array([end_time for _, end_time in time_ranges])
+        try:
+            start_char_indices = transcription.find_char_indices(
+                start_times, type_of_time="start"
+            )
+            end_char_indices = transcription.find_char_indices(
+                end_times, type_of_time="end"
+            )
+        except Exception as e:
+            logging.warning(
+                f"Failed to convert time to char index for "
+                f"{len(time_ranges)} clips: {e}"
+            )
+            return []
 
+        clips = []
+        for (start_time, end_time), start_char_index, end_char_index in zip(
+            time_ranges, start_char_indices.tolist(), end_char_indices.tolist()
+        ):
             clips.append(
                 {
                     "start_time": start_time,
@@ -579,6 +592,8 @@ class ClipFinder:
 
         # 重複を除去してマージ
         merged_clips = []
+        # 時間を更新したクリップ（文字インデックスを最後に一括で再計算する）
+        updated_clips = []
 
         # TextTilingのクリップを追加
         for clip in texttiling_clips:
@@ -612,22 +627,8 @@ class ClipFinder:
                         + gemini_clip["end_time"] * gemini_priority
                     ) / total_weight
                     existing_clip["weight"] = 1.0
-
-                    # 時間を更新したため、文字インデックスも新しい時間に合わせて再計算する
-                    # （更新しないと時間と文字範囲が不整合になる）
-                    try:
-                        existing_clip["start_char"] = transcription.find_char_index(
-                            existing_clip["start_time"], type_of_time="start"
-                        )
-                        existing_clip["end_char"] = transcription.find_char_index(
-                            existing_clip["end_time"], type_of_time="end"
-                        )
-                    except Exception as e:
-                        logging.warning(
-                            f"Failed to recompute char indices for merged clip "
-                            f"({existing_clip['start_time']:.2f}s - "
-                            f"{existing_clip['end_time']:.2f}s): {e}"
-                        )
+                    if not any(clip is existing_clip for clip in updated_clips):
+                        updated_clips.append(existing_clip)
                     break
 
             if not is_duplicate:
@@ -635,6 +636,32 @@ class ClipFinder:
                 gemini_clip_with_weight["weight"] = gemini_priority
                 merged_clips.append(gemini_clip_with_weight)
 
+        # 時間を更新したため、文字インデックスも新しい時間に合わせて再計算する
+        # （更新しないと時間と文字範囲が不整合になる）
+        if len(updated_clips) > 0:
+            try:
+                start_char_indices = transcription.find_char_indices(
+                    np.array([clip["start_time"] for clip in updated_clips]),
+                    type_of_time="start",
+                )
+                end_char_indices = transcription.find_char_indices(
+                    np.array([clip["end_time"] for clip in updated_clips]),
+                    type_of_time="end",
+                )
+            except Exception as e:
+                logging.warning(
+                    f"Failed to recompute char indices for "
+                    f"{len(updated_clips)} merged clips: {e}"
+                )
+            else:
+                for clip, start_char_index, end_char_index in zip(
+                    updated_clips,
+                    start_char_indices.tolist(),
+                    end_char_indices.tolist(),
+                ):
+                    clip["start_char"] = start_char_index
+                    clip["end_char"] = end_char_index
+
         # 重みを削除して返す
         return [
             {k: v for k, v in clip.items() if k != "weight"} for clip in merged_clips
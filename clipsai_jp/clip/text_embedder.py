@@ -4,6 +4,9 @@ Embed text using sentence-transformers models.
 Supports multiple models for different use cases including Japanese-optimized models.
 """
 
+# local package imports
+from clipsai_jp.utils.model_registry import get_model_registry
+
 # 3rd party imports
 import torch
 from sentence_transformers import SentenceTransformer
@@ -25,7 +28,8 @@ class TextEmbedder:
 
     def __init__(self, model_name: str = None) -> None:
         """
-        Initialize TextEmbedder with specified model.
+        Initialize TextEmbedder with specified model. The model is shared with the
+        other TextEmbedder instances of the process (see 'ModelRegistry').
 
         Parameters
         ----------
@@ -43,7 +47,9 @@ class TextEmbedder:
         elif model_name in self.RECOMMENDED_MODELS:
             model_name = self.RECOMMENDED_MODELS[model_name]
 
-        self.__model = SentenceTransformer(model_name)
+        self.__model = get_model_registry().get(
+            (model_name, None, None), lambda: SentenceTransformer(model_name)
+        )
         self.model_name = model_name
 
     def embed_sentences(self, sentences: list) -> torch.Tensor:
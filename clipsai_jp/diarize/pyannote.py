@@ -13,22 +13,48 @@ In other words, it takes approximately 1.5 minutes to process a one hour convers
 - pyannote/speaker-diarization allows setting a number of speakers to detect. Could be
 viable to analyze different subsections of the video, detect the number of faces, and
 use that as the number of speakers to detect.
+
+- The memory of the pipeline grows quadratically with the duration of the audio (the
+clustering compares the embeddings of every pair of chunks), so multi-hour recordings
+can be diarized in overlapping windows whose speakers are linked by the similarity of
+their embeddings (see 'PyannoteDiarizer.diarize').
 """
 
 # standard library imports
 import logging
-import os
-import uuid
+import warnings
+
+# current package imports
+from .exceptions import DiarizeError
 
 # local package imports
 from clipsai_jp.media.audio_file import AudioFile
+from clipsai_jp.utils.model_registry import get_model_registry
 from clipsai_jp.utils.pytorch import get_compute_device, assert_compute_device_available
 
 # third party imports
+import numpy as np
 from pyannote.audio import Pipeline
+from pyannote.core import Segment
 from pyannote.core.annotation import Annotation
 import torch
 
+PIPELINE_NAME = "pyannote/speaker-diarization-3.1"
+# the sample rate the pipeline was trained on
+SAMPLE_RATE = 16000
+
+# rough peak memory model of the pipeline for 'd' seconds of audio:
+# FIXED + PER_SEC * d + PER_SEC_SQUARED * d^2. The quadratic term is the pairwise
+# distances of the ~3 local speakers of each 1 second step of the segmentation.
+FIXED_BYTES = 2**29
+BYTES_PER_SEC = 2**17
+BYTES_PER_SEC_SQUARED = 72
+
+# speakers of different windows are linked if the cosine similarity of their
+# embeddings is at least this (pyannote's own clustering threshold is a cosine
+# distance of about 0.7)
+MIN_SPEAKER_SIMILARITY = 0.3
+
 
 class PyannoteDiarizer:
     """
@@ -55,19 +81,26 @@ class PyannoteDiarizer:
             device = get_compute_device()
         assert_compute_device_available(device)
 
-        # Support both use_auth_token (old) and token (new) parameters for compatibility
-        # Try use_auth_token first (pyannote.audio < 4.0), then token (pyannote.audio >= 4.0)
-        try:
-            self.pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                use_auth_token=auth_token,
-            ).to(torch.device(device))
-        except TypeError:
-            # Fall back to new parameter name (pyannote.audio >= 4.0)
-            self.pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                token=auth_token,
-            ).to(torch.device(device))
+        def load_pipeline() -> Pipeline:
+            # Support both use_auth_token (old) and token (new) parameters for compatibility
+            # Try use_auth_token first (pyannote.audio < 4.0), then token (pyannote.audio >= 4.0)
+            try:
+                return Pipeline.from_pretrained(
+                    PIPELINE_NAME,
+                    use_auth_token=auth_token,
+                ).to(torch.device(device))
+            except TypeError:
+                # Fall back to new parameter name (pyannote.audio >= 4.0)
+                return Pipeline.from_pretrained(
+                    PIPELINE_NAME,
+                    token=auth_token,
+                ).to(torch.device(device))
+
+        # the pipeline is shared with the other PyannoteDiarizer instances of the
+        # process
+        self.pipeline = get_model_registry().get(
+            (PIPELINE_NAME, device, None), load_pipeline
+        )
         logging.debug("Pyannote using device: {}".format(self.pipeline.device))
 
     def diarize(
@@ -75,6 +108,9 @@ class PyannoteDiarizer:
         audio_file: AudioFile,
         min_segment_duration: float = 1.5,
         time_precision: int = 6,
+        waveform: np.ndarray = None,
+        max_memory_bytes: int = None,
+        chunk_overlap: float = 30.0,
     ) -> list[dict]:
         """
         Diarizes the audio file.
@@ -88,6 +124,17 @@ class PyannoteDiarizer:
             segments.
         min_segment_duration: float
             The minimum duration (in seconds) for a segment to be considered valid.
+        waveform: np.ndarray
+            The already decoded 16 kHz mono float32 audio of the file (ex: from
+            'AudioFile.get_decoded_audio'). May be a read-only memory map. Default is
+            None (the audio is decoded).
+        max_memory_bytes: int
+            The approximate peak memory budget in bytes of the pipeline. Audio too long
+            to diarize within the budget is diarized in overlapping windows that fit
+            it. Default is None (diarize the whole audio at once).
+        chunk_overlap: float
+            The overlap in seconds between consecutive windows when diarizing in
+            windows. Default is 30 seconds.
 
         Returns
         -------
@@ -99,23 +146,36 @@ class PyannoteDiarizer:
             end_time: float
                 end time of the segment in seconds
         """
-        if audio_file.has_file_extension("wav"):
-            wav_file = audio_file
-        else:
-            wav_file_path = os.path.join(
-                audio_file.get_parent_dir_path(),
-                "{}{}.wav".format(
-                    audio_file.get_filename_without_extension(), str(uuid.uuid4().hex)
-                ),
+        # decode in memory -> no temporary wav file is written next to the source
+        if waveform is None:
+            waveform = audio_file.decode_audio(SAMPLE_RATE)
+        with warnings.catch_warnings():
+            # pyannote only reads the waveform -> read-only memory maps are shared
+            warnings.filterwarnings("ignore", message=".*not writable.*")
+            waveform = torch.from_numpy(np.asarray(waveform))
+
+        chunk_duration = None
+        if max_memory_bytes is not None:
+            chunk_duration = _calc_max_chunk_duration(max_memory_bytes)
+            if chunk_duration <= 2 * chunk_overlap:
+                err = (
+                    "A memory budget of {} bytes only fits {:.1f} second windows, "
+                    "which is too short for an overlap of {} seconds.".format(
+                        max_memory_bytes, chunk_duration, chunk_overlap
+                    )
+                )
+                logging.error(err)
+                raise DiarizeError(err)
+
+        if chunk_duration is None or len(waveform) <= chunk_duration * SAMPLE_RATE:
+            pyannote_segments: Annotation = self.pipeline(
+                {"waveform": waveform.unsqueeze(0), "sample_rate": SAMPLE_RATE}
             )
-            wav_file = audio_file.extract_audio(
-                extracted_audio_file_path=wav_file_path,
-                audio_codec="pcm_s16le",
-                overwrite=False,
+        else:
+            pyannote_segments = self._diarize_in_chunks(
+                waveform, chunk_duration, chunk_overlap
             )
 
-        pyannote_segments: Annotation = self.pipeline({"audio": wav_file.path})
-
         adjusted_speaker_segments = self._adjust_segments(
             pyannote_segments=pyannote_segments,
             min_segment_duration=min_segment_duration,
@@ -123,10 +183,104 @@ class PyannoteDiarizer:
             time_precision=time_precision,
         )
 
-        wav_file.delete()
-
         return adjusted_speaker_segments
 
+    def _diarize_in_chunks(
+        self,
+        waveform: torch.Tensor,
+        chunk_duration: float,
+        chunk_overlap: float,
+    ) -> Annotation:
+        """
+        Diarizes overlapping windows of the audio one at a time and stitches them
+        together. The speakers of each window are linked to the speakers found so far
+        by the cosine similarity of their embeddings; each window's segments are cut
+        at the middles of its overlaps with its neighbors.
+
+        Parameters
+        ----------
+        waveform: torch.Tensor
+            1D tensor of the 16 kHz mono audio
+        chunk_duration: float
+            The maximum duration in seconds of a window.
+        chunk_overlap: float
+            The minimum overlap in seconds between consecutive windows.
+
+        Returns
+        -------
+        Annotation
+            The speaker segments of the whole audio, labeled 'SPEAKER_<number>'.
+        """
+        duration = len(waveform) / SAMPLE_RATE
+        # spread the windows evenly so the last one isn't a short leftover
+        num_chunks = int(
+            np.ceil((duration - chunk_overlap) / (chunk_duration - chunk_overlap))
+        )
+        chunk_starts = np.linspace(0, duration - chunk_duration, num_chunks)
+        logging.debug(
+            "Diarizing {:.1f} seconds of audio in {} windows of {:.1f} seconds.".format(
+                duration, num_chunks, chunk_duration
+            )
+        )
+
+        # the running mean embedding and speech duration of each linked speaker
+        centroids: list[np.ndarray] = []
+        weights: list[float] = []
+        stitched = Annotation()
+        for i, chunk_start in enumerate(chunk_starts.tolist()):
+            chunk_end = chunk_start + chunk_duration
+            keep_start = (
+                0
+                if i == 0
+                else (chunk_start + chunk_starts[i - 1] + chunk_duration) / 2
+            )
+            keep_end = (
+                duration
+                if i == num_chunks - 1
+                else (chunk_end + chunk_starts[i + 1]) / 2
+            )
+
+            annotation, embeddings = self.pipeline(
+                {
+                    "waveform": waveform[
+                        int(chunk_start * SAMPLE_RATE) : int(chunk_end * SAMPLE_RATE)
+                    ].unsqueeze(0),
+                    "sample_rate": SAMPLE_RATE,
+                },
+                return_embeddings=True,
+            )
+            # embeddings are ordered like the labels (extra rows are zero padding)
+            labels = annotation.labels()
+            speech_durations = [annotation.label_duration(label) for label in labels]
+            embeddings = embeddings[: len(labels)]
+            speakers = _link_speakers(embeddings, centroids)
+            for label, embedding, speech_duration, speaker in zip(
+                labels, embeddings, speech_durations, speakers
+            ):
+                if speaker == len(centroids):
+                    centroids.append(np.array(embedding, dtype=float))
+                    weights.append(speech_duration)
+                elif np.linalg.norm(embedding) > 0:
+                    total = weights[speaker] + speech_duration
+                    centroids[speaker] = (
+                        centroids[speaker] * weights[speaker]
+                        + embedding * speech_duration
+                    ) / max(total, 1e-9)
+                    weights[speaker] = total
+
+            speaker_by_label = dict(zip(labels, speakers))
+            for segment, track, label in annotation.itertracks(yield_label=True):
+                start = max(segment.start + chunk_start, keep_start)
+                end = min(segment.end + chunk_start, keep_end)
+                if end <= start:
+                    continue
+                stitched[Segment(start, end), "{}_{}".format(i, track)] = (
+                    "SPEAKER_{:02d}".format(speaker_by_label[label])
+                )
+
+        # merge the segments of a speaker that were cut at a window boundary
+        return stitched.support()
+
     def _adjust_segments(
         self,
         pyannote_segments: Annotation,
@@ -294,9 +448,84 @@ class PyannoteDiarizer:
 
     def cleanup(self) -> None:
         """
-        Remove the diarization pipeline from memory and explicity free up GPU memory.
+        Drop this instance's reference to the diarization pipeline and explicity free
+        up GPU memory. The pipeline stays loaded for other instances until the model
+        registry evicts it (see 'ModelRegistry').
         """
         del self.pipeline
         self.pipeline = None
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
+
+
+def _calc_max_chunk_duration(max_memory_bytes: int) -> float:
+    """
+    Calculates the longest duration of audio the pipeline can diarize within a memory
+    budget.
+
+    Parameters
+    ----------
+    max_memory_bytes: int
+        The approximate peak memory budget in bytes.
+
+    Returns
+    -------
+    float
+        The duration in seconds, or 0 if the budget is too small for any audio.
+    """
+    budget = max_memory_bytes - FIXED_BYTES
+    if budget <= 0:
+        return 0.0
+    # positive root of PER_SEC_SQUARED * d^2 + PER_SEC * d - budget
+    return (
+        -BYTES_PER_SEC + np.sqrt(BYTES_PER_SEC**2 + 4 * BYTES_PER_SEC_SQUARED * budget)
+    ) / (2 * BYTES_PER_SEC_SQUARED)
+
+
+def _link_speakers(embeddings: np.ndarray, centroids: list[np.ndarray]) -> list[int]:
+    """
+    Greedily links the speakers of a window to the speakers found so far, most similar
+    pair first.
+
+    Parameters
+    ----------
+    embeddings: np.ndarray
+        Array of shape (N, D) with the embedding of each speaker of the window. All
+        zero embeddings (speakers pyannote has no embedding for) are never linked.
+    centroids: list[np.ndarray]
+        The embeddings of the speakers found so far.
+
+    Returns
+    -------
+    list[int]
+        The speaker each embedding is linked to. Speakers that aren't linked are
+        numbered from len(centroids) on in order.
+    """
+    speakers = [None] * len(embeddings)
+    if len(centroids) > 0 and len(embeddings) > 0:
+        embeddings = np.asarray(embeddings, dtype=float)
+        centroids = np.stack(centroids)
+        norms = np.linalg.norm(embeddings, axis=1)[:, None] * np.linalg.norm(
+            centroids, axis=1
+        )
+        similarities = np.divide(
+            embeddings @ centroids.T,
+            norms,
+            out=np.zeros(norms.shape),
+            where=norms > 0,
+        )
+        pairs = np.argwhere(similarities >= MIN_SPEAKER_SIMILARITY)
+        order = np.argsort(-similarities[pairs[:, 0], pairs[:, 1]], kind="stable")
+        linked_centroids = set()
+        for embedding_idx, centroid_idx in pairs[order].tolist():
+            if speakers[embedding_idx] is not None or centroid_idx in linked_centroids:
+                continue
+            speakers[embedding_idx] = centroid_idx
+            linked_centroids.add(centroid_idx)
+
+    next_speaker = len(centroids)
+    for i in range(len(speakers)):
+        if speakers[i] is None:
+            speakers[i] = next_speaker
+            next_speaker += 1
+    return speakers
@@ -4,20 +4,34 @@ Working with audio files.
 Notes
 -----
 - AudioFiles are defined to be files that contain only audio and no other media.
+- The decoded audio can be cached in a cache directory as a memory-mapped '.npy' file
+(see 'get_decoded_audio') so transcription, diarization and voice activity detection
+decode the audio only once and several processes share the same pages. Nothing is
+written unless a cache directory is given, so files in read-only directories can be
+decoded. The cache file name contains a fingerprint of the file's path, size and
+modification time, so a changed file is decoded again.
 """
 
 # standard library imports
 from __future__ import annotations
+import hashlib
 import logging
+import os
 import subprocess
 
 # current package imports
+from .exceptions import NoAudioStreamError
 from .temporal_media_file import TemporalMediaFile
 
 # local package imports
 from clipsai_jp.filesys.file import File
 
+# 3rd party imports
+import av
+import numpy as np
+
 SUCCESS = 0
+DECODED_AUDIO_FILE_EXTENSION = ".npy"
 
 
 class AudioFile(TemporalMediaFile):
@@ -181,3 +195,138 @@ class AudioFile(TemporalMediaFile):
             audio_file = AudioFile(extracted_audio_file_path)
             audio_file.assert_exists()
             return audio_file
+
+    def decode_audio(self, sample_rate: int = 16000) -> np.ndarray:
+        """
+        Decodes the first audio stream into memory as mono float32 samples, without
+        writing an intermediate file.
+
+        Parameters
+        ----------
+        sample_rate: int
+            the sample rate in Hz to resample the audio to
+
+        Returns
+        -------
+        np.ndarray
+            1D array of the samples in the range [-1, 1]
+        """
+        self.assert_exists()
+        with av.open(self.path) as container:
+            if len(container.streams.audio) == 0:
+                err = "'{}' has no audio stream to decode.".format(self.path)
+                logging.error(err)
+                raise NoAudioStreamError(err)
+            stream = container.streams.audio[0]
+            stream.thread_type = "AUTO"
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=sample_rate)
+
+            # preallocate from the container's duration to avoid concatenating
+            # chunks, which would briefly need twice the memory
+            duration = container.duration / av.time_base if container.duration else 0
+            samples = np.empty(int(duration * sample_rate) + sample_rate, np.float32)
+            num_samples = 0
+
+            def append(frames: list[av.AudioFrame]) -> None:
+                nonlocal samples, num_samples
+                for frame in frames:
+                    chunk = frame.to_ndarray().reshape(-1)
+                    if num_samples + len(chunk) > len(samples):
+                        samples = np.resize(
+                            samples, max(2 * len(samples), num_samples + len(chunk))
+                        )
+                    samples[num_samples : num_samples + len(chunk)] = chunk
+                    num_samples += len(chunk)
+
+            for frame in container.decode(stream):
+                append(resampler.resample(frame))
+            # flush the samples buffered in the resampler
+            append(resampler.resample(None))
+
+        return samples[:num_samples].copy() if num_samples < len(samples) else samples
+
+    def get_decoded_audio(
+        self,
+        sample_rate: int = 16000,
+        cache_dir: str = None,
+    ) -> np.ndarray:
+        """
+        Loads the decoded audio cached for this file, decoding (and caching) it if it
+        isn't cached yet. The cached audio is memory-mapped read-only.
+
+        Parameters
+        ----------
+        sample_rate: int
+            the sample rate in Hz of the decoded audio
+        cache_dir: str
+            absolute path to the directory to cache the decoded audio in; the
+            directory of this file caches it next to the file. Failing to cache (ex:
+            no write access to the directory) is not an error; the decoded audio is
+            then returned from memory. Default is None (the audio is decoded in memory
+            and not cached).
+
+        Returns
+        -------
+        np.ndarray
+            1D array of mono float32 samples in the range [-1, 1]
+        """
+        if cache_dir is None:
+            logging.debug("Decoding audio of '{}'".format(self.path))
+            return self.decode_audio(sample_rate)
+
+        decoded_audio_file_path = self.get_decoded_audio_file_path(
+            sample_rate, cache_dir
+        )
+        if os.path.isfile(decoded_audio_file_path):
+            return np.load(decoded_audio_file_path, mmap_mode="r")
+
+        logging.debug("Decoding audio of '{}'".format(self.path))
+        samples = self.decode_audio(sample_rate)
+        # write to a temporary file first so readers never see partial audio
+        tmp_file_path = "{}.{}.tmp".format(decoded_audio_file_path, os.getpid())
+        try:
+            with open(tmp_file_path, "wb") as f:
+                np.save(f, samples)
+            os.replace(tmp_file_path, decoded_audio_file_path)
+        except OSError as e:
+            logging.debug(
+                "Could not cache decoded audio '{}': {}".format(
+                    decoded_audio_file_path, e
+                )
+            )
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+            return samples
+        return np.load(decoded_audio_file_path, mmap_mode="r")
+
+    def get_decoded_audio_file_path(self, sample_rate: int, cache_dir: str) -> str:
+        """
+        Returns the path the decoded audio of this file is cached at.
+
+        Parameters
+        ----------
+        sample_rate: int
+            the sample rate in Hz of the decoded audio
+        cache_dir: str
+            absolute path to the directory to cache the decoded audio in
+
+        Returns
+        -------
+        str
+            absolute path to the cached decoded audio
+        """
+        stat = os.stat(self.path)
+        fingerprint = hashlib.sha1(
+            "{}:{}:{}".format(
+                os.path.abspath(self.path), stat.st_size, stat.st_mtime_ns
+            ).encode()
+        ).hexdigest()[:16]
+        return os.path.join(
+            cache_dir,
+            "{}.{}.{}hz{}".format(
+                os.path.basename(self.path),
+                fingerprint,
+                sample_rate,
+                DECODED_AUDIO_FILE_EXTENSION,
+            ),
+        )
@@ -62,6 +62,7 @@ class MediaEditor:
         crop_width: int = None,
         crop_height: int = None,
         crop_x: int = None,
+        copy_if_keyframe_aligned: bool = False,
     ) -> TemporalMediaFile or None:
         """
         Trims and potentially resizes a temporal media file (audio or video) into a
@@ -110,6 +111,10 @@ class MediaEditor:
         crop_height: int, optional
             Height of the crop area.
             none if no resizing
+        copy_if_keyframe_aligned: bool
+            If True, the video stream is copied instead of re-encoded when
+            'start_time' falls on a keyframe of the video (according to its keyframe
+            index) and no crop is requested. Otherwise 'video_codec' is used.
 
         Returns
         -------
@@ -150,22 +155,43 @@ class MediaEditor:
         # When using video_codec="copy", special handling is needed to avoid corruption
         # from non-keyframe positions. We support it but recommend re-encoding.
         is_copy_codec = video_codec.lower() == "copy"
+        is_cropped = (
+            crop_height is not None and crop_width is not None and crop_x is not None
+        )
+
+        # a cut starting on a keyframe can be stream copied without corruption -> the
+        # keyframe index is only looked up when the caller opted in
+        is_keyframe_aligned = False
+        if (
+            copy_if_keyframe_aligned is True
+            and not is_cropped
+            and isinstance(media_file, VideoFile)
+        ):
+            keyframe_index = media_file.get_keyframe_index()
+            is_keyframe_aligned = keyframe_index.is_keyframe_sec(start_time)
+        if is_keyframe_aligned:
+            logging.debug("Trim start is keyframe aligned, copying video stream.")
+            video_codec = "copy"
+            is_copy_codec = True
 
         # Initialize ffmpeg command base
         ffmpeg_command = ["ffmpeg", "-y"]
 
         # For encoding (default): place -ss before -i for faster keyframe-based seeking
         # Re-encoding allows accurate frame positioning regardless of keyframe location
-        # For copy codec: place -ss after -i for frame-accurate seeking (slower)
-        if not is_copy_codec:
+        # For copy codec: place -ss after -i for frame-accurate seeking (slower) unless
+        # the video is copied because the start is a keyframe, where input seeking is
+        # already exact
+        if not is_copy_codec or is_keyframe_aligned:
             ffmpeg_command.extend(["-ss", start_time_hms_time_format])
 
         ffmpeg_command.extend(["-i", media_file.path])
 
         # For copy codec: place -ss after -i for accurate seeking and add timestamp reset
         if is_copy_codec:
-            # Seek after input for frame-accurate positioning
-            ffmpeg_command.extend(["-ss", start_time_hms_time_format])
+            if not is_keyframe_aligned:
+                # Seek after input for frame-accurate positioning
+                ffmpeg_command.extend(["-ss", start_time_hms_time_format])
             # Reset timestamps to start from 0 to prevent corruption
             # This is critical when using copy codec to avoid timestamp issues
             ffmpeg_command.extend(["-avoid_negative_ts", "make_zero"])
@@ -193,7 +219,7 @@ class MediaEditor:
         ffmpeg_command.extend(["-threads", num_threads])
 
         # only add the crop filter if cropping parameters are provided
-        if crop_height is not None and crop_width is not None and crop_x is not None:
+        if is_cropped:
             logging.debug("Trim with resizing.")
             original_height = int(media_file.get_stream_info("v", "height"))
             crop_y = max(original_height // 2 - crop_height // 2, 0)
@@ -1033,6 +1059,7 @@ class MediaEditor:
         preset: str = "veryfast",
         num_threads: str = "0",
         overwrite: bool = True,
+        use_keyframe_index: bool = True,
     ) -> VideoFile or None:
         """
         Crop a video.
@@ -1071,6 +1098,11 @@ class MediaEditor:
             the number of threads to use for encoding
         overwrite: bool
             Overwrites 'cropped_video_file_path' if True; does not overwrite if False
+        use_keyframe_index: bool
+            If True, the input is seeked to the keyframe preceding 'start_time'
+            (according to the video's keyframe index) and only the frames from there
+            to 'start_time' are decoded and discarded. If False, every frame from the
+            beginning of the video up to 'start_time' is decoded.
 
         Returns
         -------
@@ -1101,16 +1133,28 @@ class MediaEditor:
             end_time = original_video_file.get_duration()
         self._assert_valid_trim_times(original_video_file, start_time, end_time)
 
+        # seek the input to the preceding keyframe, then the output by the remainder
+        if use_keyframe_index is True:
+            keyframe_index = original_video_file.get_keyframe_index()
+            # the first keyframe can come after 'start_time'
+            input_seek_time = min(
+                max(keyframe_index.keyframe_sec_before(start_time), 0.0), start_time
+            )
+        else:
+            input_seek_time = 0.0
+
         result = subprocess.run(
             [
                 "ffmpeg",
                 "-y",
+                "-ss",
+                str(input_seek_time),
                 "-i",
                 original_video_file.path,
                 "-ss",
-                str(start_time),
-                "-to",
-                str(end_time),
+                str(start_time - input_seek_time),
+                "-t",
+                str(end_time - start_time),
                 "-vf",
                 "crop={}:{}:{}:{}".format(width, height, x, y),
                 "-c:v",
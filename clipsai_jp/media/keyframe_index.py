@@ -0,0 +1,380 @@
+"""
+A keyframe index of a video for fast random access.
+
+Notes
+-----
+- The index is built by demuxing the packets of the first video stream without
+decoding them, so building it only costs reading the file once.
+- The times in seconds of the index count from the start of the file, like ffmpeg's
+'-ss', while its pts are the raw pts of the stream. The two differ by the file's
+start time, which is about 1.4 seconds for broadcast MPEG-TS.
+- The index can be persisted in a cache directory as a small '.npy' file that is
+memory-mapped when loaded (see 'load_or_build'). Nothing is written by default, so
+videos in read-only directories can be indexed; writing next to the video is opted into
+by passing its directory. A persisted index is rebuilt automatically if the video's
+size or modification time changes.
+"""
+
+# standard library imports
+from fractions import Fraction
+import hashlib
+import logging
+import os
+
+# current package imports
+from .exceptions import VideoFileError
+
+# 3rd party imports
+import av
+import numpy as np
+
+INDEX_FILE_EXTENSION = ".kfidx.npy"
+INDEX_VERSION = 2
+
+# layout of the int64 header stored in front of the keyframe pts
+VERSION_IDX = 0
+FILE_SIZE_IDX = 1
+FILE_MTIME_IDX = 2
+TIME_BASE_NUM_IDX = 3
+TIME_BASE_DEN_IDX = 4
+FRAME_COUNT_IDX = 5
+START_PTS_IDX = 6
+HEADER_LEN = 7
+
+
+class KeyframeIndex:
+    """
+    The presentation timestamps (pts) of every keyframe in a video stream and the
+    stream's frame count.
+    """
+
+    def __init__(
+        self,
+        keyframe_pts: np.ndarray,
+        time_base: Fraction,
+        frame_count: int,
+        start_pts: int = 0,
+    ) -> None:
+        """
+        Initialize KeyframeIndex
+
+        Parameters
+        ----------
+        keyframe_pts: np.ndarray
+            Sorted pts of every keyframe in the stream, in units of 'time_base'.
+        time_base: Fraction
+            The time base of the stream.
+        frame_count: int
+            The number of frames in the stream.
+        start_pts: int
+            The pts of the start of the file, in units of 'time_base'. Default is 0.
+
+        Returns
+        -------
+        None
+        """
+        self._keyframe_pts = keyframe_pts
+        self._time_base = Fraction(time_base)
+        self._frame_count = int(frame_count)
+        self._start_pts = int(start_pts)
+
+    @property
+    def keyframe_pts(self) -> np.ndarray:
+        """
+        The sorted pts of every keyframe in the stream.
+        """
+        return self._keyframe_pts
+
+    @property
+    def time_base(self) -> Fraction:
+        """
+        The time base of the stream's pts.
+        """
+        return self._time_base
+
+    @property
+    def frame_count(self) -> int:
+        """
+        The number of frames in the stream.
+        """
+        return self._frame_count
+
+    @property
+    def start_pts(self) -> int:
+        """
+        The pts of the start of the file, which the times in seconds count from.
+        """
+        return self._start_pts
+
+    @property
+    def keyframe_secs(self) -> np.ndarray:
+        """
+        The time in seconds from the start of the file of every keyframe in the
+        stream.
+        """
+        return (self._keyframe_pts - self._start_pts) * float(self._time_base)
+
+    @classmethod
+    def build(cls, video_file_path: str) -> "KeyframeIndex":
+        """
+        Builds the keyframe index of a video by demuxing (not decoding) the packets of
+        its first video stream.
+
+        Parameters
+        ----------
+        video_file_path: str
+            absolute path to the video file to index
+
+        Returns
+        -------
+        KeyframeIndex
+            the keyframe index of the video
+        """
+        keyframe_pts = []
+        frame_count = 0
+        with av.open(video_file_path) as container:
+            stream = container.streams.video[0]
+            time_base = stream.time_base
+            # ffmpeg's '-ss' counts from the start of the file (of all its streams)
+            if container.start_time is not None:
+                start_pts = round(
+                    Fraction(container.start_time, av.time_base) / time_base
+                )
+            elif stream.start_time is not None:
+                start_pts = stream.start_time
+            else:
+                start_pts = 0
+            for packet in container.demux(stream):
+                # flush packets have no pts
+                if packet.pts is None:
+                    continue
+                frame_count += 1
+                if packet.is_keyframe:
+                    keyframe_pts.append(packet.pts)
+
+        if len(keyframe_pts) == 0:
+            err = "Video file '{}' has no keyframes to index.".format(video_file_path)
+            logging.error(err)
+            raise VideoFileError(err)
+
+        return cls(
+            keyframe_pts=np.unique(np.array(keyframe_pts, dtype=np.int64)),
+            time_base=time_base,
+            frame_count=frame_count,
+            start_pts=start_pts,
+        )
+
+    @classmethod
+    def load_or_build(
+        cls, video_file_path: str, cache_dir: str = None
+    ) -> "KeyframeIndex":
+        """
+        Loads the keyframe index persisted in 'cache_dir', building (and persisting)
+        it if it doesn't exist or is stale.
+
+        Parameters
+        ----------
+        video_file_path: str
+            absolute path to the video file
+        cache_dir: str
+            absolute path to the directory to persist the index in; the video's own
+            directory persists it next to the video. Failing to save (ex: no write
+            access to the directory) is not an error. Default is None (the index is
+            built in memory and not persisted).
+
+        Returns
+        -------
+        KeyframeIndex
+            the keyframe index of the video
+        """
+        if cache_dir is None:
+            logging.debug("Building keyframe index for '{}'".format(video_file_path))
+            return cls.build(video_file_path)
+
+        index_file_path = cls.get_index_file_path(video_file_path, cache_dir)
+        if os.path.isfile(index_file_path):
+            index = cls.load(index_file_path, video_file_path)
+            if index is not None:
+                return index
+            logging.debug("Keyframe index '{}' is stale.".format(index_file_path))
+
+        logging.debug("Building keyframe index for '{}'".format(video_file_path))
+        index = cls.build(video_file_path)
+        try:
+            index.save(index_file_path, video_file_path)
+        except OSError as e:
+            logging.debug(
+                "Could not persist keyframe index '{}': {}".format(index_file_path, e)
+            )
+        return index
+
+    @classmethod
+    def load(
+        cls, index_file_path: str, video_file_path: str = None
+    ) -> "KeyframeIndex" or None:
+        """
+        Memory-maps a persisted keyframe index.
+
+        Parameters
+        ----------
+        index_file_path: str
+            absolute path to the persisted index
+        video_file_path: str
+            absolute path to the indexed video. If given, None is returned when the
+            video's size or modification time doesn't match the index.
+
+        Returns
+        -------
+        KeyframeIndex or None
+            the keyframe index; None if the index is stale or has another version
+        """
+        try:
+            data = np.load(index_file_path, mmap_mode="r")
+        except ValueError as e:
+            err = "Keyframe index '{}' is not a valid index: {}".format(
+                index_file_path, e
+            )
+            logging.error(err)
+            raise VideoFileError(err)
+
+        if len(data) < HEADER_LEN or data[VERSION_IDX] != INDEX_VERSION:
+            return None
+        if video_file_path is not None:
+            stat = os.stat(video_file_path)
+            if (
+                data[FILE_SIZE_IDX] != stat.st_size
+                or data[FILE_MTIME_IDX] != stat.st_mtime_ns
+            ):
+                return None
+
+        return cls(
+            keyframe_pts=data[HEADER_LEN:],
+            time_base=Fraction(
+                int(data[TIME_BASE_NUM_IDX]), int(data[TIME_BASE_DEN_IDX])
+            ),
+            frame_count=int(data[FRAME_COUNT_IDX]),
+            start_pts=int(data[START_PTS_IDX]),
+        )
+
+    def save(self, index_file_path: str, video_file_path: str) -> None:
+        """
+        Persists the keyframe index.
+
+        Parameters
+        ----------
+        index_file_path: str
+            absolute path to save the index to
+        video_file_path: str
+            absolute path to the indexed video, used to detect stale indexes
+
+        Returns
+        -------
+        None
+        """
+        stat = os.stat(video_file_path)
+        header = np.zeros(HEADER_LEN, dtype=np.int64)
+        header[VERSION_IDX] = INDEX_VERSION
+        header[FILE_SIZE_IDX] = stat.st_size
+        header[FILE_MTIME_IDX] = stat.st_mtime_ns
+        header[TIME_BASE_NUM_IDX] = self._time_base.numerator
+        header[TIME_BASE_DEN_IDX] = self._time_base.denominator
+        header[FRAME_COUNT_IDX] = self._frame_count
+        header[START_PTS_IDX] = self._start_pts
+
+        # write to a temporary file first so readers never see a partial index
+        tmp_file_path = "{}.{}.tmp".format(index_file_path, os.getpid())
+        with open(tmp_file_path, "wb") as f:
+            np.save(f, np.concatenate([header, self._keyframe_pts]))
+        os.replace(tmp_file_path, index_file_path)
+
+    @staticmethod
+    def get_index_file_path(video_file_path: str, cache_dir: str) -> str:
+        """
+        Returns the path the keyframe index of a video is persisted to. The file name
+        contains a fingerprint of the video's path, so videos with the same name in
+        different directories can share a cache directory.
+
+        Parameters
+        ----------
+        video_file_path: str
+            absolute path to the video file
+        cache_dir: str
+            absolute path to the directory to persist the index in
+
+        Returns
+        -------
+        str
+            absolute path to the keyframe index file
+        """
+        fingerprint = hashlib.sha1(
+            os.path.abspath(video_file_path).encode()
+        ).hexdigest()[:16]
+        return os.path.join(
+            cache_dir,
+            "{}.{}{}".format(
+                os.path.basename(video_file_path), fingerprint, INDEX_FILE_EXTENSION
+            ),
+        )
+
+    def keyframe_pts_before(self, pts: int) -> int:
+        """
+        Returns the pts of the last keyframe at or before 'pts'.
+
+        Parameters
+        ----------
+        pts: int
+            the pts to search from, in units of the stream's time base
+
+        Returns
+        -------
+        int
+            the pts of the keyframe; the first keyframe if 'pts' precedes it
+        """
+        idx = np.searchsorted(self._keyframe_pts, pts, side="right") - 1
+        return int(self._keyframe_pts[max(idx, 0)])
+
+    def keyframe_sec_before(self, sec: float) -> float:
+        """
+        Returns the time in seconds of the last keyframe at or before 'sec'.
+
+        Parameters
+        ----------
+        sec: float
+            the time in seconds from the start of the file to search from
+
+        Returns
+        -------
+        float
+            the time in seconds from the start of the file of the keyframe; the first
+            keyframe if 'sec' precedes it
+        """
+        pts = self.keyframe_pts_before(self._start_pts + int(sec / self._time_base))
+        return float((pts - self._start_pts) * self._time_base)
+
+    def is_keyframe_sec(self, sec: float, tolerance: float = 0.001) -> bool:
+        """
+        Returns True if 'sec' is within 'tolerance' seconds of a keyframe.
+
+        Parameters
+        ----------
+        sec: float
+            the time in seconds from the start of the file to check
+        tolerance: float
+            the maximum distance in seconds to a keyframe
+
+        Returns
+        -------
+        bool
+            True if 'sec' falls on a keyframe, False otherwise
+        """
+        pts = self._start_pts + int(round(sec / self._time_base))
+        idx = np.searchsorted(self._keyframe_pts, pts)
+        for neighbor_idx in (idx - 1, idx):
+            if 0 <= neighbor_idx < len(self._keyframe_pts):
+                keyframe_sec = float(
+                    (self._keyframe_pts[neighbor_idx] - self._start_pts)
+                    * self._time_base
+                )
+                if abs(keyframe_sec - sec) <= tolerance:
+                    return True
+        return False
@@ -16,6 +16,7 @@ import subprocess
 # current package imports
 from .exceptions import VideoFileError
 from .image_file import ImageFile
+from .keyframe_index import KeyframeIndex
 from .temporal_media_file import TemporalMediaFile
 
 # local imports
@@ -160,6 +161,26 @@ class VideoFile(TemporalMediaFile):
         """
         return int(self.get_stream_info("v:0", "bit_rate"))
 
+    @lru_cache(maxsize=1)
+    def get_keyframe_index(self, cache_dir: str = None) -> KeyframeIndex:
+        """
+        Returns the keyframe index of the video file, loading it from 'cache_dir' if
+        it was persisted there before and building it otherwise.
+
+        Parameters
+        ----------
+        cache_dir: str
+            Absolute path to the directory to persist the index in (see
+            'KeyframeIndex.load_or_build'). Default is None (the index is built in
+            memory and not persisted).
+
+        Returns
+        -------
+        KeyframeIndex
+            The keyframe index of the video file.
+        """
+        return KeyframeIndex.load_or_build(self._path, cache_dir)
+
     def extract_frame(
         self,
         extract_sec: float,
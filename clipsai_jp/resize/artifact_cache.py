@@ -0,0 +1,225 @@
+"""
+An on-disk cache of the results of the stages of the resize pipeline that don't depend
+on the target aspect ratio or the face analysis (the diarized speaker segments and the
+scene changes).
+
+Notes
+-----
+- Entries are keyed by a fingerprint of the content of the source file, the name of the
+stage and the parameters the stage depends on, so re-cropping a video with another
+aspect ratio or face detection margin only has to analyze the faces again.
+- Fingerprinting reads the whole source file, so the fingerprint is itself cached,
+keyed by the path, size and modification time of the file.
+- Each entry is a json file. Reading an entry updates its modification time, and the
+entries modified least recently are evicted first once the cache exceeds its byte
+budget.
+"""
+
+# standard library imports
+import hashlib
+import json
+import logging
+import os
+
+# the number of bytes of the source file hashed at a time when fingerprinting
+FINGERPRINT_BLOCK_SIZE = 2**20
+ARTIFACT_FILE_EXTENSION = ".json"
+
+
+class ArtifactCache:
+    """
+    A least recently used on-disk cache of json serializable stage results with a byte
+    budget.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2**30) -> None:
+        """
+        Initialize ArtifactCache
+
+        Parameters
+        ----------
+        cache_dir: str
+            Absolute path to the directory to store the entries in. It's created if it
+            doesn't exist.
+        max_bytes: int
+            The maximum number of bytes of entries to keep. Default is 1 GiB.
+
+        Returns
+        -------
+        None
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+
+    @property
+    def cache_dir(self) -> str:
+        """
+        The directory the entries are stored in.
+        """
+        return self._cache_dir
+
+    def fingerprint(self, file_path: str) -> str:
+        """
+        Calculates the fingerprint of the content of a file. The fingerprint of a file
+        that hasn't changed since it was last fingerprinted is read from the cache.
+
+        Parameters
+        ----------
+        file_path: str
+            Absolute path to the file.
+
+        Returns
+        -------
+        str
+            The hex digest of the content of the file.
+        """
+        stat = os.stat(file_path)
+        stat_key = {
+            "path": os.path.abspath(file_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        fingerprint = self.get("fingerprint", "", stat_key)
+        if fingerprint is not None:
+            return fingerprint
+
+        hasher = hashlib.sha1()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(FINGERPRINT_BLOCK_SIZE), b""):
+                hasher.update(block)
+        fingerprint = hasher.hexdigest()
+        self.put("fingerprint", "", stat_key, fingerprint)
+        return fingerprint
+
+    def get(self, stage: str, fingerprint: str, params: dict):
+        """
+        Looks up the result of a stage.
+
+        Parameters
+        ----------
+        stage: str
+            The name of the stage.
+        fingerprint: str
+            The fingerprint of the source file (see 'fingerprint').
+        params: dict
+            The json serializable parameters the result depends on.
+
+        Returns
+        -------
+        Any
+            The cached result, or None if the result isn't cached (or the entry is
+            unreadable).
+        """
+        entry_path = self._get_entry_path(stage, fingerprint, params)
+        try:
+            with open(entry_path, "r") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(
+                "Ignoring unreadable cache entry '{}': {}".format(entry_path, e)
+            )
+            return None
+        # mark the entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        logging.debug("Loaded cached {} result '{}'".format(stage, entry_path))
+        return result
+
+    def put(self, stage: str, fingerprint: str, params: dict, result) -> None:
+        """
+        Caches the result of a stage and evicts the least recently used entries to stay
+        within the byte budget. Failing to write the entry (ex: no write access to the
+        cache directory) is not an error.
+
+        Parameters
+        ----------
+        stage: str
+            The name of the stage.
+        fingerprint: str
+            The fingerprint of the source file (see 'fingerprint').
+        params: dict
+            The json serializable parameters the result depends on.
+        result: Any
+            The json serializable result.
+
+        Returns
+        -------
+        None
+        """
+        entry_path = self._get_entry_path(stage, fingerprint, params)
+        # write to a temporary file first so readers never see a partial entry
+        tmp_entry_path = "{}.{}.tmp".format(entry_path, os.getpid())
+        try:
+            with open(tmp_entry_path, "w") as f:
+                json.dump(result, f)
+            os.replace(tmp_entry_path, entry_path)
+        except OSError as e:
+            logging.warning(
+                "Could not cache {} result '{}': {}".format(stage, entry_path, e)
+            )
+            if os.path.exists(tmp_entry_path):
+                os.remove(tmp_entry_path)
+            return
+        self._evict()
+
+    def _get_entry_path(self, stage: str, fingerprint: str, params: dict) -> str:
+        """
+        Returns the path of the entry of a stage result.
+
+        Parameters
+        ----------
+        stage: str
+            The name of the stage.
+        fingerprint: str
+            The fingerprint of the source file.
+        params: dict
+            The json serializable parameters the result depends on.
+
+        Returns
+        -------
+        str
+            Absolute path to the entry.
+        """
+        key = hashlib.sha1(
+            json.dumps([stage, fingerprint, params], sort_keys=True).encode()
+        ).hexdigest()
+        return os.path.join(
+            self._cache_dir, "{}.{}{}".format(stage, key, ARTIFACT_FILE_EXTENSION)
+        )
+
+    def _evict(self) -> None:
+        """
+        Evicts the least recently used entries until the cache is within its byte
+        budget.
+
+        Returns
+        -------
+        None
+        """
+        entries = []
+        num_bytes = 0
+        for entry in os.scandir(self._cache_dir):
+            if not entry.name.endswith(ARTIFACT_FILE_EXTENSION):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            num_bytes += stat.st_size
+
+        for _, size, entry_path in sorted(entries):
+            if num_bytes <= self._max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+                logging.debug("Evicted cache entry '{}'".format(entry_path))
+            except FileNotFoundError:
+                # already evicted by another process
+                pass
+            num_bytes -= size
@@ -0,0 +1,138 @@
+"""
+Utilities for grouping the faces detected in the sampled frames of a segment into
+tracks of the same person.
+
+Notes
+-----
+- The sampled frames of a segment are sparse, but the people in a segment rarely move
+far, so a box is linked to the track whose most recent box overlaps it the most (or,
+failing that, whose centroid is the closest).
+"""
+
+# third party imports
+import numpy as np
+
+
+def calc_iou(boxes: np.ndarray, other_boxes: np.ndarray) -> np.ndarray:
+    """
+    Calculate the intersection over union (IoU) of every pair of boxes.
+
+    Parameters
+    ----------
+    boxes: np.ndarray
+        Array of shape (N, 4) containing [x1, y1, x2, y2] coordinates.
+    other_boxes: np.ndarray
+        Array of shape (M, 4) containing [x1, y1, x2, y2] coordinates.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (N, M) with the IoU of each pair of boxes.
+    """
+    boxes = boxes[:, None, :].astype(np.float64)
+    other_boxes = other_boxes[None, :, :].astype(np.float64)
+    inter_width = np.clip(
+        np.minimum(boxes[..., 2], other_boxes[..., 2])
+        - np.maximum(boxes[..., 0], other_boxes[..., 0]),
+        0,
+        None,
+    )
+    inter_height = np.clip(
+        np.minimum(boxes[..., 3], other_boxes[..., 3])
+        - np.maximum(boxes[..., 1], other_boxes[..., 1]),
+        0,
+        None,
+    )
+    inter_area = inter_width * inter_height
+    area = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1])
+    other_area = (other_boxes[..., 2] - other_boxes[..., 0]) * (
+        other_boxes[..., 3] - other_boxes[..., 1]
+    )
+    union_area = area + other_area - inter_area
+    return np.divide(
+        inter_area,
+        union_area,
+        out=np.zeros_like(inter_area),
+        where=union_area > 0,
+    )
+
+
+def link_face_tracks(
+    face_detections: list[np.ndarray],
+    min_iou: float = 0.3,
+    max_centroid_distance: float = 0.5,
+) -> list[list[dict]]:
+    """
+    Greedily link the faces detected in consecutive sampled frames into tracks.
+
+    Parameters
+    ----------
+    face_detections: list[np.ndarray]
+        The face detections of each frame in order of occurrence. Each detection is a
+        numpy array of shape (N, 4) containing [x1, y1, x2, y2] coordinates, or None
+        if no faces were detected in the frame.
+    min_iou: float
+        The minimum IoU between a box and the most recent box of a track for the box
+        to be linked to the track.
+    max_centroid_distance: float
+        Boxes that don't overlap a track enough are still linked to it if the
+        distance between their centroids is at most this fraction of the wider box's
+        width.
+
+    Returns
+    -------
+    list[list[dict]]
+        The tracks, each a list of dictionaries with the following keys:
+            bounding_box: np.ndarray
+                The bounding box of the face: [x1, y1, x2, y2]
+            frame: int
+                The frame the bounding box of the face is associated with.
+    """
+    tracks: list[list[dict]] = []
+    for frame_idx, face_detection in enumerate(face_detections):
+        if face_detection is None or len(face_detection) == 0:
+            continue
+        if len(tracks) == 0:
+            for box in face_detection:
+                tracks.append([{"bounding_box": box, "frame": frame_idx}])
+            continue
+
+        track_boxes = np.stack([track[-1]["bounding_box"] for track in tracks])
+        ious = calc_iou(face_detection, track_boxes)
+        centroids = (face_detection[:, :2] + face_detection[:, 2:]) / 2
+        track_centroids = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+        distances = np.linalg.norm(
+            centroids[:, None, :] - track_centroids[None, :, :], axis=2
+        )
+        widths = np.maximum(
+            (face_detection[:, 2] - face_detection[:, 0])[:, None],
+            (track_boxes[:, 2] - track_boxes[:, 0])[None, :],
+        )
+        distances = distances / np.maximum(widths, 1)
+
+        # best overlap first, closest centroid breaks ties (and ranks non-overlaps)
+        eligible = (ious >= min_iou) | (distances <= max_centroid_distance)
+        box_idxs, track_idxs = np.nonzero(eligible)
+        order = np.lexsort(
+            (distances[box_idxs, track_idxs], -ious[box_idxs, track_idxs])
+        )
+
+        linked_boxes = set()
+        linked_tracks = set()
+        for box_idx, track_idx in zip(
+            box_idxs[order].tolist(), track_idxs[order].tolist()
+        ):
+            if box_idx in linked_boxes or track_idx in linked_tracks:
+                continue
+            tracks[track_idx].append(
+                {"bounding_box": face_detection[box_idx], "frame": frame_idx}
+            )
+            linked_boxes.add(box_idx)
+            linked_tracks.add(track_idx)
+
+        # faces that don't match any track start a new track
+        for box_idx, box in enumerate(face_detection):
+            if box_idx not in linked_boxes:
+                tracks.append([{"bounding_box": box, "frame": frame_idx}])
+
+    return tracks
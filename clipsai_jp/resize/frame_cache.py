@@ -0,0 +1,222 @@
+"""
+A bounded cache of decoded frames and their face detections.
+
+Notes
+-----
+- Entries are keyed by the pts of the decoded frame (in units of the video stream's
+time base) and the width the frame was decoded at for face detection, so a frame
+analyzed by different phases of the face analysis is decoded and face-detected only
+once, whichever second it was requested at.
+- The frames are accounted against a byte budget and the least recently used
+entries are evicted first.
+- The frames can optionally be kept in a memory-mapped scratch file instead of RAM.
+The scratch file is split into equally sized slots, one per frame, since all frames
+decoded for face detection from a video have the same size.
+"""
+
+# standard library imports
+from collections import OrderedDict
+import logging
+import tempfile
+
+# 3rd party imports
+import numpy as np
+
+
+class FrameCache:
+    """
+    A least recently used cache of decoded frames and their face detections with a
+    byte budget.
+    """
+
+    def __init__(self, max_bytes: int, use_scratch_file: bool = False) -> None:
+        """
+        Initialize FrameCache
+
+        Parameters
+        ----------
+        max_bytes: int
+            The maximum number of bytes of frames to keep.
+        use_scratch_file: bool
+            Whether to keep the frames in a memory-mapped temporary scratch file
+            instead of RAM. Default is False.
+
+        Returns
+        -------
+        None
+        """
+        self._max_bytes = max_bytes
+        self._use_scratch_file = use_scratch_file
+        self._entries: OrderedDict = OrderedDict()
+        self._num_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        # scratch file slots, allocated on the first frame
+        self._scratch = None
+        self._free_slots: list[int] = []
+
+    @property
+    def num_bytes(self) -> int:
+        """
+        The number of bytes of the cached frames and detections.
+        """
+        return self._num_bytes
+
+    @property
+    def hits(self) -> int:
+        """
+        The number of lookups that found their frame in the cache.
+        """
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        The number of lookups that didn't find their frame in the cache.
+        """
+        return self._misses
+
+    def __len__(self) -> int:
+        """
+        The number of cached frames.
+        """
+        return len(self._entries)
+
+    def __contains__(self, key: tuple[int, int]) -> bool:
+        """
+        Whether the frame with the (pts, width) key is cached. Doesn't count as a
+        lookup.
+        """
+        return key in self._entries
+
+    def get(self, key: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Look up a cached frame and its face detections.
+
+        Parameters
+        ----------
+        key: tuple[int, int]
+            The pts the frame was requested at and the width it was decoded at.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The frame and its face detections, or None if the frame isn't cached.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._entries.move_to_end(key)
+        frame, face_detection, slot, _ = entry
+        # copy out of the scratch file -> the slot may be reused after an eviction
+        if slot is not None:
+            frame = np.array(self._scratch[slot])
+        return frame, face_detection
+
+    def put(
+        self,
+        key: tuple[int, int],
+        frame: np.ndarray,
+        face_detection: np.ndarray,
+    ) -> None:
+        """
+        Cache a frame and its face detections, evicting the least recently used
+        entries to stay within the byte budget. Frames larger than the budget aren't
+        cached.
+
+        Parameters
+        ----------
+        key: tuple[int, int]
+            The pts the frame was requested at and the width it was decoded at.
+        frame: np.ndarray
+            The decoded frame.
+        face_detection: np.ndarray
+            The face detections of the frame, or None if no faces were detected.
+
+        Returns
+        -------
+        None
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        entry_bytes = frame.nbytes
+        if face_detection is not None:
+            entry_bytes += face_detection.nbytes
+        if entry_bytes > self._max_bytes:
+            return
+        while self._num_bytes + entry_bytes > self._max_bytes:
+            self._evict()
+
+        slot = None
+        if self._use_scratch_file:
+            slot = self._store_in_scratch(frame)
+            if slot is not None:
+                frame = None
+        self._entries[key] = (frame, face_detection, slot, entry_bytes)
+        self._num_bytes += entry_bytes
+
+    def clear(self) -> None:
+        """
+        Remove every entry and release the scratch file.
+
+        Returns
+        -------
+        None
+        """
+        logging.debug(
+            "Frame cache: {} hits, {} misses, {} frames cached.".format(
+                self._hits, self._misses, len(self._entries)
+            )
+        )
+        self._entries.clear()
+        self._num_bytes = 0
+        self._scratch = None
+        self._free_slots = []
+
+    def _evict(self) -> None:
+        """
+        Evict the least recently used entry.
+
+        Returns
+        -------
+        None
+        """
+        _, (_, _, slot, entry_bytes) = self._entries.popitem(last=False)
+        if slot is not None:
+            self._free_slots.append(slot)
+        self._num_bytes -= entry_bytes
+
+    def _store_in_scratch(self, frame: np.ndarray) -> int:
+        """
+        Copy a frame into a free slot of the scratch file.
+
+        Parameters
+        ----------
+        frame: np.ndarray
+            The frame to store.
+
+        Returns
+        -------
+        int
+            The slot the frame was stored in, or None if the frame doesn't fit the
+            slots of the scratch file (it's then kept in RAM).
+        """
+        if self._scratch is None:
+            num_slots = max(self._max_bytes // frame.nbytes, 1)
+            self._scratch = np.memmap(
+                tempfile.TemporaryFile(),
+                dtype=frame.dtype,
+                mode="w+",
+                shape=(num_slots,) + frame.shape,
+            )
+            self._free_slots = list(range(num_slots - 1, -1, -1))
+        if frame.shape != self._scratch.shape[1:] or frame.dtype != self._scratch.dtype:
+            return None
+        if len(self._free_slots) == 0:
+            return None
+        slot = self._free_slots.pop()
+        self._scratch[slot] = frame
+        return slot
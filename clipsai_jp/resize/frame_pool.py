@@ -0,0 +1,249 @@
+"""
+A pool of frames decoded for face detection during a single pass over a video.
+
+Notes
+-----
+- The frames are sampled on a regular time grid while the video is decoded for scene
+detection (see 'vid_proc.analyze_video'), since the segments to analyze aren't known
+until the scene changes are merged with the speaker segments.
+- The frames are kept in a memory-mapped scratch file so the pool doesn't have to fit
+in RAM and can be shared with the worker processes of the face analysis. Pickling a
+pool only pickles the path of its scratch file; the unpickled pool maps the same file
+read-only.
+- A pooled frame only stands in for a requested second if nothing can differ between
+them: they must be in the same scene and the pooled frame must be inside the bounds
+the second is requested with (ex: the part of its segment closest to it). Each pooled
+frame stands in for at most one second per lookup, so a segment's samples are always
+distinct frames.
+"""
+
+# standard library imports
+import logging
+import os
+import tempfile
+
+# 3rd party imports
+import numpy as np
+
+
+class FramePool:
+    """
+    A fixed capacity pool of frames of the same shape and the seconds they were
+    decoded at, backed by a memory-mapped scratch file.
+    """
+
+    def __init__(
+        self,
+        frame_shape: tuple[int, int, int],
+        max_frames: int,
+        max_offset: float,
+        scratch_dir: str = None,
+    ) -> None:
+        """
+        Initialize FramePool
+
+        Parameters
+        ----------
+        frame_shape: tuple[int, int, int]
+            The (height, width, channels) shape of the pooled frames.
+        max_frames: int
+            The maximum number of frames the pool can hold.
+        max_offset: float
+            The maximum distance in seconds between a requested second and the pooled
+            frame returned for it (see 'find').
+        scratch_dir: str
+            The directory to create the scratch file in. Default is None (the system's
+            temporary directory).
+
+        Returns
+        -------
+        None
+        """
+        fd, self._path = tempfile.mkstemp(suffix=".frames", dir=scratch_dir)
+        os.close(fd)
+        self._frames = np.memmap(
+            self._path,
+            dtype=np.uint8,
+            mode="w+",
+            shape=(max(max_frames, 1),) + tuple(frame_shape),
+        )
+        self._secs: list[float] = []
+        self._max_offset = max_offset
+        self._scene_changes = np.array([], dtype=float)
+        self._is_owner = True
+
+    @property
+    def path(self) -> str:
+        """
+        The path of the scratch file the frames are stored in.
+        """
+        return self._path
+
+    @property
+    def frame_shape(self) -> tuple[int, int, int]:
+        """
+        The (height, width, channels) shape of the pooled frames.
+        """
+        return self._frames.shape[1:]
+
+    @property
+    def secs(self) -> np.ndarray:
+        """
+        The seconds the pooled frames were decoded at, in increasing order.
+        """
+        return np.asarray(self._secs, dtype=float)
+
+    @property
+    def max_offset(self) -> float:
+        """
+        The maximum distance in seconds between a requested second and the pooled
+        frame returned for it.
+        """
+        return self._max_offset
+
+    @property
+    def scene_changes(self) -> np.ndarray:
+        """
+        The seconds where scene changes occur. A pooled frame never stands in for a
+        second in another scene.
+        """
+        return self._scene_changes
+
+    @scene_changes.setter
+    def scene_changes(self, scene_changes: list[float]) -> None:
+        """
+        Sets the seconds where scene changes occur.
+        """
+        self._scene_changes = np.sort(np.asarray(scene_changes, dtype=float))
+
+    def __len__(self) -> int:
+        """
+        The number of pooled frames.
+        """
+        return len(self._secs)
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        """
+        A copy of the pooled frame at the index.
+        """
+        if not 0 <= idx < len(self._secs):
+            raise IndexError("Frame index {} out of range".format(idx))
+        return np.array(self._frames[idx])
+
+    def add(self, sec: float, frame: np.ndarray) -> bool:
+        """
+        Add a frame to the pool. Frames must be added in order of occurrence.
+
+        Parameters
+        ----------
+        sec: float
+            The second the frame was decoded at.
+        frame: np.ndarray
+            The frame, of shape 'frame_shape'.
+
+        Returns
+        -------
+        bool
+            Whether the frame was added, i.e. the pool wasn't full.
+        """
+        if len(self._secs) == len(self._frames):
+            return False
+        self._frames[len(self._secs)] = frame
+        self._secs.append(sec)
+        return True
+
+    def find(self, secs: list[float], bounds: np.ndarray = None) -> np.ndarray:
+        """
+        Find the closest pooled frame to each second.
+
+        Parameters
+        ----------
+        secs: list[float]
+            The seconds to find frames for.
+        bounds: np.ndarray
+            The [start, end) interval in seconds of shape (len(secs), 2) the pooled
+            frame of each second must be in. Default is None (any second).
+
+        Returns
+        -------
+        np.ndarray
+            The index of the closest pooled frame to each second, or -1 where no
+            pooled frame is within 'max_offset' seconds, within the second's bounds
+            and in the second's scene, or where the pooled frame is closer to another
+            of the seconds.
+        """
+        secs = np.asarray(secs, dtype=float)
+        pool_secs = self.secs
+        if len(pool_secs) == 0:
+            return np.full(len(secs), -1, dtype=np.int64)
+        if len(pool_secs) == 1:
+            idxs = np.zeros(len(secs), dtype=np.int64)
+        else:
+            after = np.clip(np.searchsorted(pool_secs, secs), 1, len(pool_secs) - 1)
+            before = after - 1
+            idxs = np.where(
+                np.abs(pool_secs[before] - secs) <= np.abs(pool_secs[after] - secs),
+                before,
+                after,
+            )
+        offsets = np.abs(pool_secs[idxs] - secs)
+        is_invalid = offsets > self._max_offset
+        if bounds is not None:
+            bounds = np.asarray(bounds, dtype=float).reshape(len(secs), 2)
+            is_invalid |= (pool_secs[idxs] < bounds[:, 0]) | (
+                pool_secs[idxs] >= bounds[:, 1]
+            )
+        if len(self._scene_changes) > 0:
+            is_invalid |= np.searchsorted(
+                self._scene_changes, pool_secs[idxs], side="right"
+            ) != np.searchsorted(self._scene_changes, secs, side="right")
+        idxs[is_invalid] = -1
+
+        # a pooled frame stands in for the closest of the seconds it was found for
+        order = np.lexsort((offsets, idxs))
+        is_duplicate = np.zeros(len(secs), dtype=bool)
+        is_duplicate[order[1:]] = idxs[order[1:]] == idxs[order[:-1]]
+        idxs[is_duplicate & (idxs >= 0)] = -1
+        return idxs
+
+    def close(self) -> None:
+        """
+        Release the frames and delete the scratch file. Unpickled copies of the pool
+        don't delete the scratch file.
+
+        Returns
+        -------
+        None
+        """
+        self._frames = np.zeros((0,) + tuple(self.frame_shape), dtype=np.uint8)
+        self._secs = []
+        if self._is_owner and os.path.exists(self._path):
+            os.remove(self._path)
+            logging.debug("Removed frame pool scratch file '{}'".format(self._path))
+
+    def __getstate__(self) -> dict:
+        """
+        Flush the frames to the scratch file and pickle only its path.
+        """
+        if isinstance(self._frames, np.memmap):
+            self._frames.flush()
+        return {
+            "path": self._path,
+            "shape": self._frames.shape,
+            "secs": self._secs,
+            "max_offset": self._max_offset,
+            "scene_changes": self._scene_changes,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Map the scratch file of the pickled pool read-only.
+        """
+        self._path = state["path"]
+        self._frames = np.memmap(
+            self._path, dtype=np.uint8, mode="r", shape=state["shape"]
+        )
+        self._secs = state["secs"]
+        self._max_offset = state["max_offset"]
+        self._scene_changes = state["scene_changes"]
+        self._is_owner = False
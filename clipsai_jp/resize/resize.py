@@ -3,17 +3,26 @@ Resize an asset's media to a 9:16 aspect ratio.
 """
 
 # standard library imports
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import time
 
 # current package imports
+from .artifact_cache import ArtifactCache
 from .crops import Crops
+from .exceptions import ResizerError
 from .resizer import Resizer
-from .vid_proc import detect_scenes
+from .rois import Rois
+from .vid_proc import analyze_video, detect_scenes
 
 # local package imports
 from clipsai_jp.diarize.pyannote import PyannoteDiarizer
 from clipsai_jp.media.audiovideo_file import AudioVideoFile
 
+# 3rd party imports
+import torch
+
 
 def resize(
     video_file_path: str,
@@ -29,6 +38,20 @@ def resize(
     scene_merge_threshold: float = 0.25,
     time_precision: int = 6,
     device: str = None,
+    n_workers: int = 1,
+    seed: int = None,
+    face_grouping: str = "kmeans",
+    sample_tolerance: float = None,
+    keyframe_face_scan: bool = False,
+    single_decode_pass: bool = False,
+    frame_pool_max_bytes: int = 2**32,
+    scene_frame_skip: int = 0,
+    stage_threads: int = 1,
+    cpu_budget: int = None,
+    timings: dict[str, float] = None,
+    audio_cache_dir: str = None,
+    artifact_cache_dir: str = None,
+    artifact_cache_max_bytes: int = 2**30,
 ) -> Crops:
     """
     Resizes a video to a specified aspect ratio, with default being 9:16. It involves
@@ -48,6 +71,7 @@ def resize(
         The number of samples to take per speaker segment for face detection.
     face_detect_width: int
         The width in pixels to which the video will be downscaled for face detection.
+        The mouth movement of the faces is measured at this width too.
     face_detect_margin: int
         Margin around detected faces, used in the MediaPipe Face Detection.
     face_detect_post_process: bool
@@ -64,39 +88,416 @@ def resize(
     device: str
         PyTorch device to perform computations on. Ex: 'cpu', 'cuda'. Default is None
         (auto detects the correct device)
+    n_workers: int
+        Number of worker processes to analyze faces with. Default is 1.
+    seed: int
+        Seed for sampling frames for face analysis. The same seed produces the same
+        crops regardless of 'n_workers'. Default is None (random).
+    face_grouping: str
+        How the faces of each segment are grouped into people: 'kmeans' or 'tracker'
+        (links faces across the sampled frames, much cheaper). Default is 'kmeans'.
+    sample_tolerance: float
+        If given, each segment's frames are sampled in rounds until its region of
+        interest moves by at most this many pixels, with 'samples_per_segment' as the
+        maximum. Default is None (always sample 'samples_per_segment' frames).
+    keyframe_face_scan: bool
+        Whether to narrow down the search for each segment's first face with a single
+        pass over only the keyframes of the video. Segments whose keyframes all have
+        no face are assumed to have no face. Default is False.
+    single_decode_pass: bool
+        Whether to detect the scene changes and decode frames for face detection in
+        a single pass over the video at the face detection resolution. Frames are
+        pooled once per second in a temporary file and the face analysis uses the
+        closest pooled frame in the same segment and scene instead of decoding the
+        video again. The temporary file takes about face_detect_width * height * 3
+        bytes per second of video, ex: 5.6 GB per hour at 960x540, up to
+        'frame_pool_max_bytes'. Default is False.
+    frame_pool_max_bytes: int
+        The maximum size in bytes of the temporary file of 'single_decode_pass'.
+        Frames past the ones that fit are decoded on demand. Default is 4 GiB.
+    scene_frame_skip: int
+        The number of frames to skip after each frame analyzed for scene changes.
+        Scene changes can then be up to this many frames late. Ignored if
+        'single_decode_pass' is True. Default is 0 (analyze every frame).
+    stage_threads: int
+        Number of threads to run the independent stages (diarization, which only
+        reads the audio, and scene detection, which only reads the video) with.
+        Without a 'cpu_budget' each stage uses as many cores as its libraries
+        (PyTorch, PyAV) choose to, so concurrent stages oversubscribe the CPU. Default
+        is 1 (run the stages one after the other).
+    cpu_budget: int
+        The number of CPU threads the diarization and scene detection stages may use.
+        Concurrent stages split it: scene detection gets half of it as PyAV decoder
+        threads and diarization the rest as PyTorch intra-op threads. Stages run one
+        after the other each get the whole budget. The PyTorch thread count is
+        process-wide and is restored once the diarization finishes. Default is None
+        (no budget).
+    timings: dict[str, float]
+        If given, filled with the wall-clock seconds each stage took (see
+        'resize_to_aspect_ratios'). Default is None (the timings are only logged).
+    audio_cache_dir: str
+        Absolute path to a directory to cache the decoded audio of the video in (see
+        'AudioFile.get_decoded_audio'). The cached audio can be passed on to
+        'Transcriber.transcribe' so the audio is decoded only once. Default is None
+        (the audio is decoded in memory and not cached).
+    artifact_cache_dir: str
+        Absolute path to a directory to cache the speaker segments and scene changes
+        of the video in (see 'ArtifactCache'). They only depend on the content of the
+        video and the diarization and scene detection parameters, so resizing the
+        same video again (ex: with another aspect ratio or face detection margin)
+        only analyzes the faces. Default is None (nothing is cached).
+    artifact_cache_max_bytes: int
+        The maximum number of bytes of results to keep in 'artifact_cache_dir'. The
+        least recently used results are evicted first. Default is 1 GiB.
 
     Returns
     -------
     Crops
-        An object containing information about the resized video
+        An object containing information about the resized video.
     """
+    crops = resize_to_aspect_ratios(
+        video_file_path=video_file_path,
+        pyannote_auth_token=pyannote_auth_token,
+        aspect_ratios=[aspect_ratio],
+        min_segment_duration=min_segment_duration,
+        samples_per_segment=samples_per_segment,
+        face_detect_width=face_detect_width,
+        face_detect_margin=face_detect_margin,
+        face_detect_post_process=face_detect_post_process,
+        n_face_detect_batches=n_face_detect_batches,
+        min_scene_duration=min_scene_duration,
+        scene_merge_threshold=scene_merge_threshold,
+        time_precision=time_precision,
+        device=device,
+        n_workers=n_workers,
+        seed=seed,
+        face_grouping=face_grouping,
+        sample_tolerance=sample_tolerance,
+        keyframe_face_scan=keyframe_face_scan,
+        single_decode_pass=single_decode_pass,
+        frame_pool_max_bytes=frame_pool_max_bytes,
+        scene_frame_skip=scene_frame_skip,
+        stage_threads=stage_threads,
+        cpu_budget=cpu_budget,
+        timings=timings,
+        audio_cache_dir=audio_cache_dir,
+        artifact_cache_dir=artifact_cache_dir,
+        artifact_cache_max_bytes=artifact_cache_max_bytes,
+    )
+    return crops[tuple(aspect_ratio)]
+
+
+def resize_to_aspect_ratios(
+    video_file_path: str,
+    pyannote_auth_token: str,
+    aspect_ratios: list[tuple[int, int]] = ((9, 16), (1, 1), (4, 5)),
+    min_segment_duration: float = 1.5,
+    samples_per_segment: int = 13,
+    face_detect_width: int = 960,
+    face_detect_margin: int = 20,
+    face_detect_post_process: bool = False,
+    n_face_detect_batches: int = 8,
+    min_scene_duration: float = 0.25,
+    scene_merge_threshold: float = 0.25,
+    time_precision: int = 6,
+    device: str = None,
+    n_workers: int = 1,
+    seed: int = None,
+    roi_file_path: str = None,
+    face_grouping: str = "kmeans",
+    sample_tolerance: float = None,
+    keyframe_face_scan: bool = False,
+    single_decode_pass: bool = False,
+    frame_pool_max_bytes: int = 2**32,
+    scene_frame_skip: int = 0,
+    stage_threads: int = 1,
+    cpu_budget: int = None,
+    timings: dict[str, float] = None,
+    audio_cache_dir: str = None,
+    artifact_cache_dir: str = None,
+    artifact_cache_max_bytes: int = 2**30,
+) -> dict[tuple[int, int], Crops]:
+    """
+    Resizes a video to several aspect ratios. The video is diarized and its faces are
+    analyzed only once; only the crops are calculated per aspect ratio.
+
+    Parameters
+    ----------
+    video_file_path: str
+        Absolute path to the video file.
+    pyannote_auth_token: str
+        Authentication token for Pyannote, obtained from HuggingFace.
+    aspect_ratios: list[tuple[int, int]]
+        The (width, height) aspect ratios to resize the video to. Default is 9:16, 1:1
+        and 4:5.
+    roi_file_path: str
+        Absolute path to a json file to store the region of interest of each segment
+        in. The crops for other aspect ratios can be calculated from it later with
+        'calc_crops_from_roi_file' without analyzing the video again. Default is None
+        (the regions of interest aren't stored).
+    timings: dict[str, float]
+        If given, filled with the wall-clock seconds each stage took, with the keys
+        'diarize', 'detect_scenes', 'analyze_faces', 'calc_crops' and 'total'.
+        Default is None (the timings are only logged).
+
+    See 'resize' for the remaining parameters.
+
+    Returns
+    -------
+    dict[tuple[int, int], Crops]
+        The crops for each aspect ratio, keyed by aspect ratio.
+    """
+    if stage_threads < 1:
+        err = "stage_threads must be at least 1, not {}".format(stage_threads)
+        logging.error(err)
+        raise ResizerError(err)
+    if cpu_budget is not None and cpu_budget < 1:
+        err = "cpu_budget must be at least 1, not {}".format(cpu_budget)
+        logging.error(err)
+        raise ResizerError(err)
+    stage_cpus = _split_cpu_budget(cpu_budget, stage_threads)
+
+    start = time.perf_counter()
     media = AudioVideoFile(video_file_path)
     media.assert_has_audio_stream()
     media.assert_has_video_stream()
 
-    logging.debug("DIARIZING VIDEO ({})".format(media.get_filename()))
-    diarizer = PyannoteDiarizer(auth_token=pyannote_auth_token, device=device)
-    diarized_segments = diarizer.diarize(media, min_segment_duration, time_precision)
-
-    logging.debug("DETECTING SCENES IN VIDEO ({})".format(media.get_filename()))
-    scene_changes = detect_scenes(media, min_scene_duration)
-
-    logging.debug("RESIZING VIDEO) ({})".format(media.get_filename()))
     resizer = Resizer(
         face_detect_margin=face_detect_margin,
         face_detect_post_process=face_detect_post_process,
         device=device,
+        face_grouping=face_grouping,
     )
-    crops = resizer.resize(
-        video_file=media,
-        speaker_segments=diarized_segments,
-        scene_changes=scene_changes,
-        aspect_ratio=aspect_ratio,
-        samples_per_segment=samples_per_segment,
-        face_detect_width=face_detect_width,
-        n_face_detect_batches=n_face_detect_batches,
-        scene_merge_threshold=scene_merge_threshold,
-    )
+
+    artifact_cache = None
+    fingerprint = None
+    if artifact_cache_dir is not None:
+        artifact_cache = ArtifactCache(artifact_cache_dir, artifact_cache_max_bytes)
+        fingerprint = artifact_cache.fingerprint(media.path)
+
+    diarize_params = {
+        "min_segment_duration": min_segment_duration,
+        "time_precision": time_precision,
+    }
+
+    def diarize() -> list[dict]:
+        if artifact_cache is not None:
+            speaker_segments = artifact_cache.get(
+                "diarize", fingerprint, diarize_params
+            )
+            if speaker_segments is not None:
+                return speaker_segments
+        logging.debug("DIARIZING VIDEO ({})".format(media.get_filename()))
+        diarizer = PyannoteDiarizer(auth_token=pyannote_auth_token, device=device)
+        waveform = None
+        if audio_cache_dir is not None:
+            waveform = media.get_decoded_audio(cache_dir=audio_cache_dir)
+        # the PyTorch thread count is process-wide -> restored afterwards
+        num_threads = torch.get_num_threads()
+        if stage_cpus["diarize"] is not None:
+            torch.set_num_threads(stage_cpus["diarize"])
+        try:
+            speaker_segments = diarizer.diarize(
+                media, min_segment_duration, time_precision, waveform=waveform
+            )
+        finally:
+            if stage_cpus["diarize"] is not None:
+                torch.set_num_threads(num_threads)
+        if artifact_cache is not None:
+            artifact_cache.put("diarize", fingerprint, diarize_params, speaker_segments)
+        return speaker_segments
+
+    # the pool is registered as soon as it exists so it's closed even if the
+    # diarization fails
+    frame_pools = []
+
+    # the single decode pass detects scenes at the face detection resolution
+    scene_params = {
+        "min_scene_duration": min_scene_duration,
+        "frame_skip": 0 if single_decode_pass else scene_frame_skip,
+        "face_detect_width": face_detect_width if single_decode_pass else None,
+    }
+
+    def detect_scene_changes() -> list[float]:
+        # without a frame pool the face analysis decodes only the frames it needs,
+        # which is cheaper than decoding the whole video again
+        if artifact_cache is not None:
+            scene_changes = artifact_cache.get(
+                "detect_scenes", fingerprint, scene_params
+            )
+            if scene_changes is not None:
+                return scene_changes
+        logging.debug("DETECTING SCENES IN VIDEO ({})".format(media.get_filename()))
+        if not single_decode_pass:
+            scene_changes = detect_scenes(
+                media,
+                min_scene_duration,
+                frame_skip=scene_frame_skip,
+                num_threads=stage_cpus["detect_scenes"],
+            )
+        else:
+            detect_width, detect_height = resizer._calc_face_detect_dims(
+                media, face_detect_width
+            )
+            scene_changes, frame_pool = analyze_video(
+                media,
+                min_scene_duration,
+                width=detect_width,
+                height=detect_height,
+                max_pool_bytes=frame_pool_max_bytes,
+                num_threads=stage_cpus["detect_scenes"],
+            )
+            frame_pools.append(frame_pool)
+        if artifact_cache is not None:
+            artifact_cache.put(
+                "detect_scenes", fingerprint, scene_params, scene_changes
+            )
+        return scene_changes
+
+    try:
+        results, stage_timings = _run_stages(
+            {"diarize": diarize, "detect_scenes": detect_scene_changes},
+            stage_threads,
+        )
+
+        logging.debug("RESIZING VIDEO) ({})".format(media.get_filename()))
+        stage_start = time.perf_counter()
+        rois = resizer.analyze(
+            video_file=media,
+            speaker_segments=results["diarize"],
+            scene_changes=results["detect_scenes"],
+            samples_per_segment=samples_per_segment,
+            face_detect_width=face_detect_width,
+            n_face_detect_batches=n_face_detect_batches,
+            scene_merge_threshold=scene_merge_threshold,
+            n_workers=n_workers,
+            seed=seed,
+            sample_tolerance=sample_tolerance,
+            keyframe_face_scan=keyframe_face_scan,
+            frame_pool=frame_pools[0] if len(frame_pools) > 0 else None,
+        )
+        stage_timings["analyze_faces"] = time.perf_counter() - stage_start
+    finally:
+        for frame_pool in frame_pools:
+            frame_pool.close()
+    if roi_file_path is not None:
+        rois.store_as_json_file(roi_file_path)
+    stage_start = time.perf_counter()
+    crops = {
+        tuple(aspect_ratio): resizer.calc_crops(rois, aspect_ratio)
+        for aspect_ratio in aspect_ratios
+    }
+    stage_timings["calc_crops"] = time.perf_counter() - stage_start
     resizer.cleanup()
 
+    stage_timings["total"] = time.perf_counter() - start
+    logging.debug(
+        "Stage timings: {}".format(
+            ", ".join(
+                "{} {:.2f} s".format(name, sec) for name, sec in stage_timings.items()
+            )
+        )
+    )
+    if timings is not None:
+        timings.update(stage_timings)
     return crops
+
+
+def calc_crops_from_roi_file(
+    roi_file_path: str,
+    aspect_ratios: list[tuple[int, int]] = ((9, 16), (1, 1), (4, 5)),
+) -> dict[tuple[int, int], Crops]:
+    """
+    Calculates the crops of a video for several aspect ratios from the regions of
+    interest stored by 'resize_to_aspect_ratios'.
+
+    Parameters
+    ----------
+    roi_file_path: str
+        Absolute path to the json file with the regions of interest.
+    aspect_ratios: list[tuple[int, int]]
+        The (width, height) aspect ratios to resize the video to. Default is 9:16, 1:1
+        and 4:5.
+
+    Returns
+    -------
+    dict[tuple[int, int], Crops]
+        The crops for each aspect ratio, keyed by aspect ratio
+    """
+    rois = Rois.from_json_file(roi_file_path)
+    # the crops don't need the face detection models -> no Resizer is created
+    return {
+        tuple(aspect_ratio): Resizer.calc_crops(rois, aspect_ratio)
+        for aspect_ratio in aspect_ratios
+    }
+
+
+def _split_cpu_budget(cpu_budget: int, stage_threads: int) -> dict[str, int]:
+    """
+    Splits a CPU budget between the diarization and scene detection stages.
+
+    Parameters
+    ----------
+    cpu_budget: int
+        The number of CPU threads the stages may use, or None for no budget.
+    stage_threads: int
+        The number of stages run at once.
+
+    Returns
+    -------
+    dict[str, int]
+        The number of threads of each stage keyed by stage name, None if there's no
+        budget. Stages run at once split the budget, with at least one thread each.
+    """
+    if cpu_budget is None:
+        return {"diarize": None, "detect_scenes": None}
+    if stage_threads == 1:
+        return {"diarize": cpu_budget, "detect_scenes": cpu_budget}
+    scene_threads = max(cpu_budget // 2, 1)
+    return {
+        "diarize": max(cpu_budget - scene_threads, 1),
+        "detect_scenes": scene_threads,
+    }
+
+
+def _run_stages(
+    stages: dict[str, Callable],
+    max_workers: int = 1,
+) -> tuple[dict, dict[str, float]]:
+    """
+    Runs independent stages of the pipeline, concurrently if 'max_workers' > 1. The
+    stages run in threads since the heavy lifting (PyTorch, PyAV and OpenCV) releases
+    the GIL.
+
+    Parameters
+    ----------
+    stages: dict[str, Callable]
+        The stages to run keyed by name. Each stage is called without arguments.
+    max_workers: int
+        The maximum number of stages to run at once. Default is 1 (run the stages one
+        after the other in order).
+
+    Returns
+    -------
+    tuple[dict, dict[str, float]]
+        The result of each stage and the wall-clock seconds each stage took, both
+        keyed by name. If a stage raises, the other stages are still waited for and
+        the exception of the first failed stage is raised.
+    """
+    timings = {}
+
+    def run_stage(name: str):
+        stage_start = time.perf_counter()
+        try:
+            return stages[name]()
+        finally:
+            timings[name] = time.perf_counter() - stage_start
+
+    if max_workers == 1:
+        return {name: run_stage(name) for name in stages}, timings
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(stages))) as executor:
+        futures = {name: executor.submit(run_stage, name) for name in stages}
+    results = {name: future.result() for name, future in futures.items()}
+    # keep the order of the stages regardless of which finished first
+    return results, {name: timings[name] for name in stages}
@@ -4,32 +4,57 @@ Resizing/cropping a media file to a different aspect ratio
 Notes
 -----
 - ROI is "region of interest"
+- The mouths whose movement picks the speaking face are cropped from the frames
+decoded for face detection, which are 'face_detect_width' wide instead of the video's
+width. This trades some accuracy of the mouth aspect ratio of small faces for not
+decoding every sampled frame again at full resolution. A larger 'face_detect_width'
+measures small faces more accurately.
 """
 
 # standard library imports
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import multiprocessing
+import threading
 
 # current package imports
 from .crops import Crops
 from .exceptions import ResizerError
+from .face_track import link_face_tracks
+from .frame_cache import FrameCache
+from .frame_pool import FramePool
 from .img_proc import calc_img_bytes
 from .rect import Rect
+from .rois import Rois
 from .segment import Segment
-from .vid_proc import extract_frames
+from .seg_proc import (
+    array_to_segments,
+    bitmask_to_speakers,
+    merge_identical_segments,
+    merge_scene_changes,
+    segments_to_array,
+    speakers_to_bitmask,
+    SEGMENT_DTYPE,
+)
+from .vid_proc import extract_frames, extract_keyframes
 
 # local package imports
 from clipsai_jp.media.editor import MediaEditor
 from clipsai_jp.media.video_file import VideoFile
 from clipsai_jp.utils import pytorch
 from clipsai_jp.utils.conversions import bytes_to_gibibytes
+from clipsai_jp.utils.model_registry import get_model_registry
 
 # 3rd party imports
 import cv2
 import mediapipe as mp
 import numpy as np
-from sklearn.cluster import KMeans
 import torch
 
+# the estimated size of a MediaPipe graph (the TFLite model and its runtime), for the
+# model registry. MediaPipe doesn't expose the size of a loaded graph
+MEDIAPIPE_MODEL_NUM_BYTES = 64 * 2**20
+
 
 class Resizer:
     """
@@ -42,6 +67,9 @@ class Resizer:
         face_detect_margin: int = 20,
         face_detect_post_process: bool = False,
         device: str = None,
+        face_grouping: str = "kmeans",
+        frame_cache_bytes: int = 2**30,
+        frame_cache_scratch_file: bool = False,
     ) -> None:
         """
         Initializes the Resizer with specific configurations for face
@@ -62,21 +90,65 @@ class Resizer:
             PyTorch device to perform computations on. Ex: 'cpu', 'cuda'. Default is
             None (auto detects the correct device). Note: MediaPipe automatically uses
             GPU if available, so this parameter mainly affects other PyTorch operations.
+        face_grouping: str, optional
+            How the faces detected in a segment's sampled frames are grouped into
+            people. 'kmeans' clusters the face boxes with k-means. 'tracker' links the
+            face boxes of consecutive sampled frames by overlap and centroid distance,
+            which is much cheaper. Default is 'kmeans'.
+        frame_cache_bytes: int, optional
+            The budget in bytes for caching the frame at each segment's first face
+            and its detections, which both the first face search and the ROI sampling
+            analyze, so it's decoded and detected once. The budget is split between
+            the worker processes and reserved when sizing the face detection batches.
+            0 disables the cache. Default is 1 GiB.
+        frame_cache_scratch_file: bool, optional
+            Whether to keep the cached frames in a memory-mapped temporary file
+            instead of RAM. Default is False.
         """
+        if face_grouping not in ["kmeans", "tracker"]:
+            err = "face_grouping must be 'kmeans' or 'tracker', not '{}'".format(
+                face_grouping
+            )
+            logging.error(err)
+            raise ResizerError(err)
+
         if device is None:
             device = pytorch.get_compute_device()
         pytorch.assert_compute_device_available(device)
         logging.debug("MediaPipe Face Detection using device: {}".format(device))
 
-        # MediaPipe Face Detectionを使用
-        self._face_detector = mp.solutions.face_detection.FaceDetection(
-            model_selection=1,  # 0=short-range, 1=full-range
-            min_detection_confidence=0.5,
+        # MediaPipe Face Detectionを使用. The graphs are shared with the other
+        # Resizer instances of the process (see 'ModelRegistry') and aren't thread
+        # safe, so each comes with a lock
+        model_registry = get_model_registry()
+        self._face_detector, self._face_detector_lock = model_registry.get(
+            ("mediapipe/face_detection/full_range", None, None),
+            lambda: (
+                mp.solutions.face_detection.FaceDetection(
+                    model_selection=1,  # 0=short-range, 1=full-range
+                    min_detection_confidence=0.5,
+                ),
+                threading.Lock(),
+            ),
+            num_bytes=MEDIAPIPE_MODEL_NUM_BYTES,
         )
         self._face_detect_margin = face_detect_margin
-        # media pipe automatically uses gpu if available
-        self._face_mesher = mp.solutions.face_mesh.FaceMesh()
+        # media pipe automatically uses gpu if available. Faces are cropped from
+        # unrelated frames, so landmarks are never tracked across calls; this also
+        # keeps the results independent of the order faces are processed in
+        self._face_mesher, self._face_mesher_lock = model_registry.get(
+            ("mediapipe/face_mesh/static_image", None, None),
+            lambda: (
+                mp.solutions.face_mesh.FaceMesh(static_image_mode=True),
+                threading.Lock(),
+            ),
+            num_bytes=MEDIAPIPE_MODEL_NUM_BYTES,
+        )
         self._media_editor = MediaEditor()
+        self._device = device
+        self._face_grouping = face_grouping
+        self._frame_cache_bytes = frame_cache_bytes
+        self._frame_cache_scratch_file = frame_cache_scratch_file
 
     def resize(
         self,
@@ -88,6 +160,10 @@ class Resizer:
         face_detect_width: int = 960,
         n_face_detect_batches: int = 8,
         scene_merge_threshold: float = 0.25,
+        n_workers: int = 1,
+        seed: int = None,
+        sample_tolerance: float = None,
+        keyframe_face_scan: bool = False,
     ) -> Crops:
         """
         Calculates the coordinates to resize the video to for different
@@ -112,31 +188,127 @@ class Resizer:
         samples_per_segment: int
             Number of frames to sample per segment for face detection.
         face_detect_width: int
-            The width to use for face detection
+            The width to use for face detection. The mouth movement of the faces is
+            measured on frames of this width too.
         n_face_detect_batches: int
             Number of batches for GPU face detection in a video file
         scene_merge_threshold: float
             The threshold in seconds for merging scene changes with speaker segments.
             Scene changes within this threshold of a segment's start or end time will
             cause the segment to be adjusted.
+        n_workers: int
+            Number of worker processes to analyze the faces of the segments with. Each
+            worker owns its own MediaPipe graphs and video decoder and analyzes a
+            contiguous shard of the segments. Default is 1 (analyze in this process).
+        seed: int
+            Seed for sampling the frames of each segment. The same seed produces the
+            same crops regardless of 'n_workers'. Default is None (random).
+        sample_tolerance: float
+            If given, the frames of each segment are sampled in rounds until the
+            segment's region of interest moves by at most this many pixels between
+            rounds, and 'samples_per_segment' is only the maximum number of samples.
+            Default is None (always sample 'samples_per_segment' frames).
+        keyframe_face_scan: bool
+            Whether to narrow down the search for each segment's first face with a
+            single pass over the keyframes of the video (see 'analyze'). Default is
+            False.
 
         Returns
         -------
         Crops
             the resized speaker segments
         """
+        rois = self.analyze(
+            video_file=video_file,
+            speaker_segments=speaker_segments,
+            scene_changes=scene_changes,
+            samples_per_segment=samples_per_segment,
+            face_detect_width=face_detect_width,
+            n_face_detect_batches=n_face_detect_batches,
+            scene_merge_threshold=scene_merge_threshold,
+            n_workers=n_workers,
+            seed=seed,
+            sample_tolerance=sample_tolerance,
+            keyframe_face_scan=keyframe_face_scan,
+        )
+        return self.calc_crops(rois, aspect_ratio)
+
+    def analyze(
+        self,
+        video_file: VideoFile,
+        speaker_segments: list[dict],
+        scene_changes: list[float],
+        samples_per_segment: int = 13,
+        face_detect_width: int = 960,
+        n_face_detect_batches: int = 8,
+        scene_merge_threshold: float = 0.25,
+        n_workers: int = 1,
+        seed: int = None,
+        sample_tolerance: float = None,
+        keyframe_face_scan: bool = False,
+        frame_pool: FramePool = None,
+    ) -> Rois:
+        """
+        Finds the region of interest (ROI) of each segment of the video given the
+        diarized speaker segments. The ROIs don't depend on the aspect ratio, so crops
+        for several aspect ratios can be calculated from them with 'calc_crops'.
+
+        Parameters
+        ----------
+        video_file: VideoFile
+            The video file to analyze
+        speaker_segments: list[dict]
+            speakers: list[int]
+                list of speakers (represented by int) talking in the segment
+            start_time: float
+                start time of the segment in seconds
+            end_time: float
+                end time of the segment in seconds
+        scene_changes: list[float]
+            List of scene change times in seconds
+        samples_per_segment: int
+            Number of frames to sample per segment for face detection.
+        face_detect_width: int
+            The width to use for face detection. The mouth movement of the faces is
+            measured on frames of this width too.
+        n_face_detect_batches: int
+            Number of batches for GPU face detection in a video file
+        scene_merge_threshold: float
+            The threshold in seconds for merging scene changes with speaker segments.
+        n_workers: int
+            Number of worker processes to analyze the faces of the segments with.
+            Default is 1 (analyze in this process).
+        seed: int
+            Seed for sampling the frames of each segment. Default is None (random).
+        sample_tolerance: float
+            If given, frames are sampled adaptively until each segment's region of
+            interest converges within this many pixels (see 'resize'). Default is
+            None (always sample 'samples_per_segment' frames).
+        keyframe_face_scan: bool
+            Whether to first detect faces in only the keyframes of the whole video
+            (decoded in a single pass) and search for each segment's first face
+            just before its first keyframe with a face. Segments whose keyframes
+            all have no face are assumed to have no face. Default is False.
+        frame_pool: FramePool
+            Frames decoded for face detection while detecting the scene changes (see
+            'vid_proc.analyze_video'). Frames close to a pooled frame are taken from
+            the pool instead of being decoded. Default is None (decode every frame).
+
+        Returns
+        -------
+        Rois
+            the region of interest of each segment
+        """
+        if n_workers < 1:
+            err = "n_workers must be at least 1, not {}".format(n_workers)
+            logging.error(err)
+            raise ResizerError(err)
+
         logging.debug(
             "Video Resolution: {}x{}".format(
                 video_file.get_width_pixels(), video_file.get_height_pixels()
             )
         )
-        # calculate resize dimensions
-        resize_width, resize_height = self._calc_resize_width_and_height_pixels(
-            original_width_pixels=video_file.get_width_pixels(),
-            original_height_pixels=video_file.get_height_pixels(),
-            resize_aspect_ratio=aspect_ratio,
-        )
-
         logging.debug(
             "Merging {} speaker segments with {} scene changes.".format(
                 len(speaker_segments), len(scene_changes)
@@ -147,48 +319,112 @@ class Resizer:
         )
         logging.debug("Video has {} distinct segments.".format(len(segments)))
 
-        logging.debug("Determining the first second with a face for each segment.")
-        segments = self._find_first_sec_with_face_for_each_segment(
-            segments, video_file, face_detect_width, n_face_detect_batches
-        )
+        if keyframe_face_scan:
+            logging.debug("Scanning the keyframes of the video for faces.")
+            self._add_keyframe_face_hints(segments, video_file, face_detect_width)
 
-        logging.debug(
-            "Determining the region of interest for {} segments.".format(len(segments))
+        # seed each segment's frame sampling independently so results don't depend
+        # on which process or batch analyzes the segment
+        rng = np.random.default_rng(seed)
+        for segment in segments:
+            segment["sample_seed"] = int(rng.integers(np.iinfo(np.int64).max))
+
+        n_workers = min(n_workers, len(segments))
+        if n_workers > 1:
+            segments = self._analyze_segments_in_parallel(
+                segments,
+                video_file,
+                samples_per_segment,
+                face_detect_width,
+                n_face_detect_batches,
+                n_workers,
+                sample_tolerance,
+                frame_pool,
+            )
+        else:
+            segments = self._analyze_segments(
+                segments,
+                video_file,
+                samples_per_segment,
+                face_detect_width,
+                n_face_detect_batches,
+                sample_tolerance,
+                frame_pool,
+            )
+
+        return Rois(
+            original_width=video_file.get_width_pixels(),
+            original_height=video_file.get_height_pixels(),
+            segments=segments,
         )
-        segments = self._add_x_y_coords_to_each_segment(
-            segments,
-            video_file,
-            resize_width,
-            resize_height,
-            samples_per_segment,
-            face_detect_width,
-            n_face_detect_batches,
+
+    @staticmethod
+    def calc_crops(rois: Rois, aspect_ratio: tuple = (9, 16)) -> Crops:
+        """
+        Calculates the coordinates to resize the video to for each segment from the
+        segments' regions of interest. Doesn't need the face detection models, so it
+        can be called on the class without creating a Resizer.
+
+        Parameters
+        ----------
+        rois: Rois
+            The regions of interest of the video's segments (see 'analyze').
+        aspect_ratio: tuple[int, int]
+            The (width,height) aspect ratio to resize the video to
+
+        Returns
+        -------
+        Crops
+            the resized speaker segments
+        """
+        resize_width, resize_height = Resizer._calc_resize_width_and_height_pixels(
+            original_width_pixels=rois.original_width,
+            original_height_pixels=rois.original_height,
+            resize_aspect_ratio=aspect_ratio,
         )
 
+        segments = np.zeros(len(rois.segments), dtype=SEGMENT_DTYPE)
+        for i, segment in enumerate(rois.segments):
+            crop = Resizer._calc_crop(segment["roi"], resize_width, resize_height)
+            segments[i] = (
+                segment["start_time"],
+                segment["end_time"],
+                speakers_to_bitmask(segment["speakers"]),
+                int(crop.x),
+                int(crop.y),
+            )
+
         logging.debug("Merging identical segments together.")
         unmerge_segments_length = len(segments)
-        segments = self._merge_identical_segments(segments, video_file)
+        segments = Resizer._merge_identical_segments(
+            segments, rois.original_width, rois.original_height
+        )
         logging.debug(
             "Merged {} identical segments.".format(
                 unmerge_segments_length - len(segments)
             )
         )
 
-        crop_segments = []
-        for segment in segments:
-            crop_segments.append(
-                Segment(
-                    speakers=segment["speakers"],
-                    start_time=segment["start_time"],
-                    end_time=segment["end_time"],
-                    x=segment["x"],
-                    y=segment["y"],
-                )
+        crop_segments = [
+            Segment(
+                speakers=bitmask_to_speakers(speakers),
+                start_time=start_time,
+                end_time=end_time,
+                x=x,
+                y=y,
             )
+            for speakers, start_time, end_time, x, y in zip(
+                segments["speakers"].tolist(),
+                segments["start_time"].tolist(),
+                segments["end_time"].tolist(),
+                segments["x"].tolist(),
+                segments["y"].tolist(),
+            )
+        ]
 
         crops = Crops(
-            original_width=video_file.get_width_pixels(),
-            original_height=video_file.get_height_pixels(),
+            original_width=rois.original_width,
+            original_height=rois.original_height,
             crop_width=resize_width,
             crop_height=resize_height,
             segments=crop_segments,
@@ -196,8 +432,187 @@ class Resizer:
 
         return crops
 
-    def _calc_resize_width_and_height_pixels(
+    def _analyze_segments(
+        self,
+        segments: list[dict],
+        video_file: VideoFile,
+        samples_per_segment: int,
+        face_detect_width: int,
+        n_face_detect_batches: int,
+        sample_tolerance: float = None,
+        frame_pool: FramePool = None,
+    ) -> list[dict]:
+        """
+        Find the faces in each segment and add the region of interest of each segment.
+
+        Parameters
+        ----------
+        segments: list[dict]
+            speakers: list[int]
+                list of speaker numbers for the speakers talking in the segment
+            start_time: float
+                start time of the segment in seconds
+            end_time: float
+                end time of the segment in seconds
+            sample_seed: int
+                seed for sampling the frames of the segment
+        video_file: VideoFile
+            The video file to analyze.
+        samples_per_segment: int
+            Number of samples to take per segment for face detection.
+        face_detect_width: int
+            Width to resize the frames to for face detection.
+        n_face_detect_batches: int
+            Number of batches to process for face detection.
+        sample_tolerance: float
+            Convergence tolerance in pixels for adaptive sampling. Default is None
+            (fixed sampling).
+        frame_pool: FramePool
+            Frames already decoded for face detection. Default is None (decode every
+            frame).
+
+        Returns
+        -------
+        list[dict]
+            speakers: list[int]
+                list of speaker numbers for the speakers talking in the segment
+            start_time: float
+                start time of the segment in seconds
+            end_time: float
+                end time of the segment in seconds
+            roi: Rect
+                the region of interest of the segment
+        """
+        # both phases detect faces at each segment's first face second
+        frame_cache = None
+        if self._frame_cache_bytes > 0:
+            frame_cache = FrameCache(
+                self._frame_cache_bytes, self._frame_cache_scratch_file
+            )
+
+        logging.debug("Determining the first second with a face for each segment.")
+        segments = self._find_first_sec_with_face_for_each_segment(
+            segments,
+            video_file,
+            face_detect_width,
+            n_face_detect_batches,
+            frame_cache,
+            frame_pool,
+        )
+
+        logging.debug(
+            "Determining the region of interest for {} segments.".format(len(segments))
+        )
+        segments = self._add_roi_to_each_segment(
+            segments,
+            video_file,
+            samples_per_segment,
+            face_detect_width,
+            n_face_detect_batches,
+            sample_tolerance,
+            frame_cache,
+            frame_pool,
+        )
+
+        if frame_cache is not None:
+            frame_cache.clear()
+        return segments
+
+    def _analyze_segments_in_parallel(
         self,
+        segments: list[dict],
+        video_file: VideoFile,
+        samples_per_segment: int,
+        face_detect_width: int,
+        n_face_detect_batches: int,
+        n_workers: int,
+        sample_tolerance: float = None,
+        frame_pool: FramePool = None,
+    ) -> list[dict]:
+        """
+        Shards the segments across a pool of worker processes that each run
+        '_analyze_segments' on their shards. Produces the same segments as
+        '_analyze_segments'.
+
+        Parameters
+        ----------
+        segments: list[dict]
+            See '_analyze_segments'.
+        video_file: VideoFile
+            The video file to analyze.
+        samples_per_segment: int
+            Number of samples to take per segment for face detection.
+        face_detect_width: int
+            Width to resize the frames to for face detection.
+        n_face_detect_batches: int
+            Number of batches to process for face detection.
+        n_workers: int
+            Number of worker processes to use.
+        sample_tolerance: float
+            Convergence tolerance in pixels for adaptive sampling. Default is None
+            (fixed sampling).
+        frame_pool: FramePool
+            Frames already decoded for face detection. The workers map its scratch
+            file read-only. Default is None (decode every frame).
+
+        Returns
+        -------
+        list[dict]
+            See '_analyze_segments'.
+        """
+        # several shards per worker so a shard with long segments doesn't stall the
+        # whole pool
+        n_shards = min(n_workers * 4, len(segments))
+        shard_bounds = np.linspace(0, len(segments), n_shards + 1).astype(int)
+        shards = [
+            segments[shard_bounds[i] : shard_bounds[i + 1]] for i in range(n_shards)
+        ]
+        logging.debug(
+            "Analyzing {} segments in {} shards with {} workers.".format(
+                len(segments), n_shards, n_workers
+            )
+        )
+
+        # spawn instead of fork -> MediaPipe and torch aren't fork safe
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker_resizer,
+            initargs=(
+                self._face_detect_margin,
+                self._device,
+                self._face_grouping,
+                # each worker has its own cache -> split the budget between them
+                self._frame_cache_bytes // n_workers,
+                self._frame_cache_scratch_file,
+            ),
+        ) as executor:
+            shard_rois = executor.map(
+                _analyze_segments_in_worker,
+                shards,
+                [video_file.path] * n_shards,
+                [samples_per_segment] * n_shards,
+                [face_detect_width] * n_shards,
+                [n_face_detect_batches] * n_shards,
+                [sample_tolerance] * n_shards,
+                [frame_pool] * n_shards,
+            )
+            rois = [roi for shard in shard_rois for roi in shard]
+
+        for segment, roi in zip(segments, rois):
+            for key in [
+                "first_face_sec",
+                "first_face_pts",
+                "found_face",
+                "sample_seed",
+                "face_search_start",
+            ]:
+                segment.pop(key, None)
+            segment["roi"] = roi
+        return segments
+
+    @staticmethod
+    def _calc_resize_width_and_height_pixels(
         original_width_pixels: int,
         original_height_pixels: int,
         resize_aspect_ratio: tuple[int, int],
@@ -275,45 +690,10 @@ class Resizer:
             end_time: float
                 end time of the segment in seconds
         """
-        segments_idx = 0
-        for scene_change_sec in scene_changes:
-            segment = speaker_segments[segments_idx]
-            while scene_change_sec > (segment["end_time"]):
-                segments_idx += 1
-                segment = speaker_segments[segments_idx]
-            # scene change is close to speaker segment end -> merge the two
-            if 0 < (segment["end_time"] - scene_change_sec) < scene_merge_threshold:
-                segment["end_time"] = scene_change_sec
-                if segments_idx == len(speaker_segments) - 1:
-                    continue
-                next_segment = speaker_segments[segments_idx + 1]
-                next_segment["start_time"] = scene_change_sec
-                continue
-            # scene change is close to speaker segment start -> merge the two
-            if 0 < (scene_change_sec - segment["start_time"]) < scene_merge_threshold:
-                segment["start_time"] = scene_change_sec
-                if segments_idx == 0:
-                    continue
-                prev_segment = speaker_segments[segments_idx - 1]
-                prev_segment["end_time"] = scene_change_sec
-                continue
-            # scene change already exists
-            if scene_change_sec == segment["end_time"]:
-                continue
-            # add scene change to segments
-            new_segment = {
-                "start_time": scene_change_sec,
-                "speakers": segment["speakers"],
-                "end_time": segment["end_time"],
-            }
-            segment["end_time"] = scene_change_sec
-            speaker_segments = (
-                speaker_segments[: segments_idx + 1]
-                + [new_segment]
-                + speaker_segments[segments_idx + 1 :]
-            )
-
-        return speaker_segments
+        segments = merge_scene_changes(
+            segments_to_array(speaker_segments), scene_changes, scene_merge_threshold
+        )
+        return array_to_segments(segments)
 
     def _find_first_sec_with_face_for_each_segment(
         self,
@@ -321,6 +701,8 @@ class Resizer:
         video_file: VideoFile,
         face_detect_width: int,
         n_face_detect_batches: int,
+        frame_cache: FrameCache = None,
+        frame_pool: FramePool = None,
     ) -> list[dict]:
         """
         Find the first frame in a segment with a face.
@@ -335,10 +717,22 @@ class Resizer:
                     start time of the segment in seconds
                 end_time: float
                     end time of the segment in seconds
+                face_search_start: float, optional
+                    the second to start looking for faces at, or None if the segment
+                    is known to have no face (see '_add_keyframe_face_hints')
         video_file: VideoFile
             The video file to analyze.
+        face_detect_width: int
+            The width to use for face detection.
         n_face_detect_batches: int
             The number of batches to use for identifyinng faces from a video file
+        frame_cache: FrameCache
+            Filled with the frame at each segment's first face and its detections,
+            which the ROI sampling analyzes again. Default is None (no caching).
+        frame_pool: FramePool
+            Frames already decoded for face detection (see 'vid_proc.analyze_video').
+            Requested seconds close to a pooled frame aren't decoded again. Default is
+            None (decode every frame).
 
         Returns
         -------
@@ -352,9 +746,12 @@ class Resizer:
                     end time of the segment in seconds
                 first_face_sec: float
                     the first second in the segment with a face
+                first_face_pts: int
+                    the pts of the frame at 'first_face_sec', if a face was found
                 found_face: bool
                     whether or not a face was found in the segment
         """
+        analyzed_segments = 0
         for segment in segments:
             start_time = segment["start_time"]
             end_time = segment["end_time"]
@@ -362,22 +759,38 @@ class Resizer:
             segment["first_face_sec"] = start_time + (end_time - start_time) / 8
             segment["found_face"] = False
             segment["is_analyzed"] = False
+            # the keyframe scan narrowed down where the first face is
+            if "face_search_start" in segment:
+                face_search_start = segment.pop("face_search_start")
+                if face_search_start is None:
+                    segment["is_analyzed"] = True
+                    analyzed_segments += 1
+                else:
+                    segment["first_face_sec"] = face_search_start
 
         batch_period = 1  # interval length to sample each segment at each iteration
         sample_period = 1  # interval between consecutive samples
-        analyzed_segments = 0
         while analyzed_segments < len(segments):
             # select times to detect faces from
             detect_secs = []
-            for segment in segments:
+            detect_bounds = []
+            detect_segment_idxs = []
+            for segment_idx, segment in enumerate(segments):
                 if segment["is_analyzed"] is True:
                     continue
                 segment_secs_left = segment["end_time"] - segment["first_face_sec"]
                 num_samples = min(batch_period, segment_secs_left) // sample_period
                 num_samples = max(1, int(num_samples))
                 segment["num_samples"] = num_samples
-                for i in range(num_samples):
-                    detect_secs.append(segment["first_face_sec"] + i * sample_period)
+                segment_secs = [
+                    segment["first_face_sec"] + i * sample_period
+                    for i in range(num_samples)
+                ]
+                detect_secs += segment_secs
+                detect_bounds += _calc_sample_bounds(
+                    segment_secs, segment["start_time"], segment["end_time"]
+                ).tolist()
+                detect_segment_idxs += [segment_idx] * num_samples
 
             # detect faces
             n_batches = self._calc_n_batches(
@@ -388,21 +801,41 @@ class Resizer:
             )
             frames_per_batch = int(len(detect_secs) // n_batches + 1)
             face_detections = []
+            # segment index -> pts of the segment's first frame with a face
+            first_face_pts = {}
             for i in range(n_batches):
-                frames = extract_frames(
+                batch_start = i * frames_per_batch
+                batch_end = min((i + 1) * frames_per_batch, len(detect_secs))
+                (
+                    batch_frames,
+                    batch_face_detections,
+                    batch_pts,
+                ) = self._detect_faces_at_secs(
                     video_file,
-                    detect_secs[
-                        i
-                        * frames_per_batch : min(
-                            (i + 1) * frames_per_batch, len(detect_secs)
-                        )
-                    ],
+                    detect_secs[batch_start:batch_end],
+                    face_detect_width,
+                    frame_pool=frame_pool,
+                    sec_bounds=detect_bounds[batch_start:batch_end],
+                    return_pts=True,
                 )
-                face_detections += self._detect_faces(frames, face_detect_width)
+                face_detections += batch_face_detections
+                # only the frame at the first face is analyzed again -> the other
+                # frames aren't worth their memory
+                for frame, face_detection, pts, segment_idx in zip(
+                    batch_frames,
+                    batch_face_detections,
+                    batch_pts,
+                    detect_segment_idxs[batch_start:batch_end],
+                ):
+                    if face_detection is None or segment_idx in first_face_pts:
+                        continue
+                    first_face_pts[segment_idx] = pts
+                    if frame_cache is not None:
+                        frame_cache.put((pts, face_detect_width), frame, face_detection)
 
             # check if any faces were found for each segment
             idx = 0
-            for segment in segments:
+            for segment_num, segment in enumerate(segments):
                 # segment already analyzed
                 if segment["is_analyzed"] is True:
                     continue
@@ -412,6 +845,7 @@ class Resizer:
                     faces = face_detections[idx]
                     if faces is not None:
                         segment["found_face"] = True
+                        segment["first_face_pts"] = first_face_pts[segment_num]
                         break
                     segment["first_face_sec"] += sample_period
                     idx += 1
@@ -429,11 +863,100 @@ class Resizer:
             batch_period = (batch_period + 3) * 2
 
         for segment in segments:
-            del segment["num_samples"]
+            segment.pop("num_samples", None)
             del segment["is_analyzed"]
 
         return segments
 
+    def _add_keyframe_face_hints(
+        self,
+        segments: list[dict],
+        video_file: VideoFile,
+        face_detect_width: int,
+    ) -> list[dict]:
+        """
+        Detect faces in every keyframe of the video in a single pass and add where to
+        start looking for the first face of each segment that has keyframes.
+
+        Parameters
+        ----------
+        segments: list[dict]
+            speakers: list[int]
+                list of speaker numbers for the speakers talking in the segment
+            start_time: float
+                start time of the segment in seconds
+            end_time: float
+                end time of the segment in seconds
+        video_file: VideoFile
+            The video file to analyze.
+        face_detect_width: int
+            The width to use for face detection.
+
+        Returns
+        -------
+        list[dict]
+            The segments. Segments with keyframes in the interval searched for faces
+            get the key 'face_search_start': the last keyframe before the first
+            keyframe with a face, or None if none of its keyframes has a face.
+        """
+        detect_width, detect_height = self._calc_face_detect_dims(
+            video_file, face_detect_width
+        )
+        keyframe_secs = []
+        keyframe_has_face = []
+        frames = []
+
+        def detect_faces_in_frames():
+            face_detections = self._detect_faces(
+                frames, face_detect_width, video_file.get_width_pixels()
+            )
+            keyframe_has_face.extend(
+                face_detection is not None for face_detection in face_detections
+            )
+            frames.clear()
+
+        for keyframe_sec, frame in extract_keyframes(
+            video_file, width=detect_width, height=detect_height
+        ):
+            keyframe_secs.append(keyframe_sec)
+            frames.append(frame)
+            # detect in chunks so only a few frames are in memory at once
+            if len(frames) == 64:
+                detect_faces_in_frames()
+        detect_faces_in_frames()
+
+        keyframe_secs = np.array(keyframe_secs)
+        keyframe_has_face = np.array(keyframe_has_face, dtype=bool)
+        logging.debug(
+            "Found faces in {} of {} keyframes.".format(
+                np.sum(keyframe_has_face), len(keyframe_secs)
+            )
+        )
+
+        for segment in segments:
+            start_time = segment["start_time"]
+            end_time = segment["end_time"]
+            # same interval '_find_first_sec_with_face_for_each_segment' searches
+            search_start = start_time + (end_time - start_time) / 8
+            search_end = end_time - 0.25
+            first_idx = np.searchsorted(keyframe_secs, search_start, side="left")
+            last_idx = np.searchsorted(keyframe_secs, search_end, side="left")
+            # no keyframes to judge the segment by -> search the whole segment
+            if first_idx >= last_idx:
+                continue
+            face_idxs = np.nonzero(keyframe_has_face[first_idx:last_idx])[0]
+            if len(face_idxs) == 0:
+                segment["face_search_start"] = None
+                continue
+            face_idx = first_idx + face_idxs[0]
+            if face_idx == 0:
+                segment["face_search_start"] = search_start
+            else:
+                segment["face_search_start"] = max(
+                    search_start, float(keyframe_secs[face_idx - 1])
+                )
+        return segments
+
     def _calc_n_batches(
         self,
         video_file: VideoFile,
@@ -461,11 +984,18 @@ class Resizer:
         int
             The number of batches to use.
         """
-        # calculate memory needed to extract frames to CPU
-        vid_height = video_file.get_height_pixels()
-        vid_width = video_file.get_width_pixels()
+        # calculate memory needed to extract frames to CPU -> frames are extracted
+        # directly at the face detection resolution
+        detect_width, detect_height = self._calc_face_detect_dims(
+            video_file, face_detect_width
+        )
+        logging.debug(
+            "Face detection dimensions: {}x{}".format(detect_height, detect_width)
+        )
         num_color_channels = 3
-        bytes_per_frame = calc_img_bytes(vid_height, vid_width, num_color_channels)
+        bytes_per_frame = calc_img_bytes(
+            detect_height, detect_width, num_color_channels
+        )
         total_extract_bytes = num_frames * bytes_per_frame
         logging.debug(
             "Need {:.3f} GiB to extract (at most) {} frames".format(
@@ -474,16 +1004,6 @@ class Resizer:
         )
 
         # calculate memory needed to detect faces -> could be CPU or GPU
-        downsample_factor = max(vid_width / face_detect_width, 1)
-        face_detect_height = int(vid_height // downsample_factor)
-        logging.debug(
-            "Face detection dimensions: {}x{}".format(
-                face_detect_height, face_detect_width
-            )
-        )
-        bytes_per_frame = calc_img_bytes(
-            face_detect_height, face_detect_width, num_color_channels
-        )
         total_face_detect_bytes = num_frames * bytes_per_frame
         logging.debug(
             "Need {:.3f} GiB to detect faces from (at most) {} frames".format(
@@ -493,6 +1013,9 @@ class Resizer:
 
         # calculate number of batches to use
         free_cpu_memory = pytorch.get_free_cpu_memory()
+        if not self._frame_cache_scratch_file:
+            # the frame cache is filled while the batches are extracted
+            free_cpu_memory = max(free_cpu_memory - self._frame_cache_bytes, 1)
         if torch.cuda.is_available():
             n_extract_batches = int((total_extract_bytes // free_cpu_memory) + 1)
         else:
@@ -516,10 +1039,238 @@ class Resizer:
         )
         return n_batches
 
+    def _calc_face_detect_dims(
+        self,
+        video_file: VideoFile,
+        face_detect_width: int,
+    ) -> tuple[int, int]:
+        """
+        Calculate the dimensions frames are extracted at for face detection. Frames
+        are only ever downscaled, preserving the aspect ratio of the video.
+
+        Parameters
+        ----------
+        video_file: VideoFile
+            The video file to analyze.
+        face_detect_width: int
+            The width to use for face detection.
+
+        Returns
+        -------
+        tuple[int, int]
+            The width and height in pixels to extract frames at.
+        """
+        vid_width = video_file.get_width_pixels()
+        vid_height = video_file.get_height_pixels()
+        downsample_factor = max(vid_width / face_detect_width, 1)
+        return int(vid_width / downsample_factor), int(vid_height / downsample_factor)
+
+    def _detect_faces_at_secs(
+        self,
+        video_file: VideoFile,
+        detect_secs: list[float],
+        face_detect_width: int,
+        frame_cache: FrameCache = None,
+        frame_pool: FramePool = None,
+        sec_bounds: list[tuple[float, float]] = None,
+        cached_pts: list[int] = None,
+        return_pts: bool = False,
+    ) -> tuple[list[np.ndarray], list[np.ndarray]]:
+        """
+        Extract the frames at the given seconds and detect the faces in them. Frames
+        found in the cache are neither decoded nor face-detected again.
+
+        Parameters
+        ----------
+        video_file: VideoFile
+            The video file to extract frames from.
+        detect_secs: list[float]
+            The seconds to detect faces at.
+        face_detect_width: int
+            The width to use for face detection.
+        frame_cache: FrameCache
+            Cache of the frames at each segment's first face and their detections
+            (see '_find_first_sec_with_face_for_each_segment'). Only looked up, never
+            filled. Default is None (no caching).
+        frame_pool: FramePool
+            Frames already decoded for face detection (see 'vid_proc.analyze_video').
+            Requested seconds close to a pooled frame aren't decoded again. Default is
+            None (decode every frame).
+        sec_bounds: list[tuple[float, float]]
+            The [start, end) interval in seconds a pooled frame must be in to stand
+            in for each requested second (see '_calc_sample_bounds'). Default is None
+            (the frame pool isn't used).
+        cached_pts: list[int]
+            The pts of the frame to look up in 'frame_cache' for each requested
+            second, or None for the seconds whose frame isn't known to be cached.
+            Default is None (nothing is looked up).
+        return_pts: bool
+            Whether to also return the pts of each frame. Default is False.
+
+        Returns
+        -------
+        tuple[list[np.ndarray], list[np.ndarray]]
+            The extracted frames and the face detections of each frame (see
+            '_detect_faces'). If 'return_pts' is True, the pts of each frame are
+            returned as a third element.
+        """
+        if frame_cache is None or cached_pts is None:
+            cached_pts = [None] * len(detect_secs)
+        cached = [
+            None if pts is None else frame_cache.get((pts, face_detect_width))
+            for pts in cached_pts
+        ]
+        missing_idxs = [i for i, entry in enumerate(cached) if entry is None]
+        logging.debug(
+            "Extracting {} frames ({} cached)".format(
+                len(missing_idxs), len(detect_secs) - len(missing_idxs)
+            )
+        )
+
+        frames, face_detections, frame_pts = [], [], []
+        if len(missing_idxs) > 0:
+            extracted = self._extract_face_detect_frames(
+                video_file,
+                [detect_secs[i] for i in missing_idxs],
+                face_detect_width,
+                frame_pool,
+                (
+                    [sec_bounds[i] for i in missing_idxs]
+                    if sec_bounds is not None
+                    else None
+                ),
+                return_pts,
+            )
+            frames, frame_pts = extracted if return_pts else (extracted, [])
+            face_detections = self._detect_faces(
+                frames, face_detect_width, video_file.get_width_pixels()
+            )
+        if len(missing_idxs) == len(detect_secs):
+            if return_pts:
+                return frames, face_detections, frame_pts
+            return frames, face_detections
+
+        frames = iter(frames)
+        face_detections = iter(face_detections)
+        frame_pts = iter(frame_pts)
+        all_frames, all_face_detections, all_frame_pts = [], [], []
+        for pts, entry in zip(cached_pts, cached):
+            if entry is None:
+                all_frames.append(next(frames))
+                all_face_detections.append(next(face_detections))
+                all_frame_pts.append(next(frame_pts, None))
+            else:
+                all_frames.append(entry[0])
+                all_face_detections.append(entry[1])
+                all_frame_pts.append(pts)
+        if return_pts:
+            return all_frames, all_face_detections, all_frame_pts
+        return all_frames, all_face_detections
+
+    def _extract_face_detect_frames(
+        self,
+        video_file: VideoFile,
+        extract_secs: list[float],
+        face_detect_width: int,
+        frame_pool: FramePool = None,
+        sec_bounds: list[tuple[float, float]] = None,
+        return_pts: bool = False,
+    ) -> list[np.ndarray]:
+        """
+        Extract RGB frames scaled to the face detection resolution by the decoder.
+
+        Parameters
+        ----------
+        video_file: VideoFile
+            The video file to extract frames from.
+        extract_secs: list[float]
+            The seconds to extract frames from.
+        face_detect_width: int
+            The width to use for face detection.
+        frame_pool: FramePool
+            Frames already decoded for face detection. Seconds close to a pooled frame
+            in the same scene and within the second's bounds are served from the pool
+            (see 'FramePool.find'). Default is None (decode every frame).
+        sec_bounds: list[tuple[float, float]]
+            The [start, end) interval in seconds a pooled frame must be in to stand
+            in for each second. Default is None (the frame pool isn't used).
+        return_pts: bool
+            Whether to also return the pts (in units of the video stream's time base)
+            of each frame. Default is False.
+
+        Returns
+        -------
+        list[np.ndarray]
+            The extracted frames. If 'return_pts' is True, a tuple of the frames and
+            the pts of each frame is returned.
+        """
+        detect_width, detect_height = self._calc_face_detect_dims(
+            video_file, face_detect_width
+        )
+        # the pool is only usable if it was decoded at the face detection resolution.
+        # Without bounds a pooled frame could be from another segment
+        pool_idxs = np.full(len(extract_secs), -1)
+        if (
+            frame_pool is not None
+            and sec_bounds is not None
+            and tuple(frame_pool.frame_shape[:2]) == (detect_height, detect_width)
+        ):
+            pool_idxs = frame_pool.find(extract_secs, sec_bounds)
+        decode_idxs = np.flatnonzero(pool_idxs < 0).tolist()
+
+        decoded_frames, decoded_pts = [], []
+        if len(decode_idxs) > 0:
+            decoded = extract_frames(
+                video_file,
+                [extract_secs[i] for i in decode_idxs],
+                sequential=True,
+                width=detect_width,
+                height=detect_height,
+                pixel_format="rgb24",
+                thread_type="AUTO",
+                keyframe_index=video_file.get_keyframe_index(),
+                return_pts=return_pts,
+            )
+            decoded_frames, decoded_pts = decoded if return_pts else (decoded, [])
+        if len(decode_idxs) == len(extract_secs):
+            if return_pts:
+                return decoded_frames, decoded_pts
+            return decoded_frames
+
+        logging.debug(
+            "Decoded {} of {} frames ({} from the frame pool)".format(
+                len(decode_idxs),
+                len(extract_secs),
+                len(extract_secs) - len(decode_idxs),
+            )
+        )
+        decoded_frames = iter(decoded_frames)
+        frames = [
+            next(decoded_frames) if pool_idx < 0 else frame_pool[pool_idx]
+            for pool_idx in pool_idxs.tolist()
+        ]
+        if not return_pts:
+            return frames
+
+        # the pooled seconds are the pts of the pooled frames in seconds
+        time_base = video_file.get_keyframe_index().time_base
+        decoded_pts = iter(decoded_pts)
+        pool_secs = frame_pool.secs
+        frame_pts = [
+            (
+                next(decoded_pts)
+                if pool_idx < 0
+                else int(round(pool_secs[pool_idx] / time_base))
+            )
+            for pool_idx in pool_idxs.tolist()
+        ]
+        return frames, frame_pts
+
     def _detect_faces(
         self,
         frames: list[np.ndarray],
         face_detect_width: int,
+        video_width: int = None,
     ) -> list[np.ndarray]:
         """
         Detect faces in a list of frames using MediaPipe Face Detection.
@@ -527,16 +1278,21 @@ class Resizer:
         Parameters
         ----------
         frames: list[np.ndarray]
-            The frames to detect faces in.
+            The RGB frames to detect faces in. Frames wider than 'face_detect_width'
+            are downscaled first; frames extracted at the face detection resolution
+            (see '_calc_face_detect_dims') are used as is.
         face_detect_width: int
             The width to use for face detection.
+        video_width: int
+            The width in pixels of the source video the detections are scaled back
+            to. Default is None (the width of the frames).
 
         Returns
         -------
         list[np.ndarray]
             The face detections for each frame. Each detection is a numpy array of
-            shape (N, 4) containing [x1, y1, x2, y2] coordinates in pixels, or None
-            if no faces are detected.
+            shape (N, 4) containing [x1, y1, x2, y2] coordinates in pixels of the
+            source video, or None if no faces are detected.
         """
         if len(frames) == 0:
             logging.debug("No frames to detect faces in.")
@@ -546,38 +1302,40 @@ class Resizer:
         face_detections = []
 
         for frame in frames:
-            # フレームをリサイズ�E�EediaPipe用�E�E
-            downsample_factor = max(frame.shape[1] / face_detect_width, 1)
-            detect_height = int(frame.shape[0] / downsample_factor)
-            resized_frame = cv2.resize(frame, (face_detect_width, detect_height))
-
-            # RGBに変換�E�EediaPipeはRGBを要求！E
-            rgb_frame = cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB)
+            # フレームが顔検出用の幅より大きい場合のみリサイズ（MediaPipe用）
+            source_width = video_width or frame.shape[1]
+            if frame.shape[1] > face_detect_width:
+                resize_factor = frame.shape[1] / face_detect_width
+                frame = cv2.resize(
+                    frame, (face_detect_width, int(frame.shape[0] / resize_factor))
+                )
+            detect_height, detect_width = frame.shape[0], frame.shape[1]
+            downsample_factor = source_width / detect_width
 
-            # 顔検�E
-            results = self._face_detector.process(rgb_frame)
+            # 顔検出（フレームはRGB。MediaPipeはRGBを要求する）
+            with self._face_detector_lock:
+                results = self._face_detector.process(frame)
 
-            # 検�E結果をMTCNN形式に変換
+            # 検出結果をMTCNN形式に変換
             if results.detections:
                 detections = []
                 for detection in results.detections:
                     bbox = detection.location_data.relative_bounding_box
                     # 正規化座標をピクセル座標に変換
-                    x1 = int(bbox.xmin * face_detect_width)
+                    x1 = int(bbox.xmin * detect_width)
                     y1 = int(bbox.ymin * detect_height)
-                    x2 = int((bbox.xmin + bbox.width) * face_detect_width)
+                    x2 = int((bbox.xmin + bbox.width) * detect_width)
                     y2 = int((bbox.ymin + bbox.height) * detect_height)
 
-                    # マ�Eジンを適用
                     # マージンを適用（downsampled座標空間に合わせてスケール）
                     # 元の解像度でのマージンを維持するため、downsample_factorで割る
                     scaled_margin = int(self._face_detect_margin / downsample_factor)
                     x1 = max(0, x1 - scaled_margin)
                     y1 = max(0, y1 - scaled_margin)
-                    x2 = min(face_detect_width, x2 + scaled_margin)
+                    x2 = min(detect_width, x2 + scaled_margin)
                     y2 = min(detect_height, y2 + scaled_margin)
 
-                    # 允E�E解像度にスケール
+                    # 元の解像度にスケール
                     x1 = int(x1 * downsample_factor)
                     y1 = int(y1 * downsample_factor)
                     x2 = int(x2 * downsample_factor)
@@ -585,7 +1343,7 @@ class Resizer:
 
                     detections.append(np.array([x1, y1, x2, y2]))
 
-                # MTCNN形弁E (N, 4)の配�E
+                # MTCNN形式: (N, 4)の配列
                 if detections:
                     face_detections.append(np.array(detections))
                 else:
@@ -596,18 +1354,19 @@ class Resizer:
         logging.debug("Detected faces in {} frames.".format(len(face_detections)))
         return face_detections
 
-    def _add_x_y_coords_to_each_segment(
+    def _add_roi_to_each_segment(
         self,
         segments: list[dict],
         video_file: VideoFile,
-        resize_width: int,
-        resize_height: int,
         samples_per_segment: int,
         face_detect_width: int,
         n_face_detect_batches: int,
+        sample_tolerance: float = None,
+        frame_cache: FrameCache = None,
+        frame_pool: FramePool = None,
     ) -> list[dict]:
         """
-        Add the x and y coordinates to resize each segment to.
+        Add the region of interest (ROI) of each segment.
 
         Parameters
         ----------
@@ -624,17 +1383,23 @@ class Resizer:
                 whether or not a face was found in the segment
         video_file: VideoFile
             The video file to analyze.
-        resize_width: int
-            The width to resize the video to.
-        resize_height: int
-            The height to resize the video to.
         samples_per_segment: int
             Number of samples to take per segment for face detection.
         face_detect_width: int
             Width to resize the frames to for face detection.
         n_face_detect_batches: int
             Number of batches to process for face detection.
-
+        sample_tolerance: float
+            Convergence tolerance in pixels for adaptive sampling. Default is None
+            (fixed sampling).
+        frame_cache: FrameCache
+            Cache of the frames at each segment's first face and their detections
+            (see '_find_first_sec_with_face_for_each_segment'). Default is None (no
+            caching).
+        frame_pool: FramePool
+            Frames already decoded for face detection (see 'vid_proc.analyze_video').
+            Requested seconds close to a pooled frame aren't decoded again. Default is
+            None (decode every frame).
 
         Returns
         -------
@@ -645,10 +1410,8 @@ class Resizer:
                 start time of the segment in seconds
             end_time: float
                 end time of the segment in seconds
-            x: int
-                x-coordinate of the top left corner of the resized segment
-            y: int
-                y-coordinate of the top left corner of the resized segment
+            roi: Rect
+                the region of interest of the segment
         """
         num_segments = len(segments)
         num_frames = num_segments * samples_per_segment
@@ -656,7 +1419,7 @@ class Resizer:
             video_file, num_frames, face_detect_width, n_face_detect_batches
         )
         segments_per_batch = int(num_segments // n_batches + 1)
-        segments_with_xy_coords = []
+        segments_with_rois = []
         for i in range(n_batches):
             logging.debug("Analyzing batch {} of {}.".format(i, n_batches))
             cur_segments = segments[
@@ -666,27 +1429,29 @@ class Resizer:
             if len(cur_segments) == 0:
                 logging.debug("No segments left to analyze. (Batch {})".format(i))
                 break
-            segments_with_xy_coords += self._add_x_y_coords_to_each_segment_batch(
+            segments_with_rois += self._add_roi_to_each_segment_batch(
                 segments=cur_segments,
                 video_file=video_file,
-                resize_width=resize_width,
-                resize_height=resize_height,
                 samples_per_segment=samples_per_segment,
                 face_detect_width=face_detect_width,
+                sample_tolerance=sample_tolerance,
+                frame_cache=frame_cache,
+                frame_pool=frame_pool,
             )
-        return segments_with_xy_coords
+        return segments_with_rois
 
-    def _add_x_y_coords_to_each_segment_batch(
+    def _add_roi_to_each_segment_batch(
         self,
         segments: list[dict],
         video_file: VideoFile,
-        resize_width: int,
-        resize_height: int,
         samples_per_segment: int,
         face_detect_width: int,
+        sample_tolerance: float = None,
+        frame_cache: FrameCache = None,
+        frame_pool: FramePool = None,
     ) -> list[dict]:
         """
-        Add the x and y coordinates to resize each segment to for a given batch.
+        Add the region of interest (ROI) of each segment for a given batch.
 
         Parameters
         ----------
@@ -703,14 +1468,21 @@ class Resizer:
                 whether or not a face was found in the segment
         video_file: VideoFile
             The video file to analyze.
-        resize_width: int
-            The width to resize the video to.
-        resize_height: int
-            The height to resize the video to.
         samples_per_segment: int
             Number of samples to take per segment for analyzing face locations.
         face_detect_width: int
             Width to which the video frames are resized for face detection.
+        sample_tolerance: float
+            Convergence tolerance in pixels for adaptive sampling (see
+            '_calc_rois_by_adaptive_sampling'). Default is None (fixed sampling).
+        frame_cache: FrameCache
+            Cache of the frames at each segment's first face and their detections
+            (see '_find_first_sec_with_face_for_each_segment'). Default is None (no
+            caching).
+        frame_pool: FramePool
+            Frames already decoded for face detection (see 'vid_proc.analyze_video').
+            Requested seconds close to a pooled frame aren't decoded again. Default is
+            None (decode every frame).
 
         Returns
         -------
@@ -721,18 +1493,99 @@ class Resizer:
                 start time of the segment in seconds
             end_time: float
                 end time of the segment in seconds
-            x: int
-                x-coordinate of the top left corner of the resized segment
-            y: int
-                y-coordinate of the top left corner of the resized segment
+            roi: Rect
+                the region of interest of the segment
+        """
+        face_segments = [segment for segment in segments if segment["found_face"]]
+        if sample_tolerance is None:
+            face_rois = self._calc_rois_by_fixed_sampling(
+                face_segments,
+                video_file,
+                samples_per_segment,
+                face_detect_width,
+                frame_cache,
+                frame_pool,
+            )
+        else:
+            face_rois = self._calc_rois_by_adaptive_sampling(
+                face_segments,
+                video_file,
+                samples_per_segment,
+                face_detect_width,
+                sample_tolerance,
+                frame_cache,
+                frame_pool,
+            )
+
+        logging.debug("Calculating ROI for {} segments.".format(len(segments)))
+        face_rois = iter(face_rois)
+        for segment in segments:
+            if segment["found_face"] is True:
+                roi = next(face_rois)
+            else:
+                logging.debug("Using default ROI for segment {}".format(segment))
+                roi = Rect(
+                    x=(video_file.get_width_pixels()) // 4,
+                    y=(video_file.get_height_pixels()) // 4,
+                    width=(video_file.get_width_pixels()) // 2,
+                    height=(video_file.get_height_pixels()) // 2,
+                )
+            del segment["found_face"]
+            del segment["first_face_sec"]
+            del segment["sample_seed"]
+            segment.pop("first_face_pts", None)
+            segment["roi"] = Rect(
+                int(roi.x), int(roi.y), int(roi.width), int(roi.height)
+            )
+        logging.debug("Calculated ROI for {} segments.".format(len(segments)))
+
+        return segments
+
+    def _calc_rois_by_fixed_sampling(
+        self,
+        segments: list[dict],
+        video_file: VideoFile,
+        samples_per_segment: int,
+        face_detect_width: int,
+        frame_cache: FrameCache = None,
+        frame_pool: FramePool = None,
+    ) -> list[Rect]:
+        """
+        Find the region of interest (ROI) of each segment from a fixed number of
+        randomly sampled frames.
+
+        Parameters
+        ----------
+        segments: list[dict]
+            The segments with a face (see '_add_roi_to_each_segment_batch').
+        video_file: VideoFile
+            The video file to analyze.
+        samples_per_segment: int
+            Number of samples to take per segment for analyzing face locations.
+        face_detect_width: int
+            Width to which the video frames are resized for face detection.
+        frame_cache: FrameCache
+            Cache of the frames at each segment's first face and their detections
+            (see '_find_first_sec_with_face_for_each_segment'). Default is None (no
+            caching).
+        frame_pool: FramePool
+            Frames already decoded for face detection (see 'vid_proc.analyze_video').
+            Requested seconds close to a pooled frame aren't decoded again. Default is
+            None (decode every frame).
+
+        Returns
+        -------
+        list[Rect]
+            The region of interest of each segment.
         """
         fps = video_file.get_frame_rate()
 
         # define frames to analyze from each segment
         detect_secs = []
+        detect_bounds = []
+        cached_pts = []
+        num_samples_per_segment = []
         for segment in segments:
-            if segment["found_face"] is False:
-                continue
             # define interval over which to analyze faces
             end_time = segment["end_time"]
             first_face_sec = segment["first_face_sec"]
@@ -740,56 +1593,216 @@ class Resizer:
             # get sample locations
             frames_left = int((analyze_end_time - first_face_sec) * fps + 1)
             num_samples = min(frames_left, samples_per_segment)
-            segment["num_samples"] = num_samples
+            num_samples_per_segment.append(num_samples)
             # add first face, sample the rest
-            detect_secs.append(first_face_sec)
+            sample_rng = np.random.default_rng(segment["sample_seed"])
             sample_frames = np.sort(
-                np.random.choice(range(1, frames_left), num_samples - 1, replace=False)
+                sample_rng.choice(
+                    np.arange(1, frames_left), num_samples - 1, replace=False
+                )
             )
-            for sample_frame in sample_frames:
-                detect_secs.append(first_face_sec + sample_frame / fps)
+            segment_secs = [first_face_sec] + [
+                first_face_sec + sample_frame / fps for sample_frame in sample_frames
+            ]
+            detect_secs += segment_secs
+            detect_bounds += _calc_sample_bounds(
+                segment_secs, segment["start_time"], end_time
+            ).tolist()
+            # only the frame at the first face may be cached
+            cached_pts += [segment.get("first_face_pts")] + [None] * (num_samples - 1)
 
         # detect faces from each segment
-        logging.debug("Extracting {} frames".format(len(detect_secs)))
-        frames = extract_frames(video_file, detect_secs)
-        logging.debug("Extracted {} frames".format(len(detect_secs)))
-        face_detections = self._detect_faces(frames, face_detect_width)
+        frames, face_detections = self._detect_faces_at_secs(
+            video_file,
+            detect_secs,
+            face_detect_width,
+            frame_cache=frame_cache,
+            frame_pool=frame_pool,
+            sec_bounds=detect_bounds,
+            cached_pts=cached_pts,
+        )
+        # frames are smaller than the video -> face crops need to be scaled down
+        frame_scale = (
+            frames[0].shape[1] / video_file.get_width_pixels() if frames else 1
+        )
 
-        logging.debug("Calculating ROI for {} segments.".format(len(segments)))
-        # find roi for each segment
+        rois = []
         idx = 0
+        for num_samples in num_samples_per_segment:
+            rois.append(
+                self._calc_segment_roi(
+                    frames=frames[idx : idx + num_samples],
+                    face_detections=face_detections[idx : idx + num_samples],
+                    frame_scale=frame_scale,
+                )
+            )
+            idx += num_samples
+        return rois
+
+    def _calc_rois_by_adaptive_sampling(
+        self,
+        segments: list[dict],
+        video_file: VideoFile,
+        samples_per_segment: int,
+        face_detect_width: int,
+        sample_tolerance: float,
+        frame_cache: FrameCache = None,
+        frame_pool: FramePool = None,
+    ) -> list[Rect]:
+        """
+        Find the region of interest (ROI) of each segment by sampling frames in
+        rounds until the ROI converges. Each round adds stratified samples spread
+        over the whole segment; a segment stops being sampled once its ROI moved by
+        at most 'sample_tolerance' pixels over the last round or 'samples_per_segment'
+        frames have been sampled.
+
+        Parameters
+        ----------
+        segments: list[dict]
+            The segments with a face (see '_add_roi_to_each_segment_batch').
+        video_file: VideoFile
+            The video file to analyze.
+        samples_per_segment: int
+            Maximum number of samples to take per segment.
+        face_detect_width: int
+            Width to which the video frames are resized for face detection.
+        sample_tolerance: float
+            The largest change in pixels of the ROI's position or size between two
+            rounds for the ROI to have converged.
+        frame_cache: FrameCache
+            Cache of the frames at each segment's first face and their detections
+            (see '_find_first_sec_with_face_for_each_segment'). Default is None (no
+            caching).
+        frame_pool: FramePool
+            Frames already decoded for face detection (see 'vid_proc.analyze_video').
+            Requested seconds close to a pooled frame aren't decoded again. Default is
+            None (decode every frame).
+
+        Returns
+        -------
+        list[Rect]
+            The region of interest of each segment.
+        """
+        fps = video_file.get_frame_rate()
+        video_width = video_file.get_width_pixels()
+
+        # candidate seconds of each segment, ordered so every prefix is spread over
+        # the segment
+        states = []
         for segment in segments:
-            # find segment roi
-            if segment["found_face"] is True:
+            end_time = segment["end_time"]
+            first_face_sec = segment["first_face_sec"]
+            analyze_end_time = end_time - (end_time - first_face_sec) / 8
+            frames_left = int((analyze_end_time - first_face_sec) * fps + 1)
+            num_samples = min(frames_left, samples_per_segment)
+            sample_rng = np.random.default_rng(segment["sample_seed"])
+            sample_frames = _stratified_sample_frames(
+                sample_rng, frames_left, num_samples - 1
+            )
+            secs = [first_face_sec] + [
+                first_face_sec + frame / fps for frame in sample_frames
+            ]
+            states.append(
+                {
+                    "secs": secs,
+                    # bounded by every candidate, not just the sampled ones, so no
+                    # pooled frame stands in for samples of two rounds
+                    "bounds": _calc_sample_bounds(
+                        secs, segment["start_time"], end_time
+                    ).tolist(),
+                    # only the frame at the first face may be cached
+                    "cached_pts": [segment.get("first_face_pts")]
+                    + [None] * (len(secs) - 1),
+                    "samples": [],
+                    "roi": None,
+                    "done": False,
+                }
+            )
+
+        num_rounds = 0
+        while not all(state["done"] for state in states):
+            # the first round needs a few samples to have a first estimate
+            round_size = 4 if num_rounds == 0 else 3
+            num_rounds += 1
+            detect_secs = []
+            detect_bounds = []
+            cached_pts = []
+            round_states = []
+            for state in states:
+                if state["done"]:
+                    continue
+                num_sampled = len(state["samples"])
+                new_secs = state["secs"][num_sampled : num_sampled + round_size]
+                detect_secs += new_secs
+                detect_bounds += state["bounds"][num_sampled : num_sampled + round_size]
+                cached_pts += state["cached_pts"][
+                    num_sampled : num_sampled + round_size
+                ]
+                round_states.append((state, len(new_secs)))
+
+            frames, face_detections = self._detect_faces_at_secs(
+                video_file,
+                detect_secs,
+                face_detect_width,
+                frame_cache=frame_cache,
+                frame_pool=frame_pool,
+                sec_bounds=detect_bounds,
+                cached_pts=cached_pts,
+            )
+            frame_scale = frames[0].shape[1] / video_width if frames else 1
+
+            idx = 0
+            for state, num_new in round_states:
+                num_sampled = len(state["samples"])
+                for i in range(num_new):
+                    state["samples"].append(
+                        (
+                            state["secs"][num_sampled + i],
+                            frames[idx + i],
+                            face_detections[idx + i],
+                        )
+                    )
+                idx += num_new
+                # frames are analyzed in order of occurrence
+                samples = sorted(state["samples"], key=lambda sample: sample[0])
                 roi = self._calc_segment_roi(
-                    frames=frames[idx : idx + segment["num_samples"]],
-                    face_detections=face_detections[idx : idx + segment["num_samples"]],
+                    frames=[sample[1] for sample in samples],
+                    face_detections=[sample[2] for sample in samples],
+                    frame_scale=frame_scale,
                 )
-                idx += segment["num_samples"]
-                del segment["num_samples"]
-            else:
-                logging.debug("Using default ROI for segment {}".format(segment))
-                roi = Rect(
-                    x=(video_file.get_width_pixels()) // 4,
-                    y=(video_file.get_height_pixels()) // 4,
-                    width=(video_file.get_width_pixels()) // 2,
-                    height=(video_file.get_height_pixels()) // 2,
+                prev_roi = state["roi"]
+                state["roi"] = roi
+                converged = prev_roi is not None and (
+                    max(
+                        abs(roi.x - prev_roi.x),
+                        abs(roi.y - prev_roi.y),
+                        abs(roi.width - prev_roi.width),
+                        abs(roi.height - prev_roi.height),
+                    )
+                    <= sample_tolerance
                 )
-            del segment["found_face"]
-            del segment["first_face_sec"]
-
-            # add crop coordinates to segment
-            crop = self._calc_crop(roi, resize_width, resize_height)
-            segment["x"] = int(crop.x)
-            segment["y"] = int(crop.y)
-        logging.debug("Calculated ROI for {} segments.".format(len(segments)))
+                if converged or len(state["samples"]) == len(state["secs"]):
+                    state["done"] = True
 
-        return segments
+        num_sampled = sum(len(state["samples"]) for state in states)
+        max_sampled = sum(len(state["secs"]) for state in states)
+        logging.debug(
+            "Adaptive sampling analyzed {} of {} frames in {} rounds ({} saved) for "
+            "{} segments.".format(
+                num_sampled,
+                max_sampled,
+                num_rounds,
+                max_sampled - num_sampled,
+                len(states),
+            )
+        )
+        return [state["roi"] for state in states]
 
     def _calc_segment_roi(
         self,
         frames: list[np.ndarray],
         face_detections: list[np.ndarray],
+        frame_scale: float = 1,
     ) -> Rect:
         """
         Find the region of interest (ROI) for a given segment.
@@ -800,6 +1813,9 @@ class Resizer:
             The frames to analyze.
         face_detections: np.ndarray
             The face detection outputs for each frame
+        frame_scale: float
+            The width of the frames divided by the width of the video the face
+            detections are in. Default is 1 (frames at the video's resolution).
 
         Returns
         -------
@@ -808,7 +1824,7 @@ class Resizer:
         """
         segment_roi = None
 
-        # preprocessing for kmeans
+        # gather the bounding boxes of all frames
         bounding_boxes: list[np.ndarray] = []
         k = 0
         for face_detection in face_detections:
@@ -830,28 +1846,20 @@ class Resizer:
             segment_roi = Rect(x1, y1, x2 - x1, y2 - y1)
             return segment_roi
 
-        # use kmeans to group the same bounding boxes together
-        kmeans = KMeans(n_clusters=k, init="k-means++", n_init=2, random_state=0).fit(
-            bounding_boxes
-        )
-        bounding_box_labels = kmeans.labels_
-        bounding_box_groups: list[list[dict]] = [[] for _ in range(k)]
-        kmeans_idx = 0
-        for i, face_detection in enumerate(face_detections):
-            if face_detection is None:
-                continue
-            for bounding_box in face_detection:
-                assert np.sum(bounding_box < 0) == 0
-                bounding_box_label = bounding_box_labels[kmeans_idx]
-                bounding_box_groups[bounding_box_label].append(
-                    {"bounding_box": bounding_box, "frame": i}
-                )
-                kmeans_idx += 1
+        # group the bounding boxes of the same face together
+        if self._face_grouping == "tracker":
+            bounding_box_groups = link_face_tracks(face_detections)
+        else:
+            bounding_box_groups = self._group_faces_by_kmeans(
+                face_detections, bounding_boxes, k
+            )
 
         # find the face who's mouth moves the most
         max_mouth_movement = 0
         for bounding_box_group in bounding_box_groups:
-            mouth_movement, roi = self._calc_mouth_movement(bounding_box_group, frames)
+            mouth_movement, roi = self._calc_mouth_movement(
+                bounding_box_group, frames, frame_scale
+            )
             if mouth_movement > max_mouth_movement:
                 max_mouth_movement = mouth_movement
                 segment_roi = roi
@@ -877,10 +1885,56 @@ class Resizer:
 
         return segment_roi
 
+    def _group_faces_by_kmeans(
+        self,
+        face_detections: list[np.ndarray],
+        bounding_boxes: np.ndarray,
+        k: int,
+    ) -> list[list[dict]]:
+        """
+        Group the bounding boxes of the same face together with k-means.
+
+        Parameters
+        ----------
+        face_detections: list[np.ndarray]
+            The face detection outputs for each frame
+        bounding_boxes: np.ndarray
+            The bounding boxes of all face detections stacked in order, shape (N, 4).
+        k: int
+            The number of faces to group the bounding boxes into.
+
+        Returns
+        -------
+        list[list[dict]]
+            The groups, each a list of dictionaries with the keys 'bounding_box' and
+            'frame' (see '_calc_mouth_movement').
+        """
+        # imported here so sklearn is only loaded when k-means grouping is used
+        from sklearn.cluster import KMeans
+
+        kmeans = KMeans(n_clusters=k, init="k-means++", n_init=2, random_state=0).fit(
+            bounding_boxes
+        )
+        bounding_box_labels = kmeans.labels_
+        bounding_box_groups: list[list[dict]] = [[] for _ in range(k)]
+        kmeans_idx = 0
+        for i, face_detection in enumerate(face_detections):
+            if face_detection is None:
+                continue
+            for bounding_box in face_detection:
+                assert np.sum(bounding_box < 0) == 0
+                bounding_box_label = bounding_box_labels[kmeans_idx]
+                bounding_box_groups[bounding_box_label].append(
+                    {"bounding_box": bounding_box, "frame": i}
+                )
+                kmeans_idx += 1
+        return bounding_box_groups
+
     def _calc_mouth_movement(
         self,
         bounding_box_group: list[dict[np.ndarray, int]],
         frames: list[np.ndarray],
+        frame_scale: float = 1,
     ) -> tuple[float, Rect]:
         """
         Calculates the mouth movement for a group of faces. These faces are assumed to
@@ -898,6 +1952,9 @@ class Resizer:
                     The frame the bounding box of the face is associated with.
         frames: list[np.ndarray]
             The frames to analyze.
+        frame_scale: float
+            The width of the frames divided by the width of the video the bounding
+            boxes are in. Default is 1 (frames at the video's resolution).
 
         Returns
         -------
@@ -916,7 +1973,11 @@ class Resizer:
             # sum all roi's, average after loop
             roi += Rect(x1, y1, x2 - x1, y2 - y1)
             frame = frames[bounding_box_data["frame"]]
-            face = frame[y1:y2, x1:x2, :]
+            face = frame[
+                int(y1 * frame_scale) : int(y2 * frame_scale),
+                int(x1 * frame_scale) : int(x2 * frame_scale),
+                :,
+            ]
 
             # mouth movement
             mar = self._calc_mouth_aspect_ratio(face)
@@ -944,7 +2005,8 @@ class Resizer:
         mar: float
             The mouth aspect ratio.
         """
-        results = self._face_mesher.process(face)
+        with self._face_mesher_lock:
+            results = self._face_mesher.process(face)
         if results.multi_face_landmarks is None:
             return None
 
@@ -964,8 +2026,8 @@ class Resizer:
 
         return mar
 
+    @staticmethod
     def _calc_crop(
-        self,
         roi: Rect,
         resize_width: int,
         resize_height: int,
@@ -993,83 +2055,202 @@ class Resizer:
         )
         return crop
 
+    @staticmethod
     def _merge_identical_segments(
-        self,
-        segments: list[dict],
-        video_file: VideoFile,
-    ) -> list[dict]:
+        segments: np.ndarray,
+        video_width: int,
+        video_height: int,
+    ) -> np.ndarray:
         """
         Merge identical segments that are next to each other.
 
         Parameters
         ----------
-        segments: list[dict]
-            speakers: list[int]
-                the speaker labels of the speakers talking in the segment
-            start_time: float
-                the start time of the segment
-            end_time: float
-                the end time of the segment
-            x: int
-                x-coordinate of the top left corner of the resized segment
-            y: int
-                y-coordinate of the top left corner of the resized segment
-        video_file: VideoFile
-            The video file that the segments are from
+        segments: np.ndarray
+            The resized segments with the dtype 'SEGMENT_DTYPE' (see 'seg_proc'),
+            including the x and y coordinates of the top left corner of each
+            resized segment.
+        video_width: int
+            The width in pixels of the video that the segments are from
+        video_height: int
+            The height in pixels of the video that the segments are from
 
         Returns
         -------
-        list[dict]
+        np.ndarray
             The merged segments.
         """
-        idx = 0
-        max_position_difference_ratio = 0.04
-        video_width = video_file.get_width_pixels()
-        video_height = video_file.get_height_pixels()
-
-        for _ in range(len(segments) - 1):
-            cur_x = segments[idx]["x"]
-            next_x = segments[idx + 1]["x"]
-            x_diff = abs(cur_x - next_x)
-            if (x_diff / video_width) < max_position_difference_ratio:
-                same_x = True
-                segments[idx]["x"] = int((cur_x + next_x) // 2)
-            else:
-                same_x = False
-
-            curr_y = segments[idx]["y"]
-            next_y = segments[idx + 1]["y"]
-            y_diff = abs(curr_y - next_y)
-            if (y_diff / video_height) < max_position_difference_ratio:
-                same_y = True
-                segments[idx]["y"] = int((curr_y + next_y) // 2)
-            else:
-                same_y = False
-
-            if same_x and same_y:
-                segments[idx]["end_time"] = segments[idx + 1]["end_time"]
-                segments = segments[: idx + 1] + segments[idx + 2 :]
-            else:
-                idx += 1
-        return segments
+        return merge_identical_segments(segments, video_width, video_height)
 
     def cleanup(self) -> None:
         """
-        Remove the face detector and face mesher from memory and explicity free up GPU memory.
+        Drop this instance's references to the face detector and face mesher and
+        explicity free up GPU memory. The models stay loaded for other instances
+        until the model registry evicts them (see 'ModelRegistry').
         """
-        if hasattr(self, "_face_detector") and self._face_detector is not None:
-            try:
-                self._face_detector.close()
-            except AttributeError:
-                # MediaPipe Face Detection may not have close() method in some versions
-                pass
-            self._face_detector = None
-        if hasattr(self, "_face_mesher") and self._face_mesher is not None:
-            try:
-                self._face_mesher.close()
-            except AttributeError:
-                # MediaPipe FaceMesh may not have close() method in some versions
-                pass
-            self._face_mesher = None
+        self._face_detector = None
+        self._face_mesher = None
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
+
+
+def _stratified_sample_frames(
+    rng: np.random.Generator,
+    frames_left: int,
+    num_samples: int,
+) -> np.ndarray:
+    """
+    Samples one frame from each of 'num_samples' equally sized strata of the frames
+    1 to 'frames_left' - 1. The samples are ordered coarse to fine (by the
+    bit-reversed index of their stratum), so every prefix of the samples is spread
+    over all the frames.
+
+    Parameters
+    ----------
+    rng: np.random.Generator
+        The random number generator to sample with.
+    frames_left: int
+        The number of frames to sample from (frame 0 is never sampled).
+    num_samples: int
+        The number of frames to sample. At most 'frames_left' - 1.
+
+    Returns
+    -------
+    np.ndarray
+        The sampled frames.
+    """
+    if num_samples <= 0:
+        return np.array([], dtype=int)
+    strata = np.array_split(np.arange(1, frames_left), num_samples)
+    samples = np.array([rng.choice(stratum) for stratum in strata])
+
+    num_bits = max(int(num_samples - 1).bit_length(), 1)
+    bit_reversed = [
+        int(format(i, "0{}b".format(num_bits))[::-1], 2) for i in range(num_samples)
+    ]
+    return samples[np.argsort(bit_reversed)]
+
+
+def _calc_sample_bounds(
+    secs: list[float],
+    start_time: float,
+    end_time: float,
+) -> np.ndarray:
+    """
+    Splits a segment into one interval per sampled second: the part of the segment
+    closer to the second than to the other sampled seconds. The intervals don't
+    overlap, so a pooled frame (see 'FramePool.find') can stand in for at most one of
+    the samples and never for a sample of another segment.
+
+    Parameters
+    ----------
+    secs: list[float]
+        The sampled seconds of the segment, in any order.
+    start_time: float
+        The start time of the segment in seconds.
+    end_time: float
+        The end time of the segment in seconds.
+
+    Returns
+    -------
+    np.ndarray
+        The [start, end) interval of each second, of shape (len(secs), 2).
+    """
+    secs = np.asarray(secs, dtype=float)
+    if len(secs) == 0:
+        return np.empty((0, 2))
+    order = np.argsort(secs, kind="stable")
+    sorted_secs = secs[order]
+    midpoints = (sorted_secs[:-1] + sorted_secs[1:]) / 2
+    bounds = np.empty((len(secs), 2))
+    bounds[order, 0] = np.maximum(np.concatenate([[start_time], midpoints]), start_time)
+    bounds[order, 1] = np.minimum(np.concatenate([midpoints, [end_time]]), end_time)
+    return bounds
+
+
+# the Resizer owned by a worker process of 'Resizer._analyze_segments_in_parallel'
+_worker_resizer: Resizer = None
+
+
+def _init_worker_resizer(
+    face_detect_margin: int,
+    device: str,
+    face_grouping: str,
+    frame_cache_bytes: int,
+    frame_cache_scratch_file: bool,
+) -> None:
+    """
+    Creates the Resizer (and its MediaPipe graphs) of a worker process.
+
+    Parameters
+    ----------
+    face_detect_margin: int
+        The margin around detected faces in pixels.
+    device: str
+        PyTorch device to perform computations on.
+    face_grouping: str
+        How the faces of a segment are grouped into people ('kmeans' or 'tracker').
+    frame_cache_bytes: int
+        The worker's share of the budget in bytes for caching the frames at the
+        segments' first faces and their detections.
+    frame_cache_scratch_file: bool
+        Whether to keep the cached frames in a memory-mapped temporary file.
+
+    Returns
+    -------
+    None
+    """
+    global _worker_resizer
+    _worker_resizer = Resizer(
+        face_detect_margin=face_detect_margin,
+        device=device,
+        face_grouping=face_grouping,
+        frame_cache_bytes=frame_cache_bytes,
+        frame_cache_scratch_file=frame_cache_scratch_file,
+    )
+
+
+def _analyze_segments_in_worker(
+    segments: list[dict],
+    video_file_path: str,
+    samples_per_segment: int,
+    face_detect_width: int,
+    n_face_detect_batches: int,
+    sample_tolerance: float,
+    frame_pool: FramePool,
+) -> list[Rect]:
+    """
+    Runs 'Resizer._analyze_segments' on a shard of segments in a worker process.
+
+    Parameters
+    ----------
+    segments: list[dict]
+        See 'Resizer._analyze_segments'.
+    video_file_path: str
+        Absolute path to the video file to analyze.
+    samples_per_segment: int
+        Number of samples to take per segment for face detection.
+    face_detect_width: int
+        Width to resize the frames to for face detection.
+    n_face_detect_batches: int
+        Number of batches to process for face detection.
+    sample_tolerance: float
+        Convergence tolerance in pixels for adaptive sampling, or None.
+    frame_pool: FramePool
+        Frames already decoded for face detection, or None.
+
+    Returns
+    -------
+    list[Rect]
+        The region of interest of each segment.
+    """
+    segments = _worker_resizer._analyze_segments(
+        segments,
+        VideoFile(video_file_path),
+        samples_per_segment,
+        face_detect_width,
+        n_face_detect_batches,
+        sample_tolerance,
+        frame_pool,
+    )
+    return [segment["roi"] for segment in segments]
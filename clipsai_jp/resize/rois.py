@@ -0,0 +1,198 @@
+"""
+A class to represent the regions of interest (ROIs) of a video's segments.
+
+Notes
+-----
+- The ROIs are the result of the face analysis of a video and don't depend on the
+aspect ratio the video is resized to, so crops for any number of aspect ratios can be
+calculated from one Rois instance (see 'Resizer.calc_crops').
+"""
+
+# standard library imports
+import logging
+
+# current package imports
+from .exceptions import ResizerError
+from .rect import Rect
+
+# local package imports
+from clipsai_jp.filesys.json_file import JSONFile
+from clipsai_jp.filesys.manager import FileSystemManager
+
+
+class Rois:
+    """
+    Represents the region of interest (ROI) of each segment of a video.
+
+    Attributes
+    ----------
+    original_width (int): Original width of the video.
+    original_height (int): Original height of the video.
+    segments (list[dict]): List of segments, each with the keys 'speakers',
+        'start_time', 'end_time' and 'roi' (Rect).
+    """
+
+    def __init__(
+        self,
+        original_width: int,
+        original_height: int,
+        segments: list[dict],
+    ) -> None:
+        """
+        Initializes a Rois instance.
+
+        Parameters
+        ----------
+        original_width: int
+            Original width of the video.
+        original_height: int
+            Original height of the video.
+        segments: list[dict]
+            speakers: list[int]
+                list of speaker numbers for the speakers talking in the segment
+            start_time: float
+                start time of the segment in seconds
+            end_time: float
+                end time of the segment in seconds
+            roi: Rect
+                the region of interest of the segment
+        """
+        self._original_width = original_width
+        self._original_height = original_height
+        self._segments = segments
+
+    @property
+    def original_width(self) -> int:
+        """
+        The width of the original video.
+        """
+        return self._original_width
+
+    @property
+    def original_height(self) -> int:
+        """
+        The height of the original video.
+        """
+        return self._original_height
+
+    @property
+    def segments(self) -> list[dict]:
+        """
+        The list of segments and their regions of interest.
+        """
+        return self._segments
+
+    def to_dict(self) -> dict:
+        """
+        Returns a dictionary representation of the Rois instance.
+        """
+        return {
+            "original_width": self._original_width,
+            "original_height": self._original_height,
+            "segments": [
+                {
+                    "speakers": segment["speakers"],
+                    "start_time": segment["start_time"],
+                    "end_time": segment["end_time"],
+                    "roi": {
+                        "x": segment["roi"].x,
+                        "y": segment["roi"].y,
+                        "width": segment["roi"].width,
+                        "height": segment["roi"].height,
+                    },
+                }
+                for segment in self._segments
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, rois: dict) -> "Rois":
+        """
+        Creates a Rois instance from its dictionary representation.
+
+        Parameters
+        ----------
+        rois: dict
+            The dictionary representation of a Rois instance (see 'to_dict').
+
+        Returns
+        -------
+        Rois
+            The Rois instance.
+        """
+        try:
+            segments = [
+                {
+                    "speakers": segment["speakers"],
+                    "start_time": segment["start_time"],
+                    "end_time": segment["end_time"],
+                    "roi": Rect(
+                        x=segment["roi"]["x"],
+                        y=segment["roi"]["y"],
+                        width=segment["roi"]["width"],
+                        height=segment["roi"]["height"],
+                    ),
+                }
+                for segment in rois["segments"]
+            ]
+            return cls(rois["original_width"], rois["original_height"], segments)
+        except (KeyError, TypeError) as e:
+            err = "Invalid ROI data: {}".format(e)
+            logging.error(err)
+            raise ResizerError(err)
+
+    def store_as_json_file(self, file_path: str) -> JSONFile:
+        """
+        Stores the ROIs as a json file. 'file_path' is overwritten if already exists.
+
+        Parameters
+        ----------
+        file_path: str
+            absolute file path to store the ROIs as a json file
+
+        Returns
+        -------
+        JSONFile
+        """
+        json_file = JSONFile(file_path)
+        json_file.assert_has_file_extension("json")
+        FileSystemManager().assert_parent_dir_exists(json_file)
+
+        # delete file if it exists
+        json_file.delete()
+        json_file.create(self.to_dict())
+        return json_file
+
+    @classmethod
+    def from_json_file(cls, file_path: str) -> "Rois":
+        """
+        Loads ROIs stored with 'store_as_json_file'.
+
+        Parameters
+        ----------
+        file_path: str
+            absolute file path of the json file
+
+        Returns
+        -------
+        Rois
+            The Rois instance.
+        """
+        json_file = JSONFile(file_path)
+        json_file.assert_exists()
+        return cls.from_dict(json_file.read())
+
+    def __eq__(self, __value: object) -> bool:
+        """
+        Returns True if the Rois instance is equal to the given value, False otherwise.
+        """
+        if not isinstance(__value, Rois):
+            return False
+        return self.to_dict() == __value.to_dict()
+
+    def __ne__(self, __value: object) -> bool:
+        """
+        Returns True if the Rois instance is not equal to the given value, False
+        otherwise.
+        """
+        return not self.__eq__(__value)
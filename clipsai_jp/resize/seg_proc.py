@@ -0,0 +1,294 @@
+"""
+Utilities for processing the segments of a video.
+
+Notes
+-----
+- Segments are stored as a structured numpy array with the dtype 'SEGMENT_DTYPE' so
+videos with tens of thousands of segments (ex: livestream archives with many scene
+changes) are merged in a single pass without building a dict per segment.
+- The speakers of a segment are stored as a bitmask, where bit i is set if speaker i
+is talking in the segment.
+"""
+
+# standard library imports
+import logging
+
+# current package imports
+from .exceptions import ResizerError
+
+# third party imports
+import numpy as np
+
+SEGMENT_DTYPE = np.dtype(
+    [
+        ("start_time", np.float64),
+        ("end_time", np.float64),
+        ("speakers", np.uint64),
+        ("x", np.int64),
+        ("y", np.int64),
+    ]
+)
+MAX_SPEAKERS = 64
+
+
+def speakers_to_bitmask(speakers: list[int]) -> int:
+    """
+    Convert a list of speakers to a bitmask.
+
+    Parameters
+    ----------
+    speakers: list[int]
+        list of speaker numbers for the speakers talking in a segment
+
+    Returns
+    -------
+    int
+        The bitmask of the speakers.
+    """
+    bitmask = 0
+    for speaker in speakers:
+        if not 0 <= speaker < MAX_SPEAKERS:
+            err = "Speaker numbers must be between 0 and {}, not {}".format(
+                MAX_SPEAKERS - 1, speaker
+            )
+            logging.error(err)
+            raise ResizerError(err)
+        bitmask |= 1 << int(speaker)
+    return bitmask
+
+
+def bitmask_to_speakers(bitmask: int) -> list[int]:
+    """
+    Convert a bitmask to a sorted list of speakers.
+
+    Parameters
+    ----------
+    bitmask: int
+        The bitmask of the speakers talking in a segment.
+
+    Returns
+    -------
+    list[int]
+        list of speaker numbers for the speakers talking in the segment
+    """
+    bitmask = int(bitmask)
+    return [speaker for speaker in range(MAX_SPEAKERS) if bitmask >> speaker & 1]
+
+
+def segments_to_array(segments: list[dict]) -> np.ndarray:
+    """
+    Convert a list of segments to a structured array of segments.
+
+    Parameters
+    ----------
+    segments: list[dict]
+        speakers: list[int]
+            list of speaker numbers for the speakers talking in the segment
+        start_time: float
+            start time of the segment in seconds
+        end_time: float
+            end time of the segment in seconds
+        x: int, optional
+            x-coordinate of the top left corner of the resized segment
+        y: int, optional
+            y-coordinate of the top left corner of the resized segment
+
+    Returns
+    -------
+    np.ndarray
+        The segments with the dtype 'SEGMENT_DTYPE'.
+    """
+    array = np.zeros(len(segments), dtype=SEGMENT_DTYPE)
+    for i, segment in enumerate(segments):
+        array[i] = (
+            segment["start_time"],
+            segment["end_time"],
+            speakers_to_bitmask(segment.get("speakers", [])),
+            segment.get("x", 0),
+            segment.get("y", 0),
+        )
+    return array
+
+
+def array_to_segments(array: np.ndarray) -> list[dict]:
+    """
+    Convert a structured array of segments to a list of segments. The crop
+    coordinates aren't included.
+
+    Parameters
+    ----------
+    array: np.ndarray
+        The segments with the dtype 'SEGMENT_DTYPE'.
+
+    Returns
+    -------
+    list[dict]
+        speakers: list[int]
+            list of speaker numbers for the speakers talking in the segment
+        start_time: float
+            start time of the segment in seconds
+        end_time: float
+            end time of the segment in seconds
+    """
+    return [
+        {
+            "speakers": bitmask_to_speakers(speakers),
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+        for start_time, end_time, speakers in zip(
+            array["start_time"].tolist(),
+            array["end_time"].tolist(),
+            array["speakers"].tolist(),
+        )
+    ]
+
+
+def merge_scene_changes(
+    segments: np.ndarray,
+    scene_changes: list[float],
+    scene_merge_threshold: float,
+) -> np.ndarray:
+    """
+    Merge scene changes with speaker segments in a single pass over both.
+
+    Parameters
+    ----------
+    segments: np.ndarray
+        The speaker segments with the dtype 'SEGMENT_DTYPE', sorted by time.
+    scene_changes: list[float]
+        List of scene change times in seconds. Scene changes after the end of the
+        last segment are ignored.
+    scene_merge_threshold: float
+        The threshold in seconds for merging scene changes with speaker segments.
+        Scene changes within this threshold of a segment's start or end time will
+        cause the segment to be adjusted.
+
+    Returns
+    -------
+    np.ndarray
+        The merged segments with the dtype 'SEGMENT_DTYPE'.
+    """
+    in_starts = segments["start_time"].tolist()
+    in_ends = segments["end_time"].tolist()
+    in_speakers = segments["speakers"].tolist()
+    num_in = len(in_starts)
+    if num_in == 0:
+        return segments.copy()
+
+    # output segments; 'idx' is the segment the current scene change falls into
+    starts = [in_starts[0]]
+    ends = [in_ends[0]]
+    speakers = [in_speakers[0]]
+    next_in = 1
+    idx = 0
+
+    for scene_change_sec in np.sort(np.asarray(scene_changes, dtype=float)).tolist():
+        while scene_change_sec > ends[idx]:
+            idx += 1
+            if idx == len(starts):
+                if next_in == num_in:
+                    break
+                starts.append(in_starts[next_in])
+                ends.append(in_ends[next_in])
+                speakers.append(in_speakers[next_in])
+                next_in += 1
+        # scene change is after the last segment
+        if idx == len(starts):
+            break
+        # scene change is close to speaker segment end -> merge the two
+        if 0 < (ends[idx] - scene_change_sec) < scene_merge_threshold:
+            ends[idx] = scene_change_sec
+            if idx + 1 < len(starts):
+                starts[idx + 1] = scene_change_sec
+            elif next_in < num_in:
+                in_starts[next_in] = scene_change_sec
+            continue
+        # scene change is close to speaker segment start -> merge the two
+        if 0 < (scene_change_sec - starts[idx]) < scene_merge_threshold:
+            starts[idx] = scene_change_sec
+            if idx > 0:
+                ends[idx - 1] = scene_change_sec
+            continue
+        # scene change already exists
+        if scene_change_sec == ends[idx]:
+            continue
+        # add scene change to segments -> the new segment is always the last output
+        # segment since scene changes are sorted
+        starts.append(scene_change_sec)
+        ends.append(ends[idx])
+        speakers.append(speakers[idx])
+        ends[idx] = scene_change_sec
+
+    merged = np.zeros(len(starts) + num_in - next_in, dtype=SEGMENT_DTYPE)
+    merged["start_time"] = starts + in_starts[next_in:]
+    merged["end_time"] = ends + in_ends[next_in:]
+    merged["speakers"] = speakers + in_speakers[next_in:]
+    return merged
+
+
+def merge_identical_segments(
+    segments: np.ndarray,
+    video_width: int,
+    video_height: int,
+    max_position_difference_ratio: float = 0.04,
+) -> np.ndarray:
+    """
+    Merge identical segments that are next to each other in a single pass.
+
+    Parameters
+    ----------
+    segments: np.ndarray
+        The resized segments with the dtype 'SEGMENT_DTYPE', sorted by time.
+    video_width: int
+        The width in pixels of the video that the segments are from
+    video_height: int
+        The height in pixels of the video that the segments are from
+    max_position_difference_ratio: float
+        Neighboring segments whose crop coordinates differ by less than this fraction
+        of the video's width and height are merged.
+
+    Returns
+    -------
+    np.ndarray
+        The merged segments with the dtype 'SEGMENT_DTYPE'.
+    """
+    if len(segments) == 0:
+        return segments.copy()
+
+    starts = segments["start_time"].tolist()
+    ends = segments["end_time"].tolist()
+    xs = segments["x"].tolist()
+    ys = segments["y"].tolist()
+
+    # indices of the kept segments and their updated values
+    kept = [0]
+    kept_ends = [ends[0]]
+    kept_xs = [xs[0]]
+    kept_ys = [ys[0]]
+    for i in range(1, len(starts)):
+        cur_x = kept_xs[-1]
+        next_x = xs[i]
+        same_x = (abs(cur_x - next_x) / video_width) < max_position_difference_ratio
+        if same_x:
+            kept_xs[-1] = (cur_x + next_x) // 2
+
+        cur_y = kept_ys[-1]
+        next_y = ys[i]
+        same_y = (abs(cur_y - next_y) / video_height) < max_position_difference_ratio
+        if same_y:
+            kept_ys[-1] = (cur_y + next_y) // 2
+
+        if same_x and same_y:
+            kept_ends[-1] = ends[i]
+        else:
+            kept.append(i)
+            kept_ends.append(ends[i])
+            kept_xs.append(next_x)
+            kept_ys.append(next_y)
+
+    merged = segments[kept]
+    merged["end_time"] = kept_ends
+    merged["x"] = kept_xs
+    merged["y"] = kept_ys
+    return merged
@@ -3,21 +3,27 @@ Utilities for video processing.
 """
 
 # standard library imports
+from collections.abc import Iterator
 from concurrent.futures import ThreadPoolExecutor
 import logging
+import time
 
 # current package imports
 from .exceptions import VideoProcessingError
+from .frame_pool import FramePool
 from .img_proc import rgb_to_gray
 
 # local imports
+from clipsai_jp.media.keyframe_index import KeyframeIndex
 from clipsai_jp.media.video_file import VideoFile
+from clipsai_jp.utils.conversions import bytes_to_gibibytes
 
 # third party imports
 import av
 import cv2
 import numpy as np
-from scenedetect import detect, AdaptiveDetector
+from scenedetect import AdaptiveDetector, FrameTimecode
+from scenedetect.scene_manager import compute_downscale_factor
 
 
 def extract_frames(
@@ -25,6 +31,14 @@ def extract_frames(
     extract_secs: list[int],
     grayscale: bool = False,
     downsample_factor: float = 1,
+    sequential: bool = False,
+    seek_threshold: float = 2.0,
+    width: int = None,
+    height: int = None,
+    pixel_format: str = "rgb24",
+    thread_type: str = None,
+    keyframe_index: KeyframeIndex = None,
+    return_pts: bool = False,
 ) -> list[np.ndarray]:
     """
     Extract frames from a video as a numpy array.
@@ -37,11 +51,44 @@ def extract_frames(
         The seconds to extract frames from.
     grayscale: bool
         Whether to convert the frames to grayscale.
+    downsample_factor: float
+        The factor to downsample the frames by.
+    sequential: bool
+        Whether to decode the requested seconds in a single forward pass over the
+        video instead of seeking once per requested second. The requested seconds are
+        sorted and de-duplicated internally; the frames are still returned in the
+        order of 'extract_secs'.
+    seek_threshold: float
+        Only used when 'sequential' is True. If the gap in seconds between the frame
+        currently being decoded and the next requested second exceeds this
+        threshold, the decoder seeks forward instead of decoding every frame in
+        between. Should be roughly the GOP (keyframe interval) length of the video.
+    width: int
+        The width in pixels to scale the frames to while converting them out of the
+        decoder. Default is None (the source width).
+    height: int
+        The height in pixels to scale the frames to while converting them out of the
+        decoder. Default is None (the source height).
+    pixel_format: str
+        The pixel format of the returned frames (ex: 'rgb24', 'bgr24', 'gray').
+        Default is 'rgb24'.
+    thread_type: str
+        The decoder threading mode ('AUTO', 'FRAME', 'SLICE'). Default is None, which
+        keeps PyAV's default.
+    keyframe_index: KeyframeIndex
+        Only used when 'sequential' is True. The keyframe index of the video (see
+        'VideoFile.get_keyframe_index'). If given, the decoder seeks forward exactly
+        when a keyframe lies between the frame currently being decoded and the next
+        requested second, and 'seek_threshold' is ignored.
+    return_pts: bool
+        Whether to also return the pts (in units of the video stream's time base) of
+        each extracted frame. Default is False.
 
     Returns
     -------
     list[np.array]
-        The extracted frames as numpy arrays
+        The extracted frames as numpy arrays. If 'return_pts' is True, a tuple of the
+        frames and the pts of each frame is returned.
     """
     # check valid extract seconds
     duration = video_file.get_duration()
@@ -55,8 +102,9 @@ def extract_frames(
 
     # define function for parallel processing
     def process_frame(frame):
-        # read frame
-        img = np.array(frame.to_image())
+        # read frame -> scaling and color conversion happen in the reformatter so
+        # the full resolution frame is never copied into a numpy array
+        img = frame.to_ndarray(width=width, height=height, format=pixel_format)
 
         # downsample frame
         if downsample_factor != 1:
@@ -75,20 +123,33 @@ def extract_frames(
     # （閉じないと動画処理の繰り返しでファイルディスクリプタがリークする）
     with av.open(video_file.path) as container:
         stream = container.streams.video[0]
+        if thread_type is not None:
+            stream.thread_type = thread_type
 
         extract_times_pts = [
             int(extract_sec / stream.time_base) for extract_sec in extract_secs
         ]
-        frames_to_process = []
-        for extract_pts in extract_times_pts:
-            # Seek to the nearest keyframe to our desired timestamp
-            container.seek(extract_pts, stream=stream)
-            prev_frame = None
-            for frame in container.decode(stream):
-                if frame.pts > extract_pts:
-                    frames_to_process.append(prev_frame or frame)
-                    break
-                prev_frame = frame
+        if sequential is True:
+            frames_to_process = _decode_frames_sequentially(
+                container,
+                stream,
+                extract_times_pts,
+                seek_threshold_pts=int(seek_threshold / stream.time_base),
+                keyframe_pts=(
+                    keyframe_index.keyframe_pts if keyframe_index is not None else None
+                ),
+            )
+        else:
+            frames_to_process = []
+            for extract_pts in extract_times_pts:
+                # Seek to the nearest keyframe to our desired timestamp
+                container.seek(extract_pts, stream=stream)
+                prev_frame = None
+                for frame in container.decode(stream):
+                    if frame.pts > extract_pts:
+                        frames_to_process.append(prev_frame or frame)
+                        break
+                    prev_frame = frame
 
         if len(frames_to_process) != len(extract_secs):
             err = (
@@ -106,12 +167,142 @@ def extract_frames(
         with ThreadPoolExecutor() as executor:
             processed_frames = list(executor.map(process_frame, frames_to_process))
 
+    if return_pts:
+        return processed_frames, [frame.pts for frame in frames_to_process]
     return processed_frames
 
 
+def extract_keyframes(
+    video_file: VideoFile,
+    width: int = None,
+    height: int = None,
+    pixel_format: str = "rgb24",
+) -> Iterator[tuple[float, np.ndarray]]:
+    """
+    Decode only the keyframes of a video in a single pass. The decoder skips every
+    other frame, so this is much cheaper than decoding the whole video.
+
+    Parameters
+    ----------
+    video_file: VideoFile
+        The video file to extract keyframes from.
+    width: int
+        The width in pixels to scale the frames to while converting them out of the
+        decoder. Default is None (the source width).
+    height: int
+        The height in pixels to scale the frames to while converting them out of the
+        decoder. Default is None (the source height).
+    pixel_format: str
+        The pixel format of the returned frames. Default is 'rgb24'.
+
+    Returns
+    -------
+    Iterator[tuple[float, np.ndarray]]
+        The time in seconds and the frame of each keyframe, in order of occurrence.
+    """
+    with av.open(video_file.path) as container:
+        stream = container.streams.video[0]
+        stream.codec_context.skip_frame = "NONKEY"
+        for frame in container.decode(stream):
+            if frame.pts is None:
+                continue
+            yield (
+                float(frame.pts * stream.time_base),
+                frame.to_ndarray(width=width, height=height, format=pixel_format),
+            )
+
+
+def _decode_frames_sequentially(
+    container: av.container.InputContainer,
+    stream: av.video.stream.VideoStream,
+    extract_times_pts: list[int],
+    seek_threshold_pts: int,
+    keyframe_pts: np.ndarray = None,
+) -> list[av.VideoFrame]:
+    """
+    Decode the frames at the requested presentation timestamps in a single forward
+    pass over the stream.
+
+    The frame chosen for each timestamp is the same one the per-timestamp seek in
+    'extract_frames' would choose: the last frame whose pts does not exceed the
+    timestamp, or the first decoded frame after a seek if it already exceeds it.
+
+    Parameters
+    ----------
+    container: av.container.InputContainer
+        The opened container to decode from.
+    stream: av.video.stream.VideoStream
+        The video stream of the container to decode.
+    extract_times_pts: list[int]
+        The timestamps (in units of the stream's time base) to extract frames at. May
+        be unsorted and contain duplicates.
+    seek_threshold_pts: int
+        If the next requested timestamp is more than this many pts ahead of the frame
+        currently being decoded, seek to it instead of decoding the frames in between.
+        Ignored if 'keyframe_pts' is given.
+    keyframe_pts: np.ndarray
+        The sorted pts of every keyframe in the stream. If given, the decoder seeks
+        to the next requested timestamp only if a keyframe lies between it and the
+        frame currently being decoded, i.e. only if seeking skips decoding frames.
+
+    Returns
+    -------
+    list[av.VideoFrame]
+        The decoded frames in the order of 'extract_times_pts'. Timestamps that could
+        not be reached before the end of the stream are omitted.
+    """
+    targets = sorted(set(extract_times_pts))
+    frames_by_pts = {}
+    target_idx = 0
+    # the target a seek was last issued for; prevents seeking to the same target
+    # repeatedly when its keyframe lies further back than the threshold
+    last_seek_idx = None
+
+    while target_idx < len(targets):
+        container.seek(targets[target_idx], stream=stream)
+        last_seek_idx = target_idx
+        prev_frame = None
+        needs_seek = False
+        for frame in container.decode(stream):
+            # resolve every target this frame has passed
+            while target_idx < len(targets) and frame.pts > targets[target_idx]:
+                frames_by_pts[targets[target_idx]] = prev_frame or frame
+                target_idx += 1
+            if target_idx == len(targets):
+                break
+            # next target is far away -> cheaper to seek than to decode up to it
+            if keyframe_pts is not None:
+                keyframe_idx = np.searchsorted(
+                    keyframe_pts, targets[target_idx], side="right"
+                )
+                should_seek = (
+                    keyframe_idx > 0 and keyframe_pts[keyframe_idx - 1] > frame.pts
+                )
+            else:
+                should_seek = targets[target_idx] - frame.pts > seek_threshold_pts
+            if should_seek and target_idx != last_seek_idx:
+                needs_seek = True
+                break
+            prev_frame = frame
+        # end of stream reached with targets left
+        if needs_seek is False:
+            break
+
+    return [
+        frames_by_pts[extract_pts]
+        for extract_pts in extract_times_pts
+        if extract_pts in frames_by_pts
+    ]
+
+
 def detect_scenes(
     video_file: VideoFile,
     min_scene_duration: float = 0.25,
+    downscale_factor: float = None,
+    frame_skip: int = 0,
+    thread_type: str = "AUTO",
+    num_threads: int = None,
+    return_frame_rate: bool = False,
 ) -> list[float]:
     """
     Detect scene changes in a video.
@@ -122,21 +313,293 @@ def detect_scenes(
         The video file to detect scene changes in.
     min_scene_duration: float
         The minimum length of a scene in seconds.
+    downscale_factor: float
+        The factor to downscale the frames by before detecting scene changes. The
+        decoder scales the frames while converting them, so the full resolution
+        frames are never copied into numpy arrays. Default is None (the factor
+        PySceneDetect would choose, which brings the frames to a width of roughly 256
+        pixels).
+    frame_skip: int
+        The number of frames to skip after each analyzed frame. Skipped frames are
+        still decoded but aren't converted or analyzed. Scene changes are reported at
+        the timestamp of the analyzed frame they were detected at, so they can be up
+        to 'frame_skip' frames late. Default is 0 (analyze every frame).
+    thread_type: str
+        The decoder threading mode ('AUTO', 'FRAME', 'SLICE'), or None to keep
+        PyAV's default. Default is 'AUTO'.
+    num_threads: int
+        The number of decoder threads. Default is None (FFmpeg picks one per CPU).
+    return_frame_rate: bool
+        Whether to also return the number of frames decoded per second of wall-clock
+        time. Default is False.
 
     Returns
     -------
     scene_changes: list[float]
-        The seconds where scene changes occur.
+        The seconds where scene changes occur. If 'return_frame_rate' is True, a
+        tuple of the scene changes and the measured frames per second is returned.
     """
-    detector = AdaptiveDetector(
-        min_scene_len=min_scene_duration * video_file.get_frame_rate()
-    )
-    scene_list = detect(video_file.path, detector)
+    if frame_skip < 0:
+        err = "frame_skip must be at least 0, not {}".format(frame_skip)
+        logging.error(err)
+        raise VideoProcessingError(err)
 
-    scene_changes = []
-    # don't include end time of last scene -> it's the end of the video
-    for i in range(len(scene_list) - 1):
-        scene = scene_list[i]
-        scene_changes.append(round(scene[1].get_seconds(), 6))
+    start = time.perf_counter()
+    detector = _SceneCutDetector(
+        video_file.get_frame_rate(),
+        min_scene_duration,
+        video_file.get_width_pixels(),
+        video_file.get_height_pixels(),
+        downscale_factor,
+    )
+    detect_width, detect_height = detector.frame_dims
+    frame_num = 0
+    with av.open(video_file.path) as container:
+        stream = container.streams.video[0]
+        if thread_type is not None:
+            stream.thread_type = thread_type
+        if num_threads is not None:
+            stream.thread_count = num_threads
+        for frame in container.decode(stream):
+            if frame.pts is None:
+                continue
+            if frame_num % (frame_skip + 1) == 0:
+                detector.process_frame(
+                    frame_num,
+                    float(frame.pts * stream.time_base),
+                    frame.to_ndarray(
+                        width=detect_width, height=detect_height, format="bgr24"
+                    ),
+                )
+            frame_num += 1
+    scene_changes = detector.finish()
 
+    frame_rate = frame_num / max(time.perf_counter() - start, 1e-9)
+    logging.debug(
+        "Detected {} scene changes in {} frames ({:.1f} frames/sec).".format(
+            len(scene_changes), frame_num, frame_rate
+        )
+    )
+    if return_frame_rate:
+        return scene_changes, frame_rate
     return scene_changes
+
+
+def analyze_video(
+    video_file: VideoFile,
+    min_scene_duration: float = 0.25,
+    pool_period: float = 1.0,
+    width: int = None,
+    height: int = None,
+    scratch_dir: str = None,
+    max_pool_bytes: int = 2**32,
+    num_threads: int = None,
+) -> tuple[list[float], FramePool]:
+    """
+    Detect scene changes in a video and collect frames for face detection in a
+    single decode pass. The frames are decoded at the given resolution, which the
+    scene detector downscales further (to the width PySceneDetect would use), so the
+    full resolution frames are never converted out of the decoder.
+
+    Parameters
+    ----------
+    video_file: VideoFile
+        The video file to analyze.
+    min_scene_duration: float
+        The minimum length of a scene in seconds.
+    pool_period: float
+        The period in seconds of the time grid the frames for face detection are
+        collected on. A requested second is served from the pool if a pooled frame is
+        within half a period of it.
+    width: int
+        The width in pixels to decode the frames at. Default is None (the source
+        width).
+    height: int
+        The height in pixels to decode the frames at. Default is None (the source
+        height).
+    scratch_dir: str
+        The directory to create the scratch file of the frame pool in. Default is
+        None (the system's temporary directory).
+    max_pool_bytes: int
+        The maximum size in bytes of the scratch file of the frame pool. The file
+        takes width * height * 3 bytes per pooled frame, ex: about 5.6 GB per hour of
+        video at 960x540 and one frame per second. Once it's full no more frames are
+        pooled, and the face analysis decodes the frames after the last pooled one on
+        demand. Default is 4 GiB.
+    num_threads: int
+        The number of decoder threads. Default is None (FFmpeg picks one per CPU).
+
+    Returns
+    -------
+    tuple[list[float], FramePool]
+        The seconds where scene changes occur (the same as 'detect_scenes') and the
+        pool of frames collected for face detection. The caller owns the pool and
+        must close it.
+    """
+    width = width or video_file.get_width_pixels()
+    height = height or video_file.get_height_pixels()
+    detector = _SceneCutDetector(
+        video_file.get_frame_rate(), min_scene_duration, width, height
+    )
+    num_pool_frames = int(video_file.get_duration() / pool_period) + 2
+    frame_bytes = width * height * 3
+    max_frames = max(min(num_pool_frames, max_pool_bytes // frame_bytes), 1)
+    if max_frames < num_pool_frames:
+        logging.warning(
+            "Pooling the frames of the whole video needs {:.2f} GiB of scratch "
+            "space; pooling only the first {} frames ({:.2f} GiB), the rest are "
+            "decoded on demand.".format(
+                bytes_to_gibibytes(num_pool_frames * frame_bytes),
+                max_frames,
+                bytes_to_gibibytes(max_frames * frame_bytes),
+            )
+        )
+    frame_pool = FramePool(
+        frame_shape=(height, width, 3),
+        max_frames=max_frames,
+        max_offset=pool_period / 2,
+        scratch_dir=scratch_dir,
+    )
+
+    frame_num = 0
+    next_pool_sec = 0.0
+    try:
+        with av.open(video_file.path) as container:
+            stream = container.streams.video[0]
+            stream.thread_type = "AUTO"
+            if num_threads is not None:
+                stream.thread_count = num_threads
+            for frame in container.decode(stream):
+                if frame.pts is None:
+                    continue
+                sec = float(frame.pts * stream.time_base)
+                img = frame.to_ndarray(width=width, height=height, format="rgb24")
+
+                # first frame at or after each grid point
+                if sec >= next_pool_sec and frame_pool.add(sec, img):
+                    next_pool_sec = (int(sec / pool_period) + 1) * pool_period
+
+                # AdaptiveDetector expects BGR frames
+                detector.process_frame(
+                    frame_num,
+                    sec,
+                    cv2.cvtColor(
+                        cv2.resize(
+                            img, detector.frame_dims, interpolation=cv2.INTER_LINEAR
+                        ),
+                        cv2.COLOR_RGB2BGR,
+                    ),
+                )
+                frame_num += 1
+        scene_changes = detector.finish()
+    except Exception:
+        frame_pool.close()
+        raise
+    frame_pool.scene_changes = scene_changes
+
+    logging.debug(
+        "Decoded {} frames: {} scene changes, {} frames pooled.".format(
+            frame_num, len(scene_changes), len(frame_pool)
+        )
+    )
+    return scene_changes, frame_pool
+
+
+class _SceneCutDetector:
+    """
+    Feeds decoded frames to PySceneDetect's AdaptiveDetector and maps the detected
+    cuts back to the timestamps of the frames they were detected at.
+    """
+
+    def __init__(
+        self,
+        fps: float,
+        min_scene_duration: float,
+        width: int,
+        height: int,
+        downscale_factor: float = None,
+    ) -> None:
+        """
+        Initialize _SceneCutDetector
+
+        Parameters
+        ----------
+        fps: float
+            The frame rate of the video.
+        min_scene_duration: float
+            The minimum length of a scene in seconds.
+        width: int
+            The width in pixels of the frames to downscale.
+        height: int
+            The height in pixels of the frames to downscale.
+        downscale_factor: float
+            The factor to downscale the frames by. Default is None (PySceneDetect's
+            default for the width).
+
+        Returns
+        -------
+        None
+        """
+        if downscale_factor is None:
+            downscale_factor = compute_downscale_factor(width)
+        downscale_factor = max(downscale_factor, 1)
+        self._frame_dims = (
+            max(1, round(width / downscale_factor)),
+            max(1, round(height / downscale_factor)),
+        )
+        self._fps = float(fps)
+        # an int is a number of frames -> PySceneDetect reads floats as seconds
+        self._detector = AdaptiveDetector(
+            min_scene_len=max(1, round(min_scene_duration * self._fps))
+        )
+        self._cut_frame_nums = []
+        self._frame_secs = {}
+        self._last_frame_num = None
+
+    @property
+    def frame_dims(self) -> tuple[int, int]:
+        """
+        The (width, height) in pixels the frames must be downscaled to.
+        """
+        return self._frame_dims
+
+    def process_frame(self, frame_num: int, sec: float, frame: np.ndarray) -> None:
+        """
+        Look for a scene change at a frame.
+
+        Parameters
+        ----------
+        frame_num: int
+            The number of the frame in the video. Frames may be skipped.
+        sec: float
+            The timestamp of the frame in seconds.
+        frame: np.ndarray
+            The BGR frame, downscaled to 'frame_dims'.
+
+        Returns
+        -------
+        None
+        """
+        self._frame_secs[frame_num] = sec
+        self._last_frame_num = frame_num
+        cuts = self._detector.process_frame(FrameTimecode(frame_num, self._fps), frame)
+        self._cut_frame_nums += [cut.frame_num for cut in cuts]
+
+    def finish(self) -> list[float]:
+        """
+        Flush the detector.
+
+        Returns
+        -------
+        list[float]
+            The seconds where scene changes occur.
+        """
+        if self._last_frame_num is not None:
+            cuts = self._detector.post_process(
+                FrameTimecode(self._last_frame_num, self._fps)
+            )
+            self._cut_frame_nums += [cut.frame_num for cut in cuts]
+        return [
+            round(self._frame_secs.get(frame_num, frame_num / self._fps), 6)
+            for frame_num in self._cut_frame_nums
+        ]
@@ -0,0 +1,253 @@
+"""
+A compact binary file format for transcriptions, loaded without parsing or
+re-deriving the character, word and sentence data.
+
+Notes
+-----
+- A file is a fixed size preamble (magic bytes, format version and header length), a
+json header and the raw bytes of named numpy arrays. The header holds the scalar
+metadata of the transcription and the dtype, shape and offset of each array.
+- Each array starts at a multiple of 'ALIGNMENT' bytes, so the arrays are read as
+views of a single read-only memory map of the file. Nothing is read from disk until
+an array is accessed.
+- Strings (the text, the words and the sentences) are stored as a single UTF-8 blob
+and the offsets of each string into it. Missing integers are stored as -1 and missing
+times as NaN.
+"""
+
+# standard library imports
+import json
+import logging
+import struct
+
+# current package imports
+from .exceptions import TranscriptionError
+
+# 3rd party imports
+import numpy as np
+
+BINARY_FILE_EXTENSION = "transcript"
+MAGIC = b"CSJTRSC\x00"
+FORMAT_VERSION = 1
+# arrays start at multiples of this many bytes
+ALIGNMENT = 64
+# magic bytes, format version, header length
+_PREAMBLE = struct.Struct("<8sIQ")
+
+
+def write_binary_file(
+    file_path: str, metadata: dict, arrays: dict[str, np.ndarray]
+) -> None:
+    """
+    Writes metadata and arrays to a binary transcription file.
+
+    Parameters
+    ----------
+    file_path: str
+        Absolute path of the file to write.
+    metadata: dict
+        The json serializable metadata.
+    arrays: dict[str, np.ndarray]
+        The arrays, by name.
+
+    Returns
+    -------
+    None
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # the offsets are relative to the start of the array data so the header doesn't
+    # depend on its own length
+    array_specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        array_specs[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset = _align(offset + array.nbytes)
+    header = json.dumps(
+        {"metadata": metadata, "arrays": array_specs}, separators=(",", ":")
+    ).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header))
+
+    with open(file_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + array_specs[name]["offset"])
+            f.write(array.tobytes())
+        # pad the last array so every array is within the file
+        f.truncate(data_start + offset)
+
+
+def read_binary_file(file_path: str) -> tuple[dict, dict[str, np.ndarray]]:
+    """
+    Reads the metadata of a binary transcription file and maps its arrays.
+
+    Parameters
+    ----------
+    file_path: str
+        Absolute path of the file to read.
+
+    Returns
+    -------
+    tuple[dict, dict[str, np.ndarray]]
+        The metadata and the read-only, memory-mapped arrays by name.
+    """
+    with open(file_path, "rb") as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size or preamble[: len(MAGIC)] != MAGIC:
+            err = "'{}' is not a binary transcription file.".format(file_path)
+            logging.error(err)
+            raise TranscriptionError(err)
+        _, version, header_len = _PREAMBLE.unpack(preamble)
+        if version != FORMAT_VERSION:
+            err = (
+                "Binary transcription file '{}' has format version {}, but only "
+                "version {} is supported.".format(file_path, version, FORMAT_VERSION)
+            )
+            logging.error(err)
+            raise TranscriptionError(err)
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    data_start = _align(_PREAMBLE.size + header_len)
+    file_map = np.memmap(file_path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        start = data_start + spec["offset"]
+        num_bytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        if start + num_bytes > len(file_map):
+            err = "Binary transcription file '{}' is truncated.".format(file_path)
+            logging.error(err)
+            raise TranscriptionError(err)
+        arrays[name] = file_map[start : start + num_bytes].view(dtype).reshape(shape)
+    return header["metadata"], arrays
+
+
+def encode_strings(strings: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes strings as a single UTF-8 blob.
+
+    Parameters
+    ----------
+    strings: list[str]
+        The strings.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The uint8 blob and the int64 offsets of each string into it and of the end of
+        the last one.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    bounds = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=bounds[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, bounds
+
+
+def decode_strings(blob: np.ndarray, bounds: np.ndarray) -> list[str]:
+    """
+    Decodes strings encoded with 'encode_strings'.
+
+    Parameters
+    ----------
+    blob: np.ndarray
+        The uint8 blob.
+    bounds: np.ndarray
+        The offsets of each string into the blob and of the end of the last one.
+
+    Returns
+    -------
+    list[str]
+        The strings.
+    """
+    data = blob.tobytes()
+    bounds = bounds.tolist()
+    return [
+        data[bounds[i] : bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)
+    ]
+
+
+def encode_info(
+    transcript_info: list[dict], keys: tuple[str, ...], prefix: str
+) -> dict[str, np.ndarray]:
+    """
+    Encodes word or sentence info as arrays.
+
+    Parameters
+    ----------
+    transcript_info: list[dict]
+        The word_info or sentence_info.
+    keys: tuple[str, ...]
+        The keys of the dicts. The first key is the string, keys ending with '_time'
+        are times and the other keys are integers (or None).
+    prefix: str
+        The prefix of the names of the arrays.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        The arrays by name.
+    """
+    blob, bounds = encode_strings([info[keys[0]] for info in transcript_info])
+    arrays = {prefix + "_text": blob, prefix + "_text_bounds": bounds}
+    for key in keys[1:]:
+        values = [info[key] for info in transcript_info]
+        if key.endswith("_time"):
+            missing, dtype = np.nan, np.float64
+        else:
+            missing, dtype = -1, np.int64
+        arrays["{}_{}s".format(prefix, key)] = np.array(
+            [missing if value is None else value for value in values], dtype=dtype
+        )
+    return arrays
+
+
+def decode_info(
+    arrays: dict[str, np.ndarray], keys: tuple[str, ...], prefix: str
+) -> list[dict]:
+    """
+    Decodes word or sentence info encoded with 'encode_info'.
+
+    Parameters
+    ----------
+    arrays: dict[str, np.ndarray]
+        The arrays by name.
+    keys: tuple[str, ...]
+        The keys of the dicts, as passed to 'encode_info'.
+    prefix: str
+        The prefix of the names of the arrays, as passed to 'encode_info'.
+
+    Returns
+    -------
+    list[dict]
+        The word_info or sentence_info.
+    """
+    columns = [
+        decode_strings(arrays[prefix + "_text"], arrays[prefix + "_text_bounds"])
+    ]
+    for key in keys[1:]:
+        array = arrays["{}_{}s".format(prefix, key)]
+        if key.endswith("_time"):
+            is_missing = np.isnan(array).tolist()
+        else:
+            is_missing = (array == -1).tolist()
+        columns.append(
+            [
+                None if missing else value
+                for value, missing in zip(array.tolist(), is_missing)
+            ]
+        )
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def _align(offset: int) -> int:
+    """
+    Rounds an offset up to a multiple of 'ALIGNMENT'.
+    """
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,386 @@
+"""
+Columnar storage for the character data of a transcription.
+
+Notes
+-----
+- A transcription of a few hours has hundreds of thousands of characters, and a dict
+per character costs several hundred bytes. The characters are instead stored as a
+single string plus one numpy array per field.
+- Missing times are stored as NaN and missing speakers, word indices and sentence
+indices as -1. They're converted back to None by the dict views.
+- The dicts of 'CharInfoView' are built on access and are copies: modifying them
+doesn't modify the table. A view can be given a 'prepare' callable that's called
+before the first dict is built, ex: to fill in the word and sentence indices of the
+table only once they're read.
+"""
+
+# standard library imports
+from __future__ import annotations
+from collections.abc import Callable, Iterator, Sequence
+
+# 3rd party imports
+import numpy as np
+
+# the value of a missing speaker, word index or sentence index
+MISSING_INDEX = -1
+
+
+class CharTable:
+    """
+    The characters of a transcription and their times, speakers, word indices and
+    sentence indices, stored column by column.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        start_times: np.ndarray,
+        end_times: np.ndarray,
+        speakers: np.ndarray,
+        char_bounds: np.ndarray = None,
+        word_indices: np.ndarray = None,
+        sentence_indices: np.ndarray = None,
+    ) -> None:
+        """
+        Initialize CharTable
+
+        Parameters
+        ----------
+        text: str
+            The characters, concatenated.
+        start_times: np.ndarray
+            The float64 start time in seconds of each character, NaN if missing.
+        end_times: np.ndarray
+            The float64 end time in seconds of each character, NaN if missing.
+        speakers: np.ndarray
+            The int32 speaker of each character, -1 if missing.
+        char_bounds: np.ndarray
+            The offsets into 'text' of each character and the end of the last one, for
+            tables whose characters aren't all exactly one code point long. Default is
+            None (character i is text[i]).
+        word_indices: np.ndarray
+            The int32 word index of each character. Default is None (all -1).
+        sentence_indices: np.ndarray
+            The int32 sentence index of each character. Default is None (all -1).
+
+        Returns
+        -------
+        None
+        """
+        self._text = text
+        self._char_bounds = char_bounds
+        self.start_times = start_times
+        self.end_times = end_times
+        self.speakers = speakers
+        if word_indices is None:
+            word_indices = np.full(len(start_times), MISSING_INDEX, dtype=np.int32)
+        if sentence_indices is None:
+            sentence_indices = np.full(len(start_times), MISSING_INDEX, dtype=np.int32)
+        self.word_indices = word_indices
+        self.sentence_indices = sentence_indices
+
+    @classmethod
+    def from_char_info(cls, char_info: list[dict]) -> CharTable:
+        """
+        Builds a table from a list of character dicts.
+
+        Parameters
+        ----------
+        char_info: list[dict]
+            The characters, each a dict with the keys 'char', 'start_time', 'end_time'
+            and 'speaker'.
+
+        Returns
+        -------
+        CharTable
+            The table.
+        """
+        chars = [char_dict["char"] for char_dict in char_info]
+        text = "".join(chars)
+        char_bounds = None
+        if len(text) != len(chars) or any(len(char) != 1 for char in chars):
+            char_bounds = np.zeros(len(chars) + 1, dtype=np.int64)
+            np.cumsum([len(char) for char in chars], out=char_bounds[1:])
+
+        def column(key: str, dtype: type, missing) -> np.ndarray:
+            return np.fromiter(
+                (
+                    missing if char_dict[key] is None else char_dict[key]
+                    for char_dict in char_info
+                ),
+                dtype=dtype,
+                count=len(char_info),
+            )
+
+        return cls(
+            text,
+            column("start_time", np.float64, np.nan),
+            column("end_time", np.float64, np.nan),
+            column("speaker", np.int32, MISSING_INDEX),
+            char_bounds,
+        )
+
+    @property
+    def text(self) -> str:
+        """
+        The characters, concatenated.
+        """
+        return self._text
+
+    @property
+    def char_bounds(self) -> np.ndarray or None:
+        """
+        The offsets into 'text' of each character and the end of the last one, or None
+        if character i is text[i].
+        """
+        return self._char_bounds
+
+    def __len__(self) -> int:
+        """
+        The number of characters.
+        """
+        return len(self.start_times)
+
+    def get_char(self, idx: int) -> str:
+        """
+        Returns the character at the index.
+        """
+        if self._char_bounds is None:
+            return self._text[idx]
+        return self._text[self._char_bounds[idx] : self._char_bounds[idx + 1]]
+
+    def get_chars(self) -> list[str]:
+        """
+        Returns every character.
+        """
+        if self._char_bounds is None:
+            return list(self._text)
+        bounds = self._char_bounds.tolist()
+        return [self._text[bounds[i] : bounds[i + 1]] for i in range(len(self))]
+
+    def get_times(self) -> tuple[list, list]:
+        """
+        Returns the start and end times of every character, with None for missing
+        times.
+        """
+        return _to_list(self.start_times, np.nan), _to_list(self.end_times, np.nan)
+
+    def has_missing_times(self) -> bool:
+        """
+        Whether any character is missing its start or end time.
+        """
+        return bool(np.isnan(self.start_times).any() or np.isnan(self.end_times).any())
+
+    def slice(self, start: int, stop: int) -> CharTable:
+        """
+        Returns a table of a range of characters. The columns of the returned table are
+        views of the columns of this table.
+
+        Parameters
+        ----------
+        start: int
+            The index of the first character.
+        stop: int
+            The index after the last character.
+
+        Returns
+        -------
+        CharTable
+            The table of the range.
+        """
+        if self._char_bounds is None:
+            text = self._text[start:stop]
+            char_bounds = None
+        else:
+            text = self._text[self._char_bounds[start] : self._char_bounds[stop]]
+            char_bounds = self._char_bounds[start : stop + 1] - self._char_bounds[start]
+        return CharTable(
+            text,
+            self.start_times[start:stop],
+            self.end_times[start:stop],
+            self.speakers[start:stop],
+            char_bounds,
+            self.word_indices[start:stop],
+            self.sentence_indices[start:stop],
+        )
+
+    def to_char_info(self, start: int = 0, stop: int = None) -> list[dict]:
+        """
+        Builds the character dicts of a range of characters.
+
+        Parameters
+        ----------
+        start: int
+            The index of the first character.
+        stop: int
+            The index after the last character. Default is None (the end).
+
+        Returns
+        -------
+        list[dict]
+            The character dicts, with the keys 'char', 'start_time', 'end_time',
+            'speaker', 'work_index' and 'sentence_index'.
+        """
+        if stop is None:
+            stop = len(self)
+        if self._char_bounds is None:
+            chars = self._text[start:stop]
+        else:
+            bounds = self._char_bounds[start : stop + 1].tolist()
+            chars = [
+                self._text[bounds[i] : bounds[i + 1]] for i in range(len(bounds) - 1)
+            ]
+        columns = zip(
+            chars,
+            _to_list(self.start_times[start:stop], np.nan),
+            _to_list(self.end_times[start:stop], np.nan),
+            _to_list(self.speakers[start:stop], MISSING_INDEX),
+            _to_list(self.word_indices[start:stop], MISSING_INDEX),
+            _to_list(self.sentence_indices[start:stop], MISSING_INDEX),
+        )
+        return [
+            {
+                "char": char,
+                "start_time": start_time,
+                "end_time": end_time,
+                "speaker": speaker,
+                "work_index": word_index,
+                "sentence_index": sentence_index,
+            }
+            for char, start_time, end_time, speaker, word_index, sentence_index in (
+                columns
+            )
+        ]
+
+
+class CharInfoView(Sequence):
+    """
+    A read-only sequence of character dicts over a range of a 'CharTable'. Slicing a
+    view returns another view without copying the table.
+    """
+
+    def __init__(
+        self,
+        table: CharTable,
+        start: int = 0,
+        stop: int = None,
+        prepare: Callable[[], object] = None,
+    ) -> None:
+        """
+        Initialize CharInfoView
+
+        Parameters
+        ----------
+        table: CharTable
+            The table to view.
+        start: int
+            The index of the first character of the view. Default is 0.
+        stop: int
+            The index after the last character of the view. Default is None (the end of
+            the table).
+        prepare: Callable[[], object]
+            Called before building the character dicts, until it has been called once.
+            The length and slices of the view don't call it. Default is None.
+
+        Returns
+        -------
+        None
+        """
+        self._table = table
+        self._start = start
+        self._stop = len(table) if stop is None else stop
+        self._prepare = prepare
+
+    def __len__(self) -> int:
+        """
+        The number of characters in the view.
+        """
+        return max(self._stop - self._start, 0)
+
+    def __getitem__(self, idx: int or slice) -> dict or CharInfoView:
+        """
+        The character dict at the index, or a view of the slice.
+        """
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step != 1:
+                return self.to_list()[idx]
+            return CharInfoView(
+                self._table,
+                self._start + start,
+                self._start + max(stop, start),
+                self._prepare,
+            )
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("char_info index {} out of range".format(idx))
+        self._run_prepare()
+        return self._table.to_char_info(self._start + idx, self._start + idx + 1)[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Iterates over the character dicts.
+        """
+        return iter(self.to_list())
+
+    def __eq__(self, other) -> bool:
+        """
+        Views are equal to sequences of the same character dicts.
+        """
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and self.to_list() == list(other)
+
+    def __repr__(self) -> str:
+        """
+        The character dicts of the view.
+        """
+        return "CharInfoView({})".format(self.to_list())
+
+    def to_list(self) -> list[dict]:
+        """
+        Builds the character dicts of the view.
+
+        Returns
+        -------
+        list[dict]
+            The character dicts.
+        """
+        self._run_prepare()
+        return self._table.to_char_info(self._start, self._stop)
+
+    def _run_prepare(self) -> None:
+        """
+        Calls 'prepare' if it hasn't been called yet.
+        """
+        if self._prepare is not None:
+            self._prepare()
+            self._prepare = None
+
+
+def _to_list(array: np.ndarray, missing) -> list:
+    """
+    Converts an array to a list with None for the missing values.
+
+    Parameters
+    ----------
+    array: np.ndarray
+        The array.
+    missing: Any
+        The value of missing entries (NaN is matched with np.isnan).
+
+    Returns
+    -------
+    list
+        The values of the array.
+    """
+    values = array.tolist()
+    if isinstance(missing, float) and np.isnan(missing):
+        is_missing = np.isnan(array)
+    else:
+        is_missing = array == missing
+    if is_missing.any():
+        for idx in np.flatnonzero(is_missing).tolist():
+            values[idx] = None
+    return values
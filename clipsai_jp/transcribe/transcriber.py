@@ -5,11 +5,22 @@ Notes
 -----
 - Faster-Whisper GitHub: https://github.com/guillaumekln/faster-whisper
 - Faster-Whisper is a faster implementation of OpenAI's Whisper model using CTranslate2
+- A single faster-whisper decode only uses the threads of one CTranslate2 model, so
+long audio can be split at the silences found by faster-whisper's voice activity
+detection and transcribed in parallel by worker processes that each own a model (see
+'Transcriber.transcribe').
 """
 
 # standard library imports
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+import dataclasses
 from datetime import datetime
 import logging
+import mmap
+import multiprocessing
+import os
 
 # current package imports
 from .exceptions import NoSpeechError
@@ -20,13 +31,33 @@ from .transcription import Transcription
 from clipsai_jp.media.audio_file import AudioFile
 from clipsai_jp.media.editor import MediaEditor
 from clipsai_jp.utils.config_manager import ConfigManager
+from clipsai_jp.utils.model_registry import get_model_registry
 from clipsai_jp.utils.pytorch import assert_valid_torch_device, get_compute_device
 from clipsai_jp.utils.type_checker import TypeChecker
 from clipsai_jp.utils.utils import find_missing_dict_keys
 
 # third party imports
+import numpy as np
 import torch
 from faster_whisper import WhisperModel
+from faster_whisper.transcribe import Segment
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+# the sample rate whisper was trained on
+SAMPLE_RATE = 16000
+# the number of parameters of each whisper model size (from the whisper paper), to
+# estimate the size of a model for the model registry. CTranslate2 models don't
+# expose their weights, so the size can't be read from the loaded model
+WHISPER_NUM_PARAMS = {
+    "tiny": 39_000_000,
+    "base": 74_000_000,
+    "small": 244_000_000,
+    "medium": 769_000_000,
+    "large-v1": 1_550_000_000,
+    "large-v2": 1_550_000_000,
+}
+# the bytes per parameter of each precision
+PRECISION_NUM_BYTES = {"float32": 4, "float16": 2, "int8": 1}
 
 
 class Transcriber:
@@ -75,18 +106,49 @@ class Transcriber:
         self._precision = precision
         self._device = device
         self._model_size = model_size
-        # faster-whisper uses "cpu" or "cuda" for device
-        device_str = "cuda" if self._device.startswith("cuda") else "cpu"
-        self._model = WhisperModel(
-            self._model_size,
-            device=device_str,
-            compute_type=self._precision,
-        )
+        # loaded on first use -> transcribing with worker processes never loads it
+        self._model = None
+
+    def load_model(self) -> WhisperModel:
+        """
+        Loads the model of the transcriber if it isn't loaded yet. The model is
+        shared with the other Transcriber instances of the process (see
+        'ModelRegistry'). Transcribing in this process loads it on first use; call
+        this ahead of time (ex: in 'ModelRegistry.warmup') to not wait for it then.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        WhisperModel
+            The model.
+        """
+        if self._model is None:
+            # faster-whisper uses "cpu" or "cuda" for device
+            device_str = "cuda" if self._device.startswith("cuda") else "cpu"
+            self._model = get_model_registry().get(
+                (self._model_size, device_str, self._precision),
+                lambda: WhisperModel(
+                    self._model_size,
+                    device=device_str,
+                    compute_type=self._precision,
+                ),
+                num_bytes=(
+                    WHISPER_NUM_PARAMS[self._model_size]
+                    * PRECISION_NUM_BYTES[self._precision]
+                ),
+            )
+        return self._model
 
     def transcribe(
         self,
         audio_file_path: str,
         iso6391_lang_code: str or None = "ja",
+        audio: np.ndarray = None,
+        n_workers: int = 1,
+        max_chunk_duration: float = 600.0,
     ) -> Transcription:
         """
         Transcribes the media file
@@ -98,12 +160,114 @@ class Transcriber:
         iso6391_lang_code: str or None
             ISO 639-1 language code to transcribe the media in. Default is "ja" (Japanese)
             for better accuracy. Set to None to auto-detect (not recommended for Japanese-focused use).
+        audio: np.ndarray
+            The already decoded 16 kHz mono float32 audio of the file (ex: from
+            'AudioFile.get_decoded_audio'). May be a read-only memory map. Default is
+            None (faster-whisper decodes the file).
+        n_workers: int
+            Number of worker processes to transcribe with. If greater than 1, the
+            audio is split at the silences found by voice activity detection into
+            chunks of at most 'max_chunk_duration' seconds, which are transcribed in
+            parallel by workers that each load their own model with an equal share of
+            the CPU threads; this process doesn't load the model then. If 'audio' is
+            a memory-mapped '.npy' file (ex: from 'AudioFile.get_decoded_audio' with a
+            cache directory), the workers map the file themselves instead of being
+            sent the chunks. Default is 1 (one decode over the whole audio).
+        max_chunk_duration: float
+            The maximum duration in seconds of a chunk when 'n_workers' > 1. Default is
+            600 seconds.
 
         Returns
         -------
         Transcription
             the media file transcription
         """
+        media_file = self._prepare_media_file(
+            audio_file_path, iso6391_lang_code, n_workers
+        )
+
+        # the language of each segment (segments is a generator)
+        languages = []
+
+        def segments() -> Iterator[Segment]:
+            for segment, language in self._iter_segments(
+                media_file, iso6391_lang_code, audio, n_workers, max_chunk_duration
+            ):
+                languages.append(language)
+                yield segment
+
+        char_info = [
+            char for batch in self._iter_char_info(segments()) for char in batch
+        ]
+        if len(languages) == 0:
+            err = "Media file '{}' contains no active speech.".format(media_file.path)
+            logging.error(err)
+            raise NoSpeechError(err)
+        # auto-detected languages may differ between chunks -> use the most common
+        detected_language = max(set(languages), key=languages.count)
+
+        transcription_dict = {
+            "source_software": "faster-whisper",
+            "time_created": datetime.now(),
+            "language": detected_language,
+            "num_speakers": None,
+            "char_info": char_info,
+        }
+        return Transcription(transcription_dict)
+
+    def transcribe_stream(
+        self,
+        audio_file_path: str,
+        iso6391_lang_code: str or None = "ja",
+        audio: np.ndarray = None,
+        n_workers: int = 1,
+        max_chunk_duration: float = 600.0,
+    ) -> Iterator[list[dict]]:
+        """
+        Transcribes the media file incrementally, yielding the characters of each
+        segment as soon as it's decoded. Concatenated, the batches are the 'char_info'
+        of the transcription 'transcribe' returns; each batch starts with the space
+        separating its segment from the previous one.
+
+        Parameters
+        ----------
+        See 'transcribe'. With 'n_workers' > 1 the batches arrive a chunk at a time.
+
+        Returns
+        -------
+        Iterator[list[dict]]
+            The batches of characters, each a dictionary with the keys 'char',
+            'start_time', 'end_time' and 'speaker'. Nothing is yielded if the media
+            file contains no active speech.
+        """
+        media_file = self._prepare_media_file(
+            audio_file_path, iso6391_lang_code, n_workers
+        )
+        return self._iter_char_info(
+            segment
+            for segment, _ in self._iter_segments(
+                media_file, iso6391_lang_code, audio, n_workers, max_chunk_duration
+            )
+        )
+
+    def _prepare_media_file(
+        self,
+        audio_file_path: str,
+        iso6391_lang_code: str or None,
+        n_workers: int,
+    ) -> AudioFile:
+        """
+        Validates the inputs of 'transcribe' and instantiates the media file.
+
+        Parameters
+        ----------
+        See 'transcribe'.
+
+        Returns
+        -------
+        AudioFile
+            the media file to transcribe
+        """
         editor = MediaEditor()
         media_file = editor.instantiate_as_temporal_media_file(audio_file_path)
         media_file.assert_exists()
@@ -111,92 +275,148 @@ class Transcriber:
 
         if iso6391_lang_code is not None:
             self._config_manager.assert_valid_language(iso6391_lang_code)
+        if n_workers < 1:
+            err = "n_workers must be at least 1, not {}".format(n_workers)
+            logging.error(err)
+            raise TranscriberConfigError(err)
+        return media_file
+
+    def _iter_segments(
+        self,
+        media_file: AudioFile,
+        iso6391_lang_code: str or None,
+        audio: np.ndarray,
+        n_workers: int,
+        max_chunk_duration: float,
+    ) -> Iterator[tuple[Segment, str]]:
+        """
+        Decodes the faster-whisper segments of the media file as they're transcribed.
+
+        Parameters
+        ----------
+        See 'transcribe'.
+
+        Returns
+        -------
+        Iterator[tuple[Segment, str]]
+            Each segment, with times relative to the start of the media file, and the
+            language it was transcribed in.
+        """
+        if n_workers > 1:
+            if audio is None:
+                audio = media_file.decode_audio(SAMPLE_RATE)
+            yield from self._transcribe_in_chunks(
+                audio, iso6391_lang_code, n_workers, max_chunk_duration
+            )
+            return
 
         # Use faster-whisper to transcribe with word timestamps
-        segments, info = self._model.transcribe(
-            media_file.path,
+        segments, info = self.load_model().transcribe(
+            media_file.path if audio is None else audio,
             language=iso6391_lang_code,
             beam_size=5,
             word_timestamps=True,
         )
-
-        # Convert faster-whisper segments to our format
         detected_language = (
             info.language if hasattr(info, "language") else iso6391_lang_code or "en"
         )
-
-        # Collect all segments (segments is a generator)
-        all_segments = []
         for segment in segments:
-            all_segments.append(segment)
+            yield segment, detected_language
 
-        if len(all_segments) == 0:
-            err = "Media file '{}' contains no active speech.".format(media_file.path)
-            logging.error(err)
-            raise NoSpeechError(err)
+    def _iter_char_info(self, segments: Iterator[Segment]) -> Iterator[list[dict]]:
+        """
+        Builds character-level timestamps from the word-level timestamps of the
+        segments as they arrive.
 
-        # Build character-level timestamps from word-level timestamps
-        char_info = []
+        Parameters
+        ----------
+        segments: Iterator[Segment]
+            The faster-whisper segments in order.
+
+        Returns
+        -------
+        Iterator[list[dict]]
+            The characters of each segment with text, preceded by the space separating
+            it from the previous segment. The characters are sorted and
+            non-overlapping across batches (see '_enforce_monotonic_char_info').
+        """
+        # the last segment with text, whose trailing space waits for the next segment
+        prev_segment = None
+        prev_end = None
+        for segment in segments:
+            batch = []
+            if prev_segment is not None:
+                # 次のセグメントの開始時間を超えないように制限する
+                # （超えると時間の重なりが生じ、二分探索による時間→文字の
+                # インデックス変換が壊れるため）
+                space_end = min(prev_segment.end + 0.1, segment.start)
+                space_end = max(space_end, prev_segment.end)
+                batch.append(
+                    {
+                        "char": " ",
+                        "start_time": prev_segment.end,
+                        "end_time": space_end,
+                        "speaker": None,
+                    }
+                )
+                prev_segment = None
 
-        for seg_idx, segment in enumerate(all_segments):
-            segment_text = segment.text.strip()
-            if not segment_text:
+            segment_chars = self._segment_to_char_info(segment)
+            if len(segment_chars) > 0:
+                batch.extend(segment_chars)
+                prev_segment = segment
+            if len(batch) == 0:
                 continue
 
-            # Get words from segment (words is a list when word_timestamps=True)
-            words = (
-                list(segment.words)
-                if hasattr(segment, "words") and segment.words
-                else []
-            )
+            # char_infoの時間区間をソート済み・非重複に正規化する。
+            # Whisperの単語タイムスタンプは稀に前後で重なる/逆転することがあり、
+            # そのままだと Transcription._find_index の二分探索（区間が整列・非重複で
+            # あることを前提とする）が誤ったインデックスを返し得る。バッチを跨いで
+            # 直前の end_time を引き継ぐことで全体の単調性を保証する。
+            prev_end = self._enforce_monotonic_char_info(batch, prev_end)
+            yield batch
 
-            # If we have word timestamps, use them to create character timestamps
-            if words:
-                for word in words:
-                    word_text = word.word
-                    word_start = word.start
-                    word_end = word.end
-
-                    # Calculate duration per character in this word
-                    word_duration = word_end - word_start
-                    num_chars = len(word_text)
-
-                    if num_chars > 0:
-                        char_duration = word_duration / num_chars
-                        for i, char in enumerate(word_text):
-                            char_start = word_start + (i * char_duration)
-                            char_end = word_start + ((i + 1) * char_duration)
-
-                            char_info.append(
-                                {
-                                    "char": char,
-                                    "start_time": char_start,
-                                    "end_time": char_end,
-                                    "speaker": None,
-                                }
-                            )
-                    else:
-                        # Handle empty word (shouldn't happen, but just in case)
-                        char_info.append(
-                            {
-                                "char": " ",
-                                "start_time": word_start,
-                                "end_time": word_end,
-                                "speaker": None,
-                            }
-                        )
-            else:
-                # Fallback: distribute segment time evenly across characters
-                segment_start = segment.start
-                segment_end = segment.end
-                segment_duration = segment_end - segment_start
-                num_chars = len(segment_text)
+    @staticmethod
+    def _segment_to_char_info(segment: Segment) -> list[dict]:
+        """
+        Builds the character-level timestamps of a segment.
+
+        Parameters
+        ----------
+        segment: Segment
+            The faster-whisper segment.
+
+        Returns
+        -------
+        list[dict]
+            The characters of the segment, or an empty list if it has no text.
+        """
+        segment_text = segment.text.strip()
+        if not segment_text:
+            return []
+
+        char_info = []
+        # Get words from segment (words is a list when word_timestamps=True)
+        words = (
+            list(segment.words) if hasattr(segment, "words") and segment.words else []
+        )
+
+        # If we have word timestamps, use them to create character timestamps
+        if words:
+            for word in words:
+                word_text = word.word
+                word_start = word.start
+                word_end = word.end
+
+                # Calculate duration per character in this word
+                word_duration = word_end - word_start
+                num_chars = len(word_text)
 
                 if num_chars > 0:
-                    char_duration = segment_duration / num_chars
-                    for i, char in enumerate(segment_text):
-                        char_start = segment_start + (i * char_duration)
-                        char_end = segment_start + ((i + 1) * char_duration)
+                    char_duration = word_duration / num_chars
+                    for i, char in enumerate(word_text):
+                        char_start = word_start + (i * char_duration)
+                        char_end = word_start + ((i + 1) * char_duration)
 
                         char_info.append(
                             {
@@ -207,51 +427,142 @@ class Transcriber:
                             }
                         )
                 else:
-                    # Empty segment
+                    # Handle empty word (shouldn't happen, but just in case)
                     char_info.append(
                         {
                             "char": " ",
-                            "start_time": segment_start,
-                            "end_time": segment_end,
+                            "start_time": word_start,
+                            "end_time": word_end,
                             "speaker": None,
                         }
                     )
+        else:
+            # Fallback: distribute segment time evenly across characters
+            segment_start = segment.start
+            segment_end = segment.end
+            segment_duration = segment_end - segment_start
+            num_chars = len(segment_text)
+
+            if num_chars > 0:
+                char_duration = segment_duration / num_chars
+                for i, char in enumerate(segment_text):
+                    char_start = segment_start + (i * char_duration)
+                    char_end = segment_start + ((i + 1) * char_duration)
 
-            # Add space after segment if not the last segment
-            if seg_idx < len(all_segments) - 1:
-                # 次のセグメントの開始時間を超えないように制限する
-                # （超えると時間の重なりが生じ、二分探索による時間→文字の
-                # インデックス変換が壊れるため）
-                next_start = all_segments[seg_idx + 1].start
-                space_end = min(segment.end + 0.1, next_start)
-                space_end = max(space_end, segment.end)
+                    char_info.append(
+                        {
+                            "char": char,
+                            "start_time": char_start,
+                            "end_time": char_end,
+                            "speaker": None,
+                        }
+                    )
+            else:
+                # Empty segment
                 char_info.append(
                     {
                         "char": " ",
-                        "start_time": segment.end,
-                        "end_time": space_end,
+                        "start_time": segment_start,
+                        "end_time": segment_end,
                         "speaker": None,
                     }
                 )
 
-        # char_infoの時間区間をソート済み・非重複に正規化する。
-        # Whisperの単語タイムスタンプは稀に前後で重なる/逆転することがあり、
-        # そのままだと Transcription._find_index の二分探索（区間が整列・非重複で
-        # あることを前提とする）が誤ったインデックスを返し得る。ここで一度だけ
-        # 単調性を保証しておく。
-        self._enforce_monotonic_char_info(char_info)
+        return char_info
 
-        transcription_dict = {
-            "source_software": "faster-whisper",
-            "time_created": datetime.now(),
-            "language": detected_language,
-            "num_speakers": None,
-            "char_info": char_info,
-        }
-        return Transcription(transcription_dict)
+    def _transcribe_in_chunks(
+        self,
+        audio: np.ndarray,
+        iso6391_lang_code: str or None,
+        n_workers: int,
+        max_chunk_duration: float,
+    ) -> Iterator[tuple[Segment, str]]:
+        """
+        Splits the audio at voice activity gaps and transcribes the chunks in parallel
+        in worker processes. The segments of a chunk are yielded as soon as it and
+        every chunk before it are transcribed. At most two chunks per worker are
+        queued at a time, so the chunks sent to the workers don't hold another copy
+        of the whole audio.
+
+        Parameters
+        ----------
+        audio: np.ndarray
+            The 16 kHz mono float32 audio.
+        iso6391_lang_code: str or None
+            ISO 639-1 language code to transcribe in, or None to auto-detect.
+        n_workers: int
+            Number of worker processes to transcribe with.
+        max_chunk_duration: float
+            The maximum duration in seconds of a chunk.
+
+        Returns
+        -------
+        Iterator[tuple[Segment, str]]
+            The faster-whisper segments of every chunk in order, with their times
+            (and the times of their words) relative to the start of the audio, and the
+            language of the chunk each was transcribed in.
+        """
+        # faster-whisper 1.0.x doesn't take 'sampling_rate' (it's always 16 kHz, the
+        # same as SAMPLE_RATE), so only the options are passed
+        speech_timestamps = get_speech_timestamps(audio, VadOptions())
+        chunk_bounds = _plan_transcription_chunks(
+            speech_timestamps, len(audio), int(max_chunk_duration * SAMPLE_RATE)
+        )
+        n_workers = min(n_workers, max(len(chunk_bounds), 1))
+        cpu_threads = max((os.cpu_count() or 1) // n_workers, 1)
+        logging.debug(
+            "Transcribing {} chunks with {} workers of {} threads.".format(
+                len(chunk_bounds), n_workers, cpu_threads
+            )
+        )
+
+        # spawn instead of fork -> CTranslate2 and torch aren't fork safe
+        device_str = "cuda" if self._device.startswith("cuda") else "cpu"
+        executor = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker_model,
+            initargs=(self._model_size, device_str, self._precision, cpu_threads),
+        )
+        # the workers map a cached audio file themselves, else they're sent the chunks
+        audio_file_path = _get_npy_file_path(audio)
+        remaining_chunk_bounds = iter(chunk_bounds)
+        # (chunk start, future) of the submitted chunks, in order
+        pending = deque()
+
+        def submit_next_chunk() -> None:
+            bounds = next(remaining_chunk_bounds, None)
+            if bounds is None:
+                return
+            start, end = bounds
+            if audio_file_path is not None:
+                args = (audio_file_path, start, end)
+            else:
+                args = (audio[start:end], 0, end - start)
+            pending.append(
+                (
+                    start,
+                    executor.submit(
+                        _transcribe_chunk_in_worker, *args, iso6391_lang_code
+                    ),
+                )
+            )
+
+        try:
+            for _ in range(2 * n_workers):
+                submit_next_chunk()
+            while len(pending) > 0:
+                chunk_start, future = pending.popleft()
+                segments, language = future.result()
+                submit_next_chunk()
+                for segment in segments:
+                    yield _shift_segment(segment, chunk_start / SAMPLE_RATE), language
+        finally:
+            # the remaining chunks aren't needed if the consumer stopped early
+            executor.shutdown(cancel_futures=True)
 
     @staticmethod
-    def _enforce_monotonic_char_info(char_info: list) -> None:
+    def _enforce_monotonic_char_info(char_info: list, prev_end: float = None) -> float:
         """
         char_infoの時間区間をソート済み・非重複になるようその場で補正する
 
@@ -263,13 +574,21 @@ class Transcriber:
         ----------
         char_info: list[dict]
             文字単位の情報リスト（start_time / end_time を持つ）。その場で更新される。
+        prev_end: float
+            直前のバッチの最後の end_time。char_info を逐次補正する場合に渡す。
+            デフォルトは None（char_info が先頭）。
+
+        Returns
+        -------
+        float
+            最後の文字の end_time（次のバッチの prev_end）。時刻を持つ文字がなければ
+            prev_end をそのまま返す。
 
         Notes
         -----
         - この不変条件は Transcription._find_index の二分探索の前提
         - start_time / end_time が None の要素はスキップする（前提を壊さない）
         """
-        prev_end = None
         for ci in char_info:
             start = ci["start_time"]
             end = ci["end_time"]
@@ -282,6 +601,7 @@ class Transcriber:
             ci["start_time"] = start
             ci["end_time"] = end
             prev_end = end
+        return prev_end
 
     def detect_language(self, media_file: AudioFile) -> str:
         """
@@ -302,7 +622,7 @@ class Transcriber:
         media_file.assert_has_audio_stream()
 
         # faster-whisper detects language during transcription
-        segments, info = self._model.transcribe(
+        segments, info = self.load_model().transcribe(
             media_file.path,
             language=None,  # Auto-detect
             beam_size=5,
@@ -312,6 +632,205 @@ class Transcriber:
         return info.language if hasattr(info, "language") else "en"
 
 
+def _plan_transcription_chunks(
+    speech_timestamps: list[dict],
+    num_samples: int,
+    max_chunk_samples: int,
+) -> list[tuple[int, int]]:
+    """
+    Splits audio into chunks of bounded length, cutting in the middle of the gaps
+    between speech so words aren't cut in two.
+
+    Parameters
+    ----------
+    speech_timestamps: list[dict]
+        The 'start' and 'end' samples of each speech region, in order (see
+        'faster_whisper.vad.get_speech_timestamps').
+    num_samples: int
+        The number of samples of the audio.
+    max_chunk_samples: int
+        The maximum number of samples of a chunk. Speech regions longer than this are
+        cut without regard for words.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        The (start, end) samples of each chunk that contains speech, in order.
+    """
+    bounds = [0]
+    prev_speech_end = 0
+    # the end of the audio ends the last chunk like the start of more speech would
+    for speech in speech_timestamps + [{"start": num_samples, "end": num_samples}]:
+        while speech["end"] - bounds[-1] > max_chunk_samples:
+            # cut in the middle of the gap before the speech, else at its start
+            cut = (prev_speech_end + speech["start"]) // 2
+            if cut <= bounds[-1]:
+                cut = speech["start"]
+            if cut <= bounds[-1]:
+                cut = bounds[-1] + max_chunk_samples
+            bounds.append(min(cut, bounds[-1] + max_chunk_samples))
+        prev_speech_end = speech["end"]
+    if bounds[-1] < num_samples:
+        bounds.append(num_samples)
+
+    # chunks without speech are skipped so whisper can't hallucinate in them
+    chunks = []
+    speech_idx = 0
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        while (
+            speech_idx < len(speech_timestamps)
+            and speech_timestamps[speech_idx]["end"] <= start
+        ):
+            speech_idx += 1
+        if (
+            speech_idx < len(speech_timestamps)
+            and speech_timestamps[speech_idx]["start"] < end
+        ):
+            chunks.append((start, end))
+    return chunks
+
+
+def _shift_segment(segment: Segment, offset: float) -> Segment:
+    """
+    Shifts the times of a faster-whisper segment and its words.
+
+    Parameters
+    ----------
+    segment: Segment
+        The faster-whisper segment.
+    offset: float
+        The seconds to add to the times.
+
+    Returns
+    -------
+    Segment
+        The shifted segment.
+    """
+    words = segment.words
+    if words:
+        words = [
+            _replace_fields(word, start=word.start + offset, end=word.end + offset)
+            for word in words
+        ]
+    return _replace_fields(
+        segment, start=segment.start + offset, end=segment.end + offset, words=words
+    )
+
+
+def _replace_fields(record, **changes):
+    """
+    Returns a copy of a faster-whisper Segment or Word with some fields replaced. They
+    are NamedTuples in faster-whisper 1.0.x and dataclasses since 1.1.
+
+    Parameters
+    ----------
+    record: Segment or Word
+        The faster-whisper segment or word.
+    **changes
+        The new values of the fields, by name.
+
+    Returns
+    -------
+    Segment or Word
+        The copy.
+    """
+    if dataclasses.is_dataclass(record):
+        return dataclasses.replace(record, **changes)
+    return record._replace(**changes)
+
+
+# the model owned by a worker process of 'Transcriber._transcribe_in_chunks'
+_worker_model = None
+
+
+def _init_worker_model(
+    model_size: str, device: str, precision: str, cpu_threads: int
+) -> None:
+    """
+    Loads the model of a worker process.
+
+    Parameters
+    ----------
+    model_size: str
+        The whisper model size.
+    device: str
+        'cpu' or 'cuda'.
+    precision: str
+        The compute type of the model.
+    cpu_threads: int
+        The number of threads the model may use.
+
+    Returns
+    -------
+    None
+    """
+    global _worker_model
+    _worker_model = WhisperModel(
+        model_size, device=device, compute_type=precision, cpu_threads=cpu_threads
+    )
+
+
+def _get_npy_file_path(audio: np.ndarray) -> str or None:
+    """
+    Returns the path of the '.npy' file the audio is a memory map of, if it maps the
+    whole file (and not a slice of it).
+
+    Parameters
+    ----------
+    audio: np.ndarray
+        The audio.
+
+    Returns
+    -------
+    str or None
+        Absolute path to the '.npy' file; None if the audio isn't a memory map of a
+        whole '.npy' file.
+    """
+    if (
+        isinstance(audio, np.memmap)
+        and isinstance(audio.base, mmap.mmap)
+        and audio.filename is not None
+        and os.fspath(audio.filename).endswith(".npy")
+    ):
+        return os.fspath(audio.filename)
+    return None
+
+
+def _transcribe_chunk_in_worker(
+    audio: np.ndarray or str, start: int, end: int, iso6391_lang_code: str or None
+) -> tuple[list[Segment], str]:
+    """
+    Transcribes a chunk of audio in a worker process.
+
+    Parameters
+    ----------
+    audio: np.ndarray or str
+        The 16 kHz mono float32 audio, or the absolute path to a '.npy' file of it,
+        which is memory-mapped.
+    start: int
+        The first sample of the chunk in 'audio'.
+    end: int
+        The sample after the last sample of the chunk in 'audio'.
+    iso6391_lang_code: str or None
+        ISO 639-1 language code to transcribe in, or None to auto-detect.
+
+    Returns
+    -------
+    tuple[list[Segment], str]
+        The faster-whisper segments of the chunk, with times relative to the start of
+        the chunk, and the language of the chunk.
+    """
+    if isinstance(audio, str):
+        audio = np.load(audio, mmap_mode="r")
+    segments, info = _worker_model.transcribe(
+        audio[start:end],
+        language=iso6391_lang_code,
+        beam_size=5,
+        word_timestamps=True,
+    )
+    return list(segments), info.language
+
+
 class TranscriberConfigManager(ConfigManager):
     """
     A class for getting information about and validating Transcriber
@@ -6,28 +6,56 @@ Notes
 - Character, word, and sentence level time stamps are available
 - NLTK used for tokenizing sentences
 - Faster-Whisper GitHub: https://github.com/guillaumekln/faster-whisper
+- The character data is stored column by column (see 'CharTable'); 'get_char_info'
+returns a read-only view that builds the character dicts on access.
+- Besides json, transcriptions can be stored in a binary format (see 'binary_format')
+that is memory-mapped when loaded, without validating or re-deriving anything.
+- The word and sentence levels are derived from the characters on first use and
+cached, as are the Character, Word and Sentence elements. Either level can be disabled
+when constructing a transcription that doesn't need it.
+- 'slice' returns the transcription of a time range (ex: a clip) whose characters are
+views of the characters of the full transcription, without validating or re-deriving
+anything.
 """
 
 # standard library imports
 from __future__ import annotations
+from collections.abc import Callable
+import copy
 from datetime import datetime
+from functools import partial
 import logging
 
 # current package imports
+from .binary_format import (
+    BINARY_FILE_EXTENSION,
+    decode_info,
+    encode_info,
+    encode_strings,
+    read_binary_file,
+    write_binary_file,
+)
+from .char_table import CharInfoView, CharTable
 from .exceptions import TranscriptionError
 from .transcription_element import Sentence, Word, Character
 
 # local imports
+from clipsai_jp.filesys.file import File
 from clipsai_jp.filesys.json_file import JSONFile
 from clipsai_jp.filesys.manager import FileSystemManager
 from clipsai_jp.utils.type_checker import TypeChecker
 
 # 3rd party imports
 import nltk
+import numpy as np
 from nltk.tokenize import sent_tokenize
 
 logger = logging.getLogger(__name__)
 
+# the keys of the word_info and sentence_info dicts
+WORD_INFO_KEYS = ("word", "start_char", "end_char", "start_time", "end_time", "speaker")
+SENTENCE_INFO_KEYS = ("sentence", "start_char", "start_time", "end_char", "end_time")
+
 # Download NLTK data (punkt for older versions, punkt_tab for NLTK 3.8+)
 try:
     nltk.download("punkt", quiet=True)
@@ -55,16 +83,26 @@ class Transcription:
 
     def __init__(
         self,
-        transcription: dict or JSONFile,
+        transcription: dict or JSONFile or File,
+        derive_words: bool = True,
+        derive_sentences: bool = True,
     ) -> None:
         """
         Initialize Transcription Class.
 
         Parameters
         ----------
-        transcription: dict or JSONFile
+        transcription: dict or JSONFile or File
             - a dictionary object containing whisperx transcription
             - a JSONFile containing a whisperx transcription
+            - a File stored with 'store_as_binary_file'
+        derive_words: bool
+            Whether the word level (word_info, words, and the word index of each
+            character) is available. Default is True.
+        derive_sentences: bool
+            Whether the sentence level (sentence_info, sentences, and the sentence index
+            of each character) is available. Splitting the text into sentences is the
+            most expensive part of deriving the levels. Default is True.
 
         Returns
         -------
@@ -77,17 +115,35 @@ class Transcription:
         self._created_time = None
         self._language = None
         self._num_speakers = None
-        self._char_info = None
+        self._char_table: CharTable = None
         # derived from char_info data
         self._text = None
+        self._end_time = None
+        self._missing_time_char_idx = None
         self._word_info = None
+        self._word_times = None
         self._sentence_info = None
+        self._sentence_times = None
+        self._derive_words = derive_words
+        self._derive_sentences = derive_sentences
+        # load the word_info and sentence_info on first use instead of deriving them
+        # (ex: decode them from a binary file)
+        self._word_info_loader: Callable[[], list[dict]] = None
+        self._sentence_info_loader: Callable[[], list[dict]] = None
+        # Character, Word and Sentence elements, built on first use
+        self._characters = None
+        self._words = None
+        self._sentences = None
 
         self._type_checker = TypeChecker()
-        self._type_checker.assert_type(transcription, "transcription", (dict, JSONFile))
+        self._type_checker.assert_type(
+            transcription, "transcription", (dict, JSONFile, File)
+        )
 
         if isinstance(transcription, JSONFile):
             self._init_from_json_file(transcription)
+        elif isinstance(transcription, File):
+            self._init_from_binary_file(transcription)
         else:
             self._init_from_dict(transcription)
 
@@ -124,12 +180,7 @@ class Transcription:
         """
         The end time of the transcript in seconds.
         """
-        char_info = self.get_char_info()
-        for i in range(len(char_info) - 1, -1, -1):
-            if char_info[i]["end_time"] is not None:
-                return char_info[i]["end_time"]
-            if char_info[i]["start_time"] is not None:
-                return char_info[i]["start_time"]
+        return self._end_time
 
     @property
     def text(self) -> str:
@@ -139,14 +190,12 @@ class Transcription:
         return self._text
 
     @property
-    def characters(self) -> list[Character]:
+    def characters(self) -> tuple[Character, ...]:
         """
-        A list of characters from the text as Character objects and ordered by start
-        time.
+        The characters of the text as Character objects and ordered by start time.
         """
-        chars = []
-        for char_info in self.get_char_info():
-            chars.append(
+        if self._characters is None:
+            self._characters = tuple(
                 Character(
                     start_time=char_info["start_time"],
                     end_time=char_info["end_time"],
@@ -154,17 +203,17 @@ class Transcription:
                     sentence_index=char_info["sentence_index"],
                     text=char_info["char"],
                 )
+                for char_info in self.get_char_info()
             )
-        return chars
+        return self._characters
 
     @property
-    def words(self) -> list[Word]:
+    def words(self) -> tuple[Word, ...]:
         """
-        A list of words from the text as Word objects and ordered by start time.
+        The words of the text as Word objects and ordered by start time.
         """
-        words = []
-        for word_info in self.get_word_info():
-            words.append(
+        if self._words is None:
+            self._words = tuple(
                 Word(
                     start_time=word_info["start_time"],
                     end_time=word_info["end_time"],
@@ -172,31 +221,33 @@ class Transcription:
                     end_char=word_info["end_char"],
                     text=word_info["word"],
                 )
+                for word_info in self.get_word_info()
             )
-        return words
+        return self._words
 
     @property
-    def sentences(self) -> list[Sentence]:
+    def sentences(self) -> tuple[Sentence, ...]:
         """
-        A list of sentences from the text as Sentence objects and ordered by start time.
+        The sentences of the text as Sentence objects and ordered by start time.
         """
-        sentences = []
-        for sentence_info in self.get_sentence_info():
-            sentences.append(
+        if self._sentences is None:
+            self._sentences = tuple(
                 Sentence(
                     start_time=sentence_info["start_time"],
                     end_time=sentence_info["end_time"],
                     start_char=sentence_info["start_char"],
                     end_char=sentence_info["end_char"],
+                    text=sentence_info["sentence"],
                 )
+                for sentence_info in self.get_sentence_info()
             )
-        return sentences
+        return self._sentences
 
     def get_char_info(
         self,
         start_time: float = None,
         end_time: float = None,
-    ) -> list:
+    ) -> CharInfoView:
         """
         Returns the character info of the transcription
 
@@ -211,12 +262,13 @@ class Transcription:
 
         Returns
         -------
-        list[dict]
-            list of dictionaries where each dictionary contains
-            info about a single character in the text
+        CharInfoView
+            read-only sequence of dictionaries where each dictionary contains
+            info about a single character in the text. The word and sentence levels
+            are derived when the first dictionary is read, not by this call.
         """
         self._assert_valid_times(start_time, end_time)
-        char_info = self._char_info
+        char_info = CharInfoView(self._char_table, prepare=self._get_char_table)
 
         # return all char info
         if start_time is None and end_time is None:
@@ -253,7 +305,7 @@ class Transcription:
         self._assert_valid_times(start_time, end_time)
 
         # get all word info
-        word_info = self._word_info
+        word_info = self._get_word_info()
 
         # return all word info
         if start_time is None and end_time is None:
@@ -286,7 +338,7 @@ class Transcription:
             sentence in the text
         """
         self._assert_valid_times(start_time, end_time)
-        sentence_info = self._sentence_info
+        sentence_info = self._get_sentence_info()
 
         # return all word info
         if start_time is None and end_time is None:
@@ -318,7 +370,13 @@ class Transcription:
         int
             The index of char_info that is closest to 'target_time'
         """
-        return self._find_index(self.get_char_info(), target_time, type_of_time)
+        self._assert_char_times_searchable()
+        return self._find_index(
+            self._char_table.start_times,
+            self._char_table.end_times,
+            target_time,
+            type_of_time,
+        )
 
     def find_word_index(self, target_time: float, type_of_time: str) -> int:
         """
@@ -340,7 +398,7 @@ class Transcription:
         int
             The index of word_info that is closest to 'target_time'.
         """
-        return self._find_index(self.get_word_info(), target_time, type_of_time)
+        return self._find_index(*self._get_word_times(), target_time, type_of_time)
 
     def find_sentence_index(self, target_time: float, type_of_time: str) -> int:
         """
@@ -362,7 +420,223 @@ class Transcription:
         int
             The index of word_info that is closest to 'target_time'
         """
-        return self._find_index(self.get_sentence_info(), target_time, type_of_time)
+        return self._find_index(*self._get_sentence_times(), target_time, type_of_time)
+
+    def find_char_indices(
+        self, target_times: np.ndarray, type_of_time: str
+    ) -> np.ndarray:
+        """
+        Finds the index in the transcript's character info who's start or end time is
+        closest to each of 'target_times' (seconds). Equivalent to calling
+        'find_char_index' on each time, in a single vectorized search.
+
+        Parameters
+        ----------
+        target_times: np.ndarray
+            The times in seconds to search for.
+        type_of_time: start | end
+            start: returns the index of the character with the closest start time
+            before each target time.
+            end: returns the index of the character with the closest end time after
+            each target time.
+
+        Returns
+        -------
+        np.ndarray
+            The index of char_info that is closest to each of 'target_times'.
+        """
+        self._assert_char_times_searchable()
+        return self._find_indices(
+            self._char_table.start_times,
+            self._char_table.end_times,
+            target_times,
+            type_of_time,
+        )
+
+    def find_word_indices(
+        self, target_times: np.ndarray, type_of_time: str
+    ) -> np.ndarray:
+        """
+        Finds the index in the transcript's word info who's start or end time is
+        closest to each of 'target_times' (seconds). Equivalent to calling
+        'find_word_index' on each time, in a single vectorized search.
+
+        Parameters
+        ----------
+        target_times: np.ndarray
+            The times in seconds to search for.
+        type_of_time: start | end
+            start: returns the index of the word with the closest start time before
+            each target time.
+            end: returns the index of the word with the closest end time after each
+            target time.
+
+        Returns
+        -------
+        np.ndarray
+            The index of word_info that is closest to each of 'target_times'.
+        """
+        return self._find_indices(*self._get_word_times(), target_times, type_of_time)
+
+    def find_sentence_indices(
+        self, target_times: np.ndarray, type_of_time: str
+    ) -> np.ndarray:
+        """
+        Finds the index in the transcript's sentence info who's start or end time is
+        closest to each of 'target_times' (seconds). Equivalent to calling
+        'find_sentence_index' on each time, in a single vectorized search.
+
+        Parameters
+        ----------
+        target_times: np.ndarray
+            The times in seconds to search for.
+        type_of_time: start | end
+            start: returns the index of the sentence with the closest start time
+            before each target time.
+            end: returns the index of the sentence with the closest end time after
+            each target time.
+
+        Returns
+        -------
+        np.ndarray
+            The index of sentence_info that is closest to each of 'target_times'.
+        """
+        return self._find_indices(
+            *self._get_sentence_times(), target_times, type_of_time
+        )
+
+    def slice(self, start_time: float, end_time: float) -> Transcription:
+        """
+        Returns the transcription of a time range, ex: of a clip.
+
+        The characters of the range are the characters of
+        'get_char_info(start_time, end_time)'. Their text, speaker and index columns are
+        views of this transcription's columns. The times are re-based so the range
+        starts at 0 seconds, and clipped to the range. The words and sentences
+        overlapping the range are taken from this transcription (they're not derived
+        again) and clipped to the range on first use. The word and sentence indices
+        are offset to the first word and sentence of the range.
+
+        Parameters
+        ----------
+        start_time: float
+            start time of the range in seconds
+        end_time: float
+            end time of the range in seconds
+
+        Returns
+        -------
+        Transcription
+            the transcription of the range
+        """
+        if start_time is None or end_time is None:
+            err = (
+                "start_time and end_time must both be floats, not '{}' (start_time) "
+                "and '{}' (end_time)".format(start_time, end_time)
+            )
+            logging.error(err)
+            raise TranscriptionError(err)
+        self._assert_valid_times(start_time, end_time)
+
+        start_char = self.find_char_index(start_time, type_of_time="start")
+        end_char = self.find_char_index(end_time, type_of_time="end") + 1
+        if end_char <= start_char:
+            err = "There are no characters between {} and {} seconds.".format(
+                start_time, end_time
+            )
+            logging.error(err)
+            raise TranscriptionError(err)
+        duration = end_time - start_time
+
+        table = self._get_char_table().slice(start_char, end_char)
+        table.start_times = _rebase_times(table.start_times, start_time, duration)
+        table.end_times = _rebase_times(table.end_times, start_time, duration)
+
+        sliced = copy.copy(self)
+        sliced._char_table = table
+        sliced._word_info = None
+        sliced._word_times = None
+        sliced._word_info_loader = None
+        sliced._sentence_info = None
+        sliced._sentence_times = None
+        sliced._sentence_info_loader = None
+        sliced._characters = None
+        sliced._words = None
+        sliced._sentences = None
+        sliced._build_text()
+        sliced._build_char_times()
+
+        def slice_level(
+            indices: np.ndarray, get_info: Callable, get_times: Callable, key: str
+        ) -> tuple:
+            """
+            Slices the word or sentence level: the offset indices of the characters,
+            the re-based times and a loader of the sliced info.
+            """
+            is_assigned = indices >= 0
+            if not is_assigned.any():
+                first, stop = 0, 0
+            else:
+                first = int(indices[is_assigned].min())
+                stop = int(indices[is_assigned].max()) + 1
+
+            # a space takes the index of the next word -> a range ending (or starting)
+            # in a space can reference a word or sentence without characters in it
+            info = get_info()
+
+            def is_empty(idx: int) -> bool:
+                info_start_char = info[idx]["start_char"]
+                info_end_char = info[idx]["end_char"]
+                if info_start_char is None or info_end_char is None:
+                    return False
+                clipped_start_char = max(info_start_char - start_char, 0)
+                clipped_end_char = min(info_end_char - start_char, len(table))
+                return clipped_end_char <= clipped_start_char
+
+            while stop > first and is_empty(stop - 1):
+                stop -= 1
+            while first < stop and is_empty(first):
+                first += 1
+            is_assigned &= (indices >= first) & (indices < stop)
+
+            start_times, end_times = get_times()
+            times = (
+                _rebase_times(start_times[first:stop], start_time, duration),
+                _rebase_times(end_times[first:stop], start_time, duration),
+            )
+
+            def load_info() -> list[dict]:
+                return _slice_info(
+                    get_info()[first:stop],
+                    key,
+                    table.get_chars(),
+                    start_char,
+                    start_time,
+                    duration,
+                )
+
+            return np.where(is_assigned, indices - first, -1), times, load_info
+
+        if self._derive_words:
+            (
+                table.word_indices,
+                sliced._word_times,
+                sliced._word_info_loader,
+            ) = slice_level(
+                table.word_indices, self._get_word_info, self._get_word_times, "word"
+            )
+        if self._derive_sentences:
+            (
+                table.sentence_indices,
+                sliced._sentence_times,
+                sliced._sentence_info_loader,
+            ) = slice_level(
+                table.sentence_indices,
+                self._get_sentence_info,
+                self._get_sentence_times,
+                "sentence",
+            )
+        return sliced
 
     def store_as_json_file(self, file_path: str) -> JSONFile:
         """
@@ -385,17 +659,17 @@ class Transcription:
         # delete file if it exists
         json_file.delete()
 
-        # only store necessary data
-        char_info_needed_for_storage = []
-        for char_info in self._char_info:
-            char_info_needed_for_storage.append(
-                {
-                    "char": char_info["char"],
-                    "start_time": char_info["start_time"],
-                    "end_time": char_info["end_time"],
-                    "speaker": char_info["speaker"],
-                }
-            )
+        # only store necessary data, read from the table directly so the word and
+        # sentence levels aren't derived
+        char_info_needed_for_storage = [
+            {
+                "char": char_info["char"],
+                "start_time": char_info["start_time"],
+                "end_time": char_info["end_time"],
+                "speaker": char_info["speaker"],
+            }
+            for char_info in self._char_table.to_char_info()
+        ]
 
         transcription_dict = {
             "source_software": self._source_software,
@@ -408,6 +682,61 @@ class Transcription:
         json_file.create(transcription_dict)
         return json_file
 
+    def store_as_binary_file(self, file_path: str) -> File:
+        """
+        Stores the transcription in the binary format, along with the word_info and
+        sentence_info of the enabled levels so loading it doesn't re-derive them.
+        'file_path' is overwritten if already exists.
+
+        Parameters
+        ----------
+        file_path: str
+            absolute file path to store the transcription as a binary file, with the
+            extension 'transcript'
+
+        Returns
+        -------
+        File
+        """
+        binary_file = File(file_path)
+        binary_file.assert_has_file_extension(BINARY_FILE_EXTENSION)
+        self._fs_manager.assert_parent_dir_exists(binary_file)
+
+        # delete file if it exists
+        binary_file.delete()
+
+        table = self._get_char_table()
+        text, _ = encode_strings([table.text])
+        arrays = {
+            "text": text,
+            "start_times": table.start_times,
+            "end_times": table.end_times,
+            "speakers": table.speakers,
+            "word_indices": table.word_indices,
+            "sentence_indices": table.sentence_indices,
+        }
+        if table.char_bounds is not None:
+            arrays["char_bounds"] = table.char_bounds
+        if self._derive_words:
+            arrays.update(encode_info(self._get_word_info(), WORD_INFO_KEYS, "word"))
+        if self._derive_sentences:
+            arrays.update(
+                encode_info(self._get_sentence_info(), SENTENCE_INFO_KEYS, "sentence")
+            )
+
+        metadata = {
+            "source_software": self._source_software,
+            "time_created": self._created_time.isoformat(),
+            "language": self._language,
+            "num_speakers": self._num_speakers,
+            "end_time": self._end_time,
+            "missing_time_char_idx": self._missing_time_char_idx,
+        }
+
+        write_binary_file(binary_file.path, metadata, arrays)
+        binary_file.assert_exists()
+        return binary_file
+
     def log_char_info(self) -> None:
         """
         Logs the character info for easy viewing
@@ -494,8 +823,161 @@ class Transcription:
                 )
             )
 
+    def _get_char_table(self) -> CharTable:
+        """
+        Returns the char table, with the word and sentence index of each character
+        filled in for the enabled levels.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        CharTable
+            the char table
+        """
+        if self._derive_words:
+            self._get_word_times()
+        if self._derive_sentences:
+            self._get_sentence_times()
+        return self._char_table
+
+    def _get_word_info(self) -> list[dict]:
+        """
+        Returns the word_info, deriving (or loading) it on first use.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list[dict]
+            the word_info
+        """
+        if self._word_info is None:
+            self._assert_level_enabled("word", self._derive_words)
+            if self._word_info_loader is not None:
+                self._word_info = self._word_info_loader()
+            else:
+                self._build_word_info()
+        return self._word_info
+
+    def _get_word_times(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the start and end times of the words, deriving the word_info on first
+        use.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            the start and end times of the words in seconds
+        """
+        if self._word_times is None:
+            self._get_word_info()
+        return self._word_times
+
+    def _get_sentence_info(self) -> list[dict]:
+        """
+        Returns the sentence_info, deriving (or loading) it on first use.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list[dict]
+            the sentence_info
+        """
+        if self._sentence_info is None:
+            self._assert_level_enabled("sentence", self._derive_sentences)
+            if self._sentence_info_loader is not None:
+                self._sentence_info = self._sentence_info_loader()
+            else:
+                self._build_sentence_info()
+        return self._sentence_info
+
+    def _get_sentence_times(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the start and end times of the sentences, deriving the sentence_info on
+        first use.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            the start and end times of the sentences in seconds
+        """
+        if self._sentence_times is None:
+            self._get_sentence_info()
+        return self._sentence_times
+
+    def _assert_level_enabled(self, level: str, is_enabled: bool) -> None:
+        """
+        Raises an error if a derived level of the transcription is disabled.
+
+        Parameters
+        ----------
+        level: str
+            'word' or 'sentence'
+        is_enabled: bool
+            whether the level is enabled
+
+        Returns
+        -------
+        None
+        """
+        if is_enabled is False:
+            err = (
+                "The {0} level of the transcription is disabled. Construct the "
+                "transcription with 'derive_{0}s=True' to use it.".format(level)
+            )
+            logging.error(err)
+            raise TranscriptionError(err)
+
+    def _assert_char_times_searchable(self) -> None:
+        """
+        Raises an error if a character is missing its start or end time, since the
+        characters can't be searched by time then.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        # 二分探索は全ての時刻が数値であることを前提とする。
+        # start_time / end_time が欠損(None)だと探索結果が不定になるため、
+        # 原因の分かるエラーに変換する。
+        if self._missing_time_char_idx is not None:
+            idx = self._missing_time_char_idx
+            char_info = CharInfoView(self._char_table)[idx]
+            err = (
+                "transcript info at index {} has a missing time "
+                "(start_time={}, end_time={}); cannot search by time".format(
+                    idx, char_info["start_time"], char_info["end_time"]
+                )
+            )
+            logging.error(err)
+            raise TranscriptionError(err)
+
     def _find_index(
-        self, transcript_info: list[dict], target_time: float, type_of_time: str
+        self,
+        start_times: np.ndarray,
+        end_times: np.ndarray,
+        target_time: float,
+        type_of_time: str,
     ) -> int:
         """
         Finds the index in some transcript info who's start or end time is closest to
@@ -503,9 +985,12 @@ class Transcription:
 
         Parameters
         ----------
-        transcript_info: list[dict]
-            list of dictionaries where each dictionary contains info about a single
-            character, word, or sentence in the text
+        start_times: np.ndarray
+            the start time of each character, word, or sentence in the text, sorted
+            and without missing times
+        end_times: np.ndarray
+            the end time of each character, word, or sentence in the text, sorted
+            and without missing times
         target_time: float
             The time in seconds to search for.
         type_of_time: str
@@ -518,11 +1003,48 @@ class Transcription:
         Returns
         -------
         int
-            The index that is closest to 'target_time'
+            The index that is closest to 'target_time'. If several intervals contain
+            'target_time' (ex: they touch at 'target_time'), the last one is returned
+            for 'start' and the first one for 'end'.
         """
-        transcript_start = self.start_time
-        transcript_end = self.end_time
-        if (transcript_start <= target_time <= transcript_end) is False:
+        idxs = self._find_indices(start_times, end_times, [target_time], type_of_time)
+        return int(idxs[0])
+
+    def _find_indices(
+        self,
+        start_times: np.ndarray,
+        end_times: np.ndarray,
+        target_times: np.ndarray,
+        type_of_time: str,
+    ) -> np.ndarray:
+        """
+        Finds the index in some transcript info who's start or end time is closest to
+        each of 'target_times' (seconds). See '_find_index'.
+
+        Parameters
+        ----------
+        start_times: np.ndarray
+            the start time of each character, word, or sentence in the text, sorted
+            and without missing times
+        end_times: np.ndarray
+            the end time of each character, word, or sentence in the text, sorted
+            and without missing times
+        target_times: np.ndarray
+            The times in seconds to search for.
+        type_of_time: str
+            'start' or 'end', see '_find_index'.
+
+        Returns
+        -------
+        np.ndarray
+            The index that is closest to each of 'target_times'.
+        """
+        target_times = np.asarray(target_times, dtype=np.float64)
+        is_in_range = (self.start_time <= target_times) & (
+            target_times <= self.end_time
+        )
+        if not is_in_range.all():
+            target_time = target_times[np.flatnonzero(~is_in_range)[0]]
             err = (
                 "target_time '{}' seconds is not within the range of the transcript "
                 "times: {} - {}".format(target_time, self.start_time, self.end_time)
@@ -530,36 +1052,21 @@ class Transcription:
             logging.error(err)
             raise TranscriptionError(err)
 
-        left, right = 0, len(transcript_info) - 1
-        while left <= right:
-            mid = left + (right - left) // 2
-            start_time = transcript_info[mid]["start_time"]
-            end_time = transcript_info[mid]["end_time"]
-
-            # 二分探索は区間が整列・非重複で、かつ時刻が数値であることを前提とする。
-            # start_time / end_time が None だと比較で不透明な TypeError になるため、
-            # 原因の分かるエラーに変換する。
-            if start_time is None or end_time is None:
-                err = (
-                    "transcript info at index {} has a missing time "
-                    "(start_time={}, end_time={}); cannot search by time".format(
-                        mid, start_time, end_time
-                    )
-                )
-                logging.error(err)
-                raise TranscriptionError(err)
-
-            if start_time <= target_time <= end_time:
-                return mid
-            elif target_time > end_time:
-                left = mid + 1
-            elif target_time < start_time:
-                right = mid - 1
-
+        num_intervals = len(start_times)
+        # for target times in a gap, the intervals before 'after' end before them
+        after = np.searchsorted(end_times, target_times, side="left")
         if type_of_time == "start":
-            return left - 1 if left == len(transcript_info) else left
+            # the last interval starting at or before each target time
+            idxs = np.searchsorted(start_times, target_times, side="right") - 1
+            is_within = (idxs >= 0) & (end_times[np.maximum(idxs, 0)] >= target_times)
+            return np.where(is_within, idxs, np.minimum(after, num_intervals - 1))
         else:
-            return right + 1 if right == -1 else right
+            # the first interval ending at or after each target time
+            idxs = after
+            is_within = (idxs < num_intervals) & (
+                start_times[np.minimum(idxs, num_intervals - 1)] <= target_times
+            )
+            return np.where(is_within, idxs, np.maximum(after - 1, 0))
 
     def _init_from_json_file(self, json_file: JSONFile) -> None:
         """
@@ -579,6 +1086,57 @@ class Transcription:
         transcription_data = json_file.read()
         self._init_from_dict(transcription_data)
 
+    def _init_from_binary_file(self, binary_file: File) -> None:
+        """
+        Initializes the transcription object from a file stored with
+        'store_as_binary_file'. The arrays of the file are memory-mapped and the stored
+        word_info and sentence_info are decoded on first use. Levels that weren't
+        stored are disabled.
+
+        Parameters
+        ----------
+        binary_file: File
+            a binary transcription file
+
+        Returns
+        -------
+        None
+        """
+        binary_file.assert_exists()
+        metadata, arrays = read_binary_file(binary_file.path)
+
+        self._created_time = datetime.fromisoformat(metadata["time_created"])
+        self._source_software = metadata["source_software"]
+        self._language = metadata["language"]
+        self._num_speakers = metadata["num_speakers"]
+        self._char_table = CharTable(
+            arrays["text"].tobytes().decode("utf-8"),
+            arrays["start_times"],
+            arrays["end_times"],
+            arrays["speakers"],
+            arrays.get("char_bounds"),
+            arrays["word_indices"],
+            arrays["sentence_indices"],
+        )
+        self._text = self._char_table.text
+        self._end_time = metadata["end_time"]
+        self._missing_time_char_idx = metadata["missing_time_char_idx"]
+        self._derive_words = self._derive_words and "word_text" in arrays
+        if self._derive_words:
+            self._word_times = (arrays["word_start_times"], arrays["word_end_times"])
+            self._word_info_loader = partial(
+                decode_info, arrays, WORD_INFO_KEYS, "word"
+            )
+        self._derive_sentences = self._derive_sentences and "sentence_text" in arrays
+        if self._derive_sentences:
+            self._sentence_times = (
+                arrays["sentence_start_times"],
+                arrays["sentence_end_times"],
+            )
+            self._sentence_info_loader = partial(
+                decode_info, arrays, SENTENCE_INFO_KEYS, "sentence"
+            )
+
     def _init_from_dict(self, transcription: dict) -> None:
         """
         Initializes the transcription object from a dictionary
@@ -609,11 +1167,10 @@ class Transcription:
         self._source_software = transcription["source_software"]
         self._language = transcription["language"]
         self._num_speakers = transcription["num_speakers"]
-        self._char_info = transcription["char_info"]
-        # derived data
+        self._char_table = CharTable.from_char_info(transcription["char_info"])
+        # derived data; the word and sentence levels are derived on first use
         self._build_text()
-        self._build_word_info()
-        self._build_sentence_info()
+        self._build_char_times()
 
     def _assert_valid_transcription_data(self, transcription: dict) -> None:
         """
@@ -671,11 +1228,35 @@ class Transcription:
         str:
             the full text built from the char_info
         """
-        text = ""
-        for char_info in self.get_char_info():
-            text += char_info["char"]
+        self._text = self._char_table.text
 
-        self._text = text
+    def _build_char_times(self) -> None:
+        """
+        Finds the end time of the transcript (the end time of the last character with
+        a time, or its start time if it only has a start time) and the first character
+        missing a time, which makes searching the characters by time impossible.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        table = self._char_table
+        recorded = np.where(
+            np.isnan(table.end_times), table.start_times, table.end_times
+        )
+        has_time = np.flatnonzero(~np.isnan(recorded))
+        if len(has_time) > 0:
+            self._end_time = float(recorded[has_time[-1]])
+
+        missing = np.flatnonzero(
+            np.isnan(table.start_times) | np.isnan(table.end_times)
+        )
+        if len(missing) > 0:
+            self._missing_time_char_idx = int(missing[0])
 
     def _build_word_info(self) -> list[dict]:
         """
@@ -690,7 +1271,9 @@ class Transcription:
         list[dict]:
             the word_info built from the char_info
         """
-        char_info = self.get_char_info()
+        chars = self._char_table.get_chars()
+        start_times, end_times = self._char_table.get_times()
+        word_indices = [0] * len(chars)
 
         # final destination for word_info
         word_info = []
@@ -703,23 +1286,15 @@ class Transcription:
 
         # helper variables
         cur_word_idx = 0
-        prev_char_info = {
-            "char": " ",  # set to space so first char is always a word start
-            "start_time": None,
-            "end_time": None,
-            "speaker": None,
-        }
+        prev_char = " "  # set to space so first char is always a word start
         last_recorded_time = 0
 
-        for i, cur_char_info in enumerate(char_info):
-            cur_char = cur_char_info["char"]
-            prev_char = prev_char_info["char"]
-
+        for i, cur_char in enumerate(chars):
             if self._is_word_start(prev_char, cur_char):
                 cur_word = ""
                 cur_word_start_char_idx = i
-                if cur_char_info["start_time"] is not None:
-                    cur_word_start_time = cur_char_info["start_time"]
+                if start_times[i] is not None:
+                    cur_word_start_time = start_times[i]
                 else:
                     cur_word_start_time = last_recorded_time
 
@@ -742,17 +1317,17 @@ class Transcription:
                 cur_word = ""
 
             # update char info
-            cur_char_info["work_index"] = cur_word_idx
+            word_indices[i] = cur_word_idx
 
             # update word info
-            if cur_char_info["end_time"] is not None:
-                last_recorded_time = cur_char_info["end_time"]
-            elif cur_char_info["start_time"] is not None:
-                last_recorded_time = cur_char_info["start_time"]
+            if end_times[i] is not None:
+                last_recorded_time = end_times[i]
+            elif start_times[i] is not None:
+                last_recorded_time = start_times[i]
 
             cur_word_end_time = last_recorded_time
             cur_word += cur_char
-            prev_char_info = cur_char_info
+            prev_char = cur_char
 
         # last word
         new_word_info = {
@@ -766,8 +1341,31 @@ class Transcription:
             "speaker": None,
         }
         word_info.append(new_word_info)
-        self._char_info = char_info
+        self._char_table.word_indices[:] = word_indices
         self._word_info = word_info
+        self._word_times = self._build_time_arrays(word_info)
+
+    def _build_time_arrays(self, transcript_info: list[dict]) -> tuple:
+        """
+        Builds the arrays of start and end times searched by '_find_index'.
+
+        Parameters
+        ----------
+        transcript_info: list[dict]
+            the word_info or sentence_info
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            the start and end times in seconds, NaN where missing
+        """
+        start_times = np.array(
+            [info["start_time"] for info in transcript_info], dtype=np.float64
+        )
+        end_times = np.array(
+            [info["end_time"] for info in transcript_info], dtype=np.float64
+        )
+        return start_times, end_times
 
     def _is_space(self, char: str) -> bool:
         """
@@ -837,7 +1435,9 @@ class Transcription:
         -------
         None
         """
-        char_info = self.get_char_info()
+        chars = self._char_table.get_chars()
+        start_times, end_times = self._char_table.get_times()
+        sentence_indices = self._char_table.sentence_indices
 
         # 日本語の場合はMeCabを使用、それ以外はNLTKを使用
         if self._language == "ja" and JAPANESE_SPLITTER_AVAILABLE:
@@ -879,33 +1479,34 @@ class Transcription:
         for i, cur_sentence in enumerate(sentences):
             # nltk tokenizer doesn't include spaces in between sentences
             # need increment the char_idx by 1 for each sentence to account for this
-            if char_info[cur_char_idx]["char"] == " ":
-                char_info[cur_char_idx]["sentence_index"] = i
+            if chars[cur_char_idx] == " ":
+                sentence_indices[cur_char_idx] = i
                 cur_char_idx += 1
 
             for j, sentence_char in enumerate(cur_sentence):
-                cur_char_info = char_info[cur_char_idx]
+                # the char info is read before realigning cur_char_idx
+                info_idx = cur_char_idx
                 # realign cur_char_idx with sentence if needed
-                if cur_sentence[j] != cur_char_info["char"]:
+                if cur_sentence[j] != chars[info_idx]:
                     cur_char_idx = self._realign_char_idx_with_sentence(
-                        char_info, cur_char_idx, cur_sentence[j], 3
+                        chars, cur_char_idx, cur_sentence[j], 3
                     )
 
                 # sentence start time and start index
                 if j == 0:
                     cur_sentence_start_char_idx = cur_char_idx
-                    if cur_char_info["start_time"] is not None:
-                        cur_sentence_start_time = cur_char_info["start_time"]
+                    if start_times[info_idx] is not None:
+                        cur_sentence_start_time = start_times[info_idx]
                     else:
                         cur_sentence_start_time = last_recorded_time
 
-                if cur_char_info["end_time"] is not None:
-                    last_recorded_time = cur_char_info["end_time"]
-                elif cur_char_info["start_time"] is not None:
-                    last_recorded_time = cur_char_info["start_time"]
+                if end_times[info_idx] is not None:
+                    last_recorded_time = end_times[info_idx]
+                elif start_times[info_idx] is not None:
+                    last_recorded_time = start_times[info_idx]
 
                 # update char_info
-                cur_char_info["sentence_index"] = i
+                sentence_indices[info_idx] = i
 
                 cur_char_idx += 1
 
@@ -918,46 +1519,46 @@ class Transcription:
             }
             sentence_info.append(new_sentence_info)
 
-        self._char_info = char_info
         self._sentence_info = sentence_info
+        self._sentence_times = self._build_time_arrays(sentence_info)
 
         return sentence_info
 
     def _realign_char_idx_with_sentence(
         self,
-        char_info: list[dict],
+        chars: list[str],
         char_idx: int,
         correct_char: str,
         search_window_size: int,
     ) -> int:
         """
-        Realigns the char_idx so that char_info[char_idx] == correct_char
+        Realigns the char_idx so that chars[char_idx] == correct_char
 
         Parameters
         ----------
-        char_info: list[dict]
-            char_info list
+        chars: list[str]
+            the characters of the char_info
         char_idx: int
             index of character to start searching from
         correct_char: str
-            the character that should be at char_info[char_idx]
+            the character that should be at chars[char_idx]
         search_window_size: int
             the number of characters to search in each direction
 
         Returns
         -------
         correct_char_idx: int or None
-            the char_idx scuh that char_info[char_idx] == correct_char
+            the char_idx scuh that chars[char_idx] == correct_char
         """
         logging.debug(
             "Realigning char_idx '{}' with the correct starting character "
             "'{}' for the sentence.".format(char_idx, correct_char)
         )
 
-        if char_idx < 0 or char_idx >= len(char_info):
+        if char_idx < 0 or char_idx >= len(chars):
             err_msg = (
                 "char_idx must be between 0 and {} (length of char_info), not '{}'"
-                "".format(len(char_info), char_idx)
+                "".format(len(chars), char_idx)
             )
             logging.error(err_msg)
             raise ValueError(err_msg)
@@ -970,7 +1571,7 @@ class Transcription:
 
         for offset in range(1, search_window_size * 2):
             offset *= -1
-            if char_info[char_idx + offset]["char"] == correct_char:
+            if chars[char_idx + offset] == correct_char:
                 return char_idx + offset
 
         # realignment failed
@@ -1044,3 +1645,79 @@ class Transcription:
         None
         """
         return self.text
+
+
+def _rebase_times(times: np.ndarray, start_time: float, duration: float) -> np.ndarray:
+    """
+    Re-bases times so 'start_time' is 0 seconds and clips them to [0, duration].
+    Missing (NaN) times stay missing.
+
+    Parameters
+    ----------
+    times: np.ndarray
+        the times in seconds
+    start_time: float
+        the time in seconds that becomes 0 seconds
+    duration: float
+        the maximum re-based time in seconds
+
+    Returns
+    -------
+    np.ndarray
+        the re-based times
+    """
+    return np.clip(times - start_time, 0.0, duration)
+
+
+def _slice_info(
+    transcript_info: list[dict],
+    text_key: str,
+    chars: list[str],
+    start_char: int,
+    start_time: float,
+    duration: float,
+) -> list[dict]:
+    """
+    Slices word or sentence info to a range of characters: the character indices are
+    offset to the range, the times are re-based and the words or sentences cut by the
+    range are clipped to it.
+
+    Parameters
+    ----------
+    transcript_info: list[dict]
+        the word_info or sentence_info overlapping the range
+    text_key: str
+        the key of the text of the dicts ('word' or 'sentence')
+    chars: list[str]
+        the characters of the range
+    start_char: int
+        the index of the first character of the range
+    start_time: float
+        the start time of the range in seconds
+    duration: float
+        the duration of the range in seconds
+
+    Returns
+    -------
+    list[dict]
+        the sliced word_info or sentence_info
+    """
+    num_chars = len(chars)
+    sliced_info = []
+    for info in transcript_info:
+        info = dict(info)
+        is_clipped = False
+        for key in ("start_char", "end_char"):
+            if info[key] is None:
+                continue
+            char_idx = info[key] - start_char
+            clipped_char_idx = min(max(char_idx, 0), num_chars)
+            is_clipped = is_clipped or clipped_char_idx != char_idx
+            info[key] = clipped_char_idx
+        if is_clipped and None not in (info["start_char"], info["end_char"]):
+            info[text_key] = "".join(chars[info["start_char"] : info["end_char"]])
+        for key in ("start_time", "end_time"):
+            if info[key] is not None:
+                info[key] = min(max(info[key] - start_time, 0.0), duration)
+        sliced_info.append(info)
+    return sliced_info
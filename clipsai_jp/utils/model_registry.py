@@ -0,0 +1,290 @@
+"""
+A process-wide registry of loaded models, so the Transcriber, TextEmbedder,
+PyannoteDiarizer and Resizer instances created for each video share the models loaded
+for previous videos instead of loading them from disk again.
+
+Notes
+-----
+- Models are keyed by (model, device, precision). The classes using the registry pass
+None for the parts of the key that don't apply to their models.
+- The size of a model is an estimate, not a measurement: the estimate its class
+passes to 'ModelRegistry.get', or else the byte size of the parameters and buffers of
+the torch modules it holds. Measuring the growth of the process's memory while a model
+loads would charge it for the allocations of other threads (ex: during 'warmup') and
+misses models loaded to the GPU.
+- The budget is a single byte count. The parameters of a model count against it
+whether they're in RAM or on the GPU, but the registry doesn't look at the free GPU
+memory and doesn't count activations or other working memory of the models.
+- Loading is serialized per key: threads asking for the same model wait for a single
+load, while models with other keys load concurrently (ex: a request for the MediaPipe
+graphs doesn't wait for a Whisper model being loaded by 'warmup').
+- Once the loaded models exceed the registry's byte budget the least recently used
+models are dropped from the registry. Instances still holding a dropped model keep
+working; the model is freed once the last of them is garbage collected.
+"""
+
+# standard library imports
+from collections import OrderedDict
+from collections.abc import Callable
+import logging
+import threading
+
+# 3rd party imports
+import psutil
+import torch
+
+# how many attributes deep 'estimate_model_bytes' looks for torch modules, ex:
+# pipeline -> inference -> model
+_MAX_ATTRIBUTE_DEPTH = 2
+
+
+class ModelRegistry:
+    """
+    A least recently used registry of loaded models with a byte budget.
+    """
+
+    def __init__(self, max_bytes: int = None) -> None:
+        """
+        Initialize ModelRegistry
+
+        Parameters
+        ----------
+        max_bytes: int
+            The maximum number of bytes the loaded models may use, by their estimated
+            sizes (see 'ModelRegistry.get'). Default is None (half of the RAM of the
+            machine).
+
+        Returns
+        -------
+        None
+        """
+        if max_bytes is None:
+            max_bytes = psutil.virtual_memory().total // 2
+        self._max_bytes = max_bytes
+        # key -> (model, bytes)
+        self._models: OrderedDict = OrderedDict()
+        self._num_bytes = 0
+        # guards '_models' and '_load_locks'; the lock of each key serializes the
+        # (slow) loading of that model only
+        self._lock = threading.Lock()
+        self._load_locks: dict[tuple, threading.Lock] = {}
+
+    @property
+    def max_bytes(self) -> int:
+        """
+        The maximum number of bytes the loaded models may use.
+        """
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int) -> None:
+        """
+        Sets the byte budget and evicts models to stay within it.
+        """
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    @property
+    def num_bytes(self) -> int:
+        """
+        The estimated number of bytes the loaded models use.
+        """
+        return self._num_bytes
+
+    def __len__(self) -> int:
+        """
+        The number of loaded models.
+        """
+        return len(self._models)
+
+    def __contains__(self, key: tuple) -> bool:
+        """
+        Whether the model with the (model, device, precision) key is loaded.
+        """
+        return key in self._models
+
+    def get(self, key: tuple, loader: Callable, num_bytes: int = None):
+        """
+        Returns the loaded model with the key, loading it if it isn't loaded yet.
+
+        Parameters
+        ----------
+        key: tuple
+            The (model, device, precision) key of the model.
+        loader: Callable
+            Called without arguments to load the model if it isn't loaded yet.
+        num_bytes: int
+            The estimated size of the model in bytes, for models that don't hold their
+            weights in torch modules (ex: CTranslate2 or MediaPipe models). Default is
+            None (estimated with 'estimate_model_bytes').
+
+        Returns
+        -------
+        Any
+            The loaded model.
+        """
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # loaded by another thread while waiting
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+
+            logging.debug("Loading model {}".format(key))
+            model = loader()
+            if num_bytes is None:
+                num_bytes = estimate_model_bytes(model)
+                if num_bytes == 0:
+                    logging.warning(
+                        "Can't estimate the size of model {}; it's never evicted "
+                        "to make room for other models.".format(key)
+                    )
+            logging.debug("Loaded model {} ({} bytes)".format(key, num_bytes))
+
+            with self._lock:
+                self._models[key] = (model, num_bytes)
+                self._num_bytes += num_bytes
+                self._evict()
+        return model
+
+    def warmup(self, loaders: list[Callable]) -> threading.Thread:
+        """
+        Loads models in a background thread, ex: at the start of a service so the
+        first request doesn't wait for them.
+
+        Parameters
+        ----------
+        loaders: list[Callable]
+            Called one after the other without arguments. Typically constructors of
+            the classes using the registry, ex: 'lambda: Resizer()', or their model
+            loading methods, ex: 'lambda: Transcriber(model_size="small").load_model()'.
+            Exceptions are logged and don't stop the remaining loaders.
+
+        Returns
+        -------
+        threading.Thread
+            The background thread. Join it to wait for the models to be loaded.
+        """
+
+        def warmup_models() -> None:
+            for loader in loaders:
+                try:
+                    loader()
+                except Exception as e:
+                    logging.error("Failed to warm up model: {}".format(e))
+
+        thread = threading.Thread(target=warmup_models, daemon=True)
+        thread.start()
+        return thread
+
+    def evict(self, key: tuple) -> bool:
+        """
+        Drops a model from the registry.
+
+        Parameters
+        ----------
+        key: tuple
+            The (model, device, precision) key of the model.
+
+        Returns
+        -------
+        bool
+            Whether the model was loaded.
+        """
+        with self._lock:
+            if key not in self._models:
+                return False
+            _, num_bytes = self._models.pop(key)
+            self._num_bytes -= num_bytes
+            return True
+
+    def clear(self) -> None:
+        """
+        Drops every model from the registry.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._models.clear()
+            self._num_bytes = 0
+
+    def _evict(self) -> None:
+        """
+        Drops the least recently used models until the loaded models are within the
+        byte budget. The most recently used model is never dropped. Must be called
+        with '_lock' held.
+
+        Returns
+        -------
+        None
+        """
+        while self._num_bytes > self._max_bytes and len(self._models) > 1:
+            key, (_, num_bytes) = self._models.popitem(last=False)
+            self._num_bytes -= num_bytes
+            logging.debug("Evicted model {} ({} bytes)".format(key, num_bytes))
+
+
+def estimate_model_bytes(model) -> int:
+    """
+    Estimates the size of a model as the byte size of the parameters and buffers of the
+    torch modules it is or holds (in its attributes, up to '_MAX_ATTRIBUTE_DEPTH'
+    attributes deep). Tensors shared by several modules are counted once.
+
+    Parameters
+    ----------
+    model: Any
+        The loaded model.
+
+    Returns
+    -------
+    int
+        The estimated size in bytes, 0 if the model holds no torch modules.
+    """
+    modules = {}
+
+    def find_modules(obj, depth: int) -> None:
+        if isinstance(obj, torch.nn.Module):
+            modules[id(obj)] = obj
+        elif depth < _MAX_ATTRIBUTE_DEPTH and hasattr(obj, "__dict__"):
+            for value in vars(obj).values():
+                find_modules(value, depth + 1)
+
+    find_modules(model, 0)
+    tensors = {}
+    for module in modules.values():
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            tensors[tensor.data_ptr()] = tensor.numel() * tensor.element_size()
+    return sum(tensors.values())
+
+
+_model_registry = None
+_model_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Returns the registry of loaded models shared by the whole process.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    ModelRegistry
+        The registry of the process.
+    """
+    global _model_registry
+    with _model_registry_lock:
+        if _model_registry is None:
+            _model_registry = ModelRegistry()
+        return _model_registry
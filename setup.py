@@ -39,7 +39,7 @@ setup(
         # 音声/動画処理
         "av>=11.0.0,<17.0.0",
         "opencv-python>=4.5.0,<5.0.0",
-        "scenedetect>=0.6.5,<0.8.0",
+        "scenedetect>=0.7,<0.8.0",
         
         # 機械学習（必須）
         "sentence-transformers>=3.0.0,<6.0.0",
@@ -0,0 +1,67 @@
+# standard library imports
+import os
+from unittest.mock import patch
+
+# local package imports
+from clipsai_jp.media.audio_file import AudioFile
+
+# third party imports
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    audio_file_path = tmp_path / "audio.mp3"
+    audio_file_path.write_bytes(b"audio")
+    # skip probing the placeholder file
+    audio_file = AudioFile.__new__(AudioFile)
+    audio_file._path = str(audio_file_path)
+    return audio_file
+
+
+def test_get_decoded_audio_is_cached(audio_file, tmp_path):
+    samples = np.linspace(-1, 1, 1600, dtype=np.float32)
+    with patch.object(
+        AudioFile, "decode_audio", return_value=samples
+    ) as mock_decode_audio:
+        decoded_audio = audio_file.get_decoded_audio(cache_dir=str(tmp_path))
+        cached_audio = audio_file.get_decoded_audio(cache_dir=str(tmp_path))
+
+    mock_decode_audio.assert_called_once_with(16000)
+    assert isinstance(cached_audio, np.memmap)
+    np.testing.assert_array_equal(decoded_audio, samples)
+    np.testing.assert_array_equal(cached_audio, samples)
+
+
+def test_get_decoded_audio_is_not_cached_by_default(audio_file, tmp_path):
+    samples = np.zeros(1600, dtype=np.float32)
+    with patch.object(AudioFile, "decode_audio", return_value=samples):
+        decoded_audio = audio_file.get_decoded_audio()
+    assert decoded_audio is samples
+    # nothing is written next to the file
+    assert os.listdir(tmp_path) == ["audio.mp3"]
+
+
+def test_decoded_audio_file_path_changes_with_file(audio_file, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    decoded_audio_file_path = audio_file.get_decoded_audio_file_path(16000, cache_dir)
+    assert os.path.dirname(decoded_audio_file_path) == cache_dir
+    assert decoded_audio_file_path != audio_file.get_decoded_audio_file_path(
+        8000, cache_dir
+    )
+
+    with open(audio_file.path, "ab") as f:
+        f.write(b"more audio")
+    assert decoded_audio_file_path != audio_file.get_decoded_audio_file_path(
+        16000, cache_dir
+    )
+
+
+def test_get_decoded_audio_without_write_access(audio_file, tmp_path):
+    samples = np.zeros(1600, dtype=np.float32)
+    with patch.object(AudioFile, "decode_audio", return_value=samples):
+        decoded_audio = audio_file.get_decoded_audio(
+            cache_dir=str(tmp_path / "missing_dir")
+        )
+    assert decoded_audio is samples
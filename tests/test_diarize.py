@@ -2,9 +2,18 @@
 from unittest.mock import patch, Mock
 
 # local package imports
-from clipsai_jp.diarize.pyannote import PyannoteDiarizer
+from clipsai_jp.diarize.exceptions import DiarizeError
+from clipsai_jp.diarize.pyannote import (
+    BYTES_PER_SEC,
+    BYTES_PER_SEC_SQUARED,
+    FIXED_BYTES,
+    PyannoteDiarizer,
+    _calc_max_chunk_duration,
+    _link_speakers,
+)
 
 # third party imports
+import numpy as np
 import pandas as pd
 from pyannote.core import Segment, Annotation
 import pytest
@@ -23,6 +32,7 @@ def mock_audio_file():
     mock_audio_file = Mock()
     mock_audio_file.path.return_value = "mock_audio.mp3"
     mock_audio_file.get_duration.return_value = 30.0
+    mock_audio_file.decode_audio.return_value = np.zeros(30 * 16000, dtype=np.float32)
     return mock_audio_file
 
 
@@ -133,3 +143,103 @@ def test_diarize(mock_diarizer, mock_audio_file, annotation_data, expected_outpu
     output_segments = mock_diarizer.diarize(mock_audio_file)
 
     assert output_segments == expected_output
+
+
+def test_diarize_passes_waveform_in_memory(mock_diarizer, mock_audio_file):
+    mock_diarizer.pipeline.return_value = Annotation()
+    mock_diarizer.diarize(mock_audio_file)
+
+    mock_audio_file.decode_audio.assert_called_once_with(16000)
+    mock_audio_file.extract_audio.assert_not_called()
+    pipeline_input = mock_diarizer.pipeline.call_args.args[0]
+    assert pipeline_input["sample_rate"] == 16000
+    assert tuple(pipeline_input["waveform"].shape) == (1, 30 * 16000)
+
+
+def test_diarize_uses_given_waveform(mock_diarizer, mock_audio_file, tmp_path):
+    np.save(tmp_path / "audio.npy", np.zeros(30 * 16000, dtype=np.float32))
+    waveform = np.load(tmp_path / "audio.npy", mmap_mode="r")
+    mock_diarizer.pipeline.return_value = Annotation()
+    mock_diarizer.diarize(mock_audio_file, waveform=waveform)
+
+    mock_audio_file.decode_audio.assert_not_called()
+    pipeline_input = mock_diarizer.pipeline.call_args.args[0]
+    assert tuple(pipeline_input["waveform"].shape) == (1, 30 * 16000)
+
+
+def test_diarize_in_chunks_links_speakers_across_windows(
+    mock_diarizer, mock_audio_file
+):
+    # speaker A talks from 0 to 15 seconds and speaker B from 15 to 30 seconds, but
+    # their local labels are swapped in every other window
+    embeddings = {"A": np.array([1.0, 0.1]), "B": np.array([0.1, 1.0])}
+    windows = []
+
+    def pipeline(file, return_embeddings=False):
+        start = len(windows) * 6.0
+        labels = ("SPEAKER_00", "SPEAKER_01")
+        if len(windows) % 2 == 1:
+            labels = labels[::-1]
+        windows.append(file["waveform"].shape[1] / 16000)
+        annotation = Annotation()
+        speakers = {}
+        for speaker, label, (seg_start, seg_end) in zip(
+            "AB", labels, [(0, 15), (15, 30)]
+        ):
+            seg_start, seg_end = max(seg_start - start, 0), min(seg_end - start, 12)
+            if seg_end > seg_start:
+                annotation[Segment(seg_start, seg_end)] = label
+                speakers[label] = speaker
+        centroids = np.stack(
+            [embeddings[speakers[label]] for label in annotation.labels()]
+        )
+        return annotation, centroids
+
+    mock_diarizer.pipeline.side_effect = pipeline
+    with patch(
+        "clipsai_jp.diarize.pyannote._calc_max_chunk_duration", return_value=12.0
+    ):
+        output_segments = mock_diarizer.diarize(
+            mock_audio_file, max_memory_bytes=1, chunk_overlap=4.0
+        )
+
+    assert windows == [12.0, 12.0, 12.0, 12.0]
+    assert output_segments == [
+        {"speakers": [0], "start_time": 0.0, "end_time": 15.0},
+        {"speakers": [1], "start_time": 15.0, "end_time": 30.0},
+    ]
+
+
+def test_diarize_in_chunks_skipped_when_audio_fits_budget(
+    mock_diarizer, mock_audio_file
+):
+    mock_diarizer.pipeline.return_value = Annotation()
+    mock_diarizer.diarize(mock_audio_file, max_memory_bytes=2**32)
+
+    mock_diarizer.pipeline.assert_called_once()
+    assert "return_embeddings" not in mock_diarizer.pipeline.call_args.kwargs
+
+
+def test_diarize_memory_budget_too_small(mock_diarizer, mock_audio_file):
+    with pytest.raises(DiarizeError):
+        mock_diarizer.diarize(mock_audio_file, max_memory_bytes=2**20)
+    mock_diarizer.pipeline.assert_not_called()
+
+
+def test_calc_max_chunk_duration():
+    assert _calc_max_chunk_duration(2**20) == 0
+    # the quadratic memory model is within budget at the returned duration
+    for max_memory_bytes in [2**30, 2**33, 2**34]:
+        duration = _calc_max_chunk_duration(max_memory_bytes)
+        num_bytes = (
+            FIXED_BYTES + BYTES_PER_SEC * duration + BYTES_PER_SEC_SQUARED * duration**2
+        )
+        assert num_bytes == pytest.approx(max_memory_bytes)
+    assert _calc_max_chunk_duration(2**34) > 3600
+
+
+def test_link_speakers():
+    centroids = [np.array([1.0, 0.0]), np.array([0.0, 1.0])]
+    embeddings = np.array([[0.0, 2.0], [-1.0, 0.0], [0.9, 0.1], [0.0, 0.0]])
+    assert _link_speakers(embeddings, centroids) == [1, 2, 0, 3]
+    assert _link_speakers(embeddings[:2], []) == [0, 1]
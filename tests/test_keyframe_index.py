@@ -0,0 +1,226 @@
+# standard library imports
+from fractions import Fraction
+import os
+from unittest.mock import MagicMock, patch
+
+# local package imports
+from clipsai_jp.media.editor import MediaEditor
+from clipsai_jp.media.keyframe_index import KeyframeIndex
+from clipsai_jp.media.video_file import VideoFile
+
+# third party imports
+import av
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def keyframe_index():
+    # keyframes every 2 seconds in a 1/1000 time base
+    return KeyframeIndex(
+        keyframe_pts=np.arange(0, 10000, 2000, dtype=np.int64),
+        time_base=Fraction(1, 1000),
+        frame_count=300,
+    )
+
+
+@pytest.mark.parametrize(
+    "pts, expected",
+    [(0, 0), (1999, 0), (2000, 2000), (9999, 8000), (-5, 0)],
+)
+def test_keyframe_pts_before(keyframe_index, pts, expected):
+    assert keyframe_index.keyframe_pts_before(pts) == expected
+
+
+@pytest.mark.parametrize(
+    "sec, expected",
+    [(0.0, 0.0), (3.5, 2.0), (4.0, 4.0), (20.0, 8.0)],
+)
+def test_keyframe_sec_before(keyframe_index, sec, expected):
+    assert keyframe_index.keyframe_sec_before(sec) == expected
+
+
+@pytest.mark.parametrize(
+    "sec, expected",
+    [(0.0, True), (2.0, True), (2.0005, True), (2.01, False), (3.0, False)],
+)
+def test_is_keyframe_sec(keyframe_index, sec, expected):
+    assert keyframe_index.is_keyframe_sec(sec) is expected
+
+
+def test_save_and_load(keyframe_index, tmp_path):
+    video_file_path = str(tmp_path / "video.mp4")
+    with open(video_file_path, "wb") as f:
+        f.write(b"video")
+    index_file_path = KeyframeIndex.get_index_file_path(video_file_path, str(tmp_path))
+
+    keyframe_index.save(index_file_path, video_file_path)
+    loaded = KeyframeIndex.load(index_file_path, video_file_path)
+
+    assert loaded is not None
+    assert np.array_equal(loaded.keyframe_pts, keyframe_index.keyframe_pts)
+    assert loaded.time_base == keyframe_index.time_base
+    assert loaded.frame_count == keyframe_index.frame_count
+
+
+def test_load_stale_index(keyframe_index, tmp_path):
+    video_file_path = str(tmp_path / "video.mp4")
+    with open(video_file_path, "wb") as f:
+        f.write(b"video")
+    index_file_path = KeyframeIndex.get_index_file_path(video_file_path, str(tmp_path))
+    keyframe_index.save(index_file_path, video_file_path)
+
+    # the video changed after the index was built
+    with open(video_file_path, "ab") as f:
+        f.write(b"more video")
+    os.utime(video_file_path, ns=(0, 0))
+
+    assert KeyframeIndex.load(index_file_path, video_file_path) is None
+
+
+@pytest.fixture
+def offset_video_file_path(tmp_path):
+    # MPEG-TS of 1.2 s whose first frame is at 1.4 s, with a keyframe every few frames
+    video_file_path = str(tmp_path / "offset.ts")
+    rng = np.random.default_rng(0)
+    with av.open(video_file_path, "w") as container:
+        stream = container.add_stream("libx264", rate=10)
+        stream.width = 32
+        stream.height = 32
+        stream.pix_fmt = "yuv420p"
+        stream.codec_context.gop_size = 4
+        for i in range(12):
+            frame = av.VideoFrame.from_ndarray(
+                rng.integers(0, 255, (32, 32, 3), dtype=np.uint8), format="rgb24"
+            )
+            frame.pts = 14 + i
+            frame.time_base = Fraction(1, 10)
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return video_file_path
+
+
+def test_keyframe_secs_count_from_file_start(offset_video_file_path, tmp_path):
+    keyframe_index = KeyframeIndex.build(offset_video_file_path)
+
+    keyframe_secs = keyframe_index.keyframe_secs
+    assert float(keyframe_index.start_pts * keyframe_index.time_base) == 1.4
+    assert keyframe_secs[0] == 0
+    assert len(keyframe_secs) > 1
+    assert keyframe_index.keyframe_sec_before(keyframe_secs[1] + 0.05) == (
+        pytest.approx(keyframe_secs[1])
+    )
+    assert keyframe_index.is_keyframe_sec(keyframe_secs[1])
+    # the raw time of the first keyframe is past the end of the file
+    assert not keyframe_index.is_keyframe_sec(1.4)
+
+    # the start is persisted with the index
+    index_file_path = str(tmp_path / "offset.kfidx.npy")
+    keyframe_index.save(index_file_path, offset_video_file_path)
+    loaded = KeyframeIndex.load(index_file_path, offset_video_file_path)
+    assert loaded.start_pts == keyframe_index.start_pts
+
+
+@pytest.mark.parametrize(
+    "keyframe_secs, start_time, expected_seeks",
+    [
+        # input seek to the preceding keyframe, output seek by the remainder
+        ([0.0, 2.0, 4.0], 3.0, ["2.0", "1.0"]),
+        # the first keyframe comes after the start -> never seek past the start
+        ([1.5, 2.0], 1.0, ["1.0", "0.0"]),
+    ],
+)
+def test_crop_video_seeks_to_preceding_keyframe(
+    keyframe_secs, start_time, expected_seeks
+):
+    keyframe_index = KeyframeIndex(
+        keyframe_pts=np.array(keyframe_secs) * 1000,
+        time_base=Fraction(1, 1000),
+        frame_count=100,
+    )
+    video_file = MagicMock(spec=VideoFile)
+    video_file.path = "video.mp4"
+    video_file.get_keyframe_index.return_value = keyframe_index
+    editor = MediaEditor()
+    file_system_manager = editor._file_system_manager
+    with patch.object(editor, "assert_valid_media_file"), patch.object(
+        file_system_manager, "assert_parent_dir_exists"
+    ), patch.object(file_system_manager, "assert_paths_not_equal"), patch.object(
+        editor, "_assert_valid_trim_times"
+    ), patch.object(
+        editor, "_create_media_file_of_same_type"
+    ), patch(
+        "clipsai_jp.media.editor.subprocess.run"
+    ) as mock_run:
+        mock_run.return_value.returncode = 0
+        editor.crop_video(
+            video_file, "cropped.mp4", 0, 0, 10, 10, start_time, start_time + 1
+        )
+
+    command = mock_run.call_args.args[0]
+    seeks = [command[i + 1] for i, arg in enumerate(command) if arg == "-ss"]
+    assert seeks == expected_seeks
+
+
+def test_load_or_build_only_persists_to_cache_dir(offset_video_file_path, tmp_path):
+    video_dir = os.path.dirname(offset_video_file_path)
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+
+    # nothing is written next to the video by default
+    KeyframeIndex.load_or_build(offset_video_file_path)
+    assert sorted(os.listdir(video_dir)) == ["cache", "offset.ts"]
+
+    built = KeyframeIndex.load_or_build(offset_video_file_path, str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 1
+    with patch.object(KeyframeIndex, "build") as mock_build:
+        loaded = KeyframeIndex.load_or_build(offset_video_file_path, str(cache_dir))
+    mock_build.assert_not_called()
+    assert np.array_equal(loaded.keyframe_pts, built.keyframe_pts)
+
+
+def _run_trim(keyframe_index, start_time, **kwargs):
+    """
+    Runs MediaEditor.trim on a mock video and returns the ffmpeg command.
+    """
+    video_file = MagicMock(spec=VideoFile)
+    video_file.path = "video.mp4"
+    video_file.get_keyframe_index.return_value = keyframe_index
+    editor = MediaEditor()
+    file_system_manager = editor._file_system_manager
+    with patch.object(editor, "assert_valid_media_file"), patch.object(
+        file_system_manager, "assert_parent_dir_exists"
+    ), patch.object(file_system_manager, "assert_paths_not_equal"), patch.object(
+        editor, "_assert_valid_trim_times"
+    ), patch.object(
+        editor,
+        "_create_media_file_of_same_type",
+        return_value=MagicMock(spec=VideoFile),
+    ), patch(
+        "clipsai_jp.media.editor.subprocess.run"
+    ) as mock_run:
+        mock_run.return_value.returncode = 0
+        editor.trim(video_file, start_time, start_time + 1, "trimmed.mp4", **kwargs)
+    return mock_run.call_args.args[0], video_file
+
+
+@pytest.mark.parametrize("start_time", [2.0, 3.0])
+def test_copy_trim_without_opt_in_ignores_keyframe_index(keyframe_index, start_time):
+    command, video_file = _run_trim(keyframe_index, start_time, video_codec="copy")
+
+    video_file.get_keyframe_index.assert_not_called()
+    # output seeking, as for every copy trim
+    assert command.index("-ss") > command.index("-i")
+
+
+@pytest.mark.parametrize("start_time, is_copied", [(2.0, True), (3.0, False)])
+def test_trim_copies_keyframe_aligned_start(keyframe_index, start_time, is_copied):
+    command, _ = _run_trim(keyframe_index, start_time, copy_if_keyframe_aligned=True)
+
+    video_codec = command[command.index("-c:v") + 1]
+    assert video_codec == ("copy" if is_copied else "libx264")
+    # input seeking is exact on a keyframe and fast when re-encoding
+    assert command.index("-ss") < command.index("-i")
+    assert command.count("-ss") == 1
@@ -0,0 +1,117 @@
+# standard library imports
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# local package imports
+from clipsai_jp.utils.model_registry import (
+    ModelRegistry,
+    estimate_model_bytes,
+    get_model_registry,
+)
+
+# third party imports
+import torch
+
+
+def test_model_registry_shares_loaded_models():
+    registry = ModelRegistry(max_bytes=1000)
+    loader = MagicMock(return_value="small model")
+    assert registry.get(("small", "cpu", "int8"), loader, 100) == "small model"
+    assert registry.get(("small", "cpu", "int8"), loader, 100) == "small model"
+    loader.assert_called_once()
+    assert registry.num_bytes == 100
+
+    # another device or precision is another model
+    registry.get(("small", "cuda", "int8"), MagicMock(return_value="cuda model"), 100)
+    assert len(registry) == 2
+    assert registry.num_bytes == 200
+
+
+def test_model_registry_evicts_least_recently_used():
+    registry = ModelRegistry(max_bytes=250)
+    for name in ["a", "b"]:
+        registry.get((name, None, None), MagicMock(return_value=name), 100)
+    # use 'a' so 'b' is evicted next
+    registry.get(("a", None, None), MagicMock(return_value="a"), 100)
+    registry.get(("c", None, None), MagicMock(return_value="c"), 100)
+
+    assert ("a", None, None) in registry
+    assert ("b", None, None) not in registry
+    assert ("c", None, None) in registry
+    assert registry.num_bytes == 200
+
+    # the most recently used model is kept even if it alone exceeds the budget
+    registry.max_bytes = 50
+    assert len(registry) == 1
+    assert ("c", None, None) in registry
+
+    assert registry.evict(("c", None, None))
+    assert not registry.evict(("c", None, None))
+    assert registry.num_bytes == 0
+
+
+def test_model_registry_estimates_torch_model_bytes():
+    registry = ModelRegistry(max_bytes=10**6)
+    model = torch.nn.Linear(10, 20)
+    registry.get(("linear", "cpu", None), lambda: model)
+
+    # 10 * 20 weights + 20 biases of 4 bytes, wherever the model was loaded to
+    assert registry.num_bytes == 880
+
+    # modules held in attributes of a pipeline are found, shared ones counted once
+    pipeline = SimpleNamespace(
+        segmentation=SimpleNamespace(model=model), embedding=model
+    )
+    assert estimate_model_bytes(pipeline) == 880
+    assert estimate_model_bytes("not a model") == 0
+
+
+def test_model_registry_loads_other_keys_concurrently():
+    registry = ModelRegistry(max_bytes=1000)
+    is_loading = threading.Event()
+    can_finish = threading.Event()
+
+    def slow_loader():
+        is_loading.set()
+        assert can_finish.wait(timeout=10)
+        return "large model"
+
+    thread = threading.Thread(
+        target=registry.get, args=(("large", None, None), slow_loader, 100)
+    )
+    thread.start()
+    assert is_loading.wait(timeout=10)
+
+    # another model doesn't wait for the slow load
+    assert registry.get(("small", None, None), lambda: "small model", 100) == (
+        "small model"
+    )
+    assert ("large", None, None) not in registry
+
+    can_finish.set()
+    thread.join()
+    # the same model isn't loaded twice
+    loader = MagicMock()
+    assert registry.get(("large", None, None), loader, 100) == "large model"
+    loader.assert_not_called()
+
+
+def test_model_registry_warmup():
+    registry = ModelRegistry(max_bytes=1000)
+    failing_loader = MagicMock(side_effect=RuntimeError("no such model"))
+    thread = registry.warmup(
+        [
+            failing_loader,
+            lambda: registry.get(("a", None, None), MagicMock(return_value="a"), 100),
+        ]
+    )
+    assert isinstance(thread, threading.Thread)
+    thread.join()
+
+    failing_loader.assert_called_once()
+    assert ("a", None, None) in registry
+
+
+def test_get_model_registry_is_process_wide():
+    assert get_model_registry() is get_model_registry()
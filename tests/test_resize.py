@@ -1,13 +1,49 @@
 # standard library imports
+import os
+import pickle
+import sys
+import threading
+import time
 from unittest.mock import patch, MagicMock
 
 # local package imports
+from clipsai_jp.media.audiovideo_file import AudioVideoFile
 from clipsai_jp.media.video_file import VideoFile
-from clipsai_jp.resize.resizer import Resizer
+from clipsai_jp.resize.artifact_cache import ArtifactCache
+from clipsai_jp.resize.exceptions import ResizerError, VideoProcessingError
+from clipsai_jp.resize.face_track import calc_iou, link_face_tracks
+from clipsai_jp.resize.frame_cache import FrameCache
+from clipsai_jp.resize.frame_pool import FramePool
+from clipsai_jp.resize import resizer as resizer_module
+from clipsai_jp.resize.resizer import (
+    Resizer,
+    _calc_sample_bounds,
+    _stratified_sample_frames,
+)
 from clipsai_jp.resize.rect import Rect
+from clipsai_jp.resize.resize import (
+    _run_stages,
+    _split_cpu_budget,
+    calc_crops_from_roi_file,
+    resize_to_aspect_ratios,
+)
+from clipsai_jp.resize.rois import Rois
+from clipsai_jp.resize.seg_proc import (
+    bitmask_to_speakers,
+    merge_scene_changes,
+    segments_to_array,
+    speakers_to_bitmask,
+)
+from clipsai_jp.resize.vid_proc import (
+    _decode_frames_sequentially,
+    _SceneCutDetector,
+    detect_scenes,
+)
 
 # third party imports
+import numpy as np
 import pytest
+import torch
 
 
 @pytest.mark.parametrize(
@@ -183,6 +219,68 @@ def test_calc_n_batches(
         assert n_batches == expected_batches
 
 
+@pytest.mark.parametrize(
+    "width, height, face_detect_width, expected",
+    [
+        # downscaled to the face detection width
+        (1920, 1080, 960, (960, 540)),
+        (3840, 2160, 960, (960, 540)),
+        # never upscaled
+        (640, 480, 960, (640, 480)),
+        (960, 540, 960, (960, 540)),
+    ],
+)
+def test_calc_face_detect_dims(width, height, face_detect_width, expected):
+    mock_video_file = MagicMock(spec=VideoFile)
+    mock_video_file.get_width_pixels.return_value = width
+    mock_video_file.get_height_pixels.return_value = height
+
+    resizer = Resizer()
+    dims = resizer._calc_face_detect_dims(mock_video_file, face_detect_width)
+    assert dims == expected
+
+
+@pytest.mark.parametrize("n_workers", [0, -1])
+def test_resize_invalid_n_workers(n_workers):
+    resizer = Resizer()
+    with pytest.raises(ResizerError):
+        resizer.resize(MagicMock(spec=VideoFile), [], [], n_workers=n_workers)
+
+
+def test_resizer_invalid_face_grouping():
+    with pytest.raises(ResizerError):
+        Resizer(face_grouping="dbscan")
+
+
+def test_calc_iou():
+    boxes = np.array([[0, 0, 10, 10], [100, 100, 110, 110]])
+    other_boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [0, 0, 0, 0]])
+    ious = calc_iou(boxes, other_boxes)
+    np.testing.assert_allclose(ious, [[1, 1 / 3, 0], [0, 0, 0]])
+
+
+def test_link_face_tracks():
+    left = np.array([100, 100, 200, 200])
+    right = np.array([800, 100, 900, 200])
+    face_detections = [
+        np.stack([left, right]),
+        None,
+        # detected in the opposite order and jittered
+        np.stack([right + 30, left - 5]),
+        np.stack([left + 20]),
+        # a third person joins
+        np.stack([right, left, np.array([450, 400, 550, 500])]),
+    ]
+    tracks = link_face_tracks(face_detections)
+    assert [[box["frame"] for box in track] for track in tracks] == [
+        [0, 2, 3, 4],
+        [0, 2, 4],
+        [4],
+    ]
+    assert all(box["bounding_box"][0] < 400 for box in tracks[0])
+    assert all(box["bounding_box"][0] > 600 for box in tracks[1])
+
+
 @pytest.mark.parametrize(
     "roi, resize_width, resize_height, expected_crop",
     [
@@ -264,10 +362,741 @@ def test_calc_crop(roi, resize_width, resize_height, expected_crop):
     ],
 )
 def test_merge_identical_segments(segments, expected):
+    resizer = Resizer()
+    merged_segments = resizer._merge_identical_segments(
+        segments_to_array(segments), 1000, 1000
+    )
+    assert [
+        {"x": x, "y": y, "start_time": start_time, "end_time": end_time}
+        for x, y, start_time, end_time in zip(
+            merged_segments["x"].tolist(),
+            merged_segments["y"].tolist(),
+            merged_segments["start_time"].tolist(),
+            merged_segments["end_time"].tolist(),
+        )
+    ] == expected
+
+
+@pytest.mark.parametrize(
+    "scene_changes, expected_times",
+    [
+        # unsorted scene changes
+        ([8, 3], [(0, 3), (3, 5), (5, 8), (8, 10)]),
+        # scene changes after the last segment are ignored
+        ([3, 12, 15], [(0, 3), (3, 5), (5, 10)]),
+        # several scene changes within one segment
+        ([1, 2, 3], [(0, 1), (1, 2), (2, 3), (3, 5), (5, 10)]),
+    ],
+)
+def test_merge_scene_changes(scene_changes, expected_times):
+    segments = segments_to_array(
+        [
+            {"speakers": [0], "start_time": 0, "end_time": 5},
+            {"speakers": [1], "start_time": 5, "end_time": 10},
+        ]
+    )
+    merged = merge_scene_changes(segments, scene_changes, 0.25)
+    assert list(zip(merged["start_time"], merged["end_time"])) == expected_times
+
+
+@pytest.mark.parametrize("speakers", [[], [0], [1, 3], [0, 63]])
+def test_speakers_bitmask_round_trip(speakers):
+    assert bitmask_to_speakers(speakers_to_bitmask(speakers)) == speakers
+
+
+@pytest.mark.parametrize("speakers", [[-1], [64]])
+def test_speakers_to_bitmask_invalid_speaker(speakers):
+    with pytest.raises(ResizerError):
+        speakers_to_bitmask(speakers)
+
+
+class _FakeFrame:
+    def __init__(self, pts: int) -> None:
+        self.pts = pts
+
+
+class _FakeContainer:
+    """
+    Container with a keyframe every 'gop' pts and one frame per pts.
+    """
+
+    def __init__(self, num_frames: int, gop: int) -> None:
+        self._num_frames = num_frames
+        self._gop = gop
+        self._start = 0
+        self.seeks = []
+
+    def seek(self, pts: int, stream=None) -> None:
+        self.seeks.append(pts)
+        self._start = (pts // self._gop) * self._gop
+
+    def decode(self, stream=None):
+        for pts in range(self._start, self._num_frames):
+            yield _FakeFrame(pts)
+
+
+@pytest.mark.parametrize(
+    "extract_pts, seek_threshold_pts, expected_seeks",
+    [
+        # sorted, close together -> a single seek
+        ([5, 6, 8], 20, [5]),
+        # unsorted with duplicates -> original order is preserved
+        ([8, 5, 8, 6], 20, [5]),
+        # large gap -> seek forward instead of decoding
+        ([5, 90], 20, [5, 90]),
+        # gap larger than the threshold but keyframe is behind -> no repeated seek
+        ([5, 38], 1, [5, 38]),
+    ],
+)
+def test_decode_frames_sequentially(extract_pts, seek_threshold_pts, expected_seeks):
+    container = _FakeContainer(num_frames=100, gop=10)
+    frames = _decode_frames_sequentially(
+        container, None, extract_pts, seek_threshold_pts
+    )
+    assert [frame.pts for frame in frames] == extract_pts
+    assert container.seeks == expected_seeks
+
+
+@pytest.mark.parametrize(
+    "extract_pts, expected_seeks",
+    [
+        # no keyframe between the targets -> keep decoding
+        ([5, 9], [5]),
+        # keyframe between the targets -> seek even though the gap is small
+        ([5, 12], [5, 12]),
+        # targets within one GOP far apart -> keep decoding
+        ([0, 9], [0]),
+        # keyframe is behind the current frame -> no repeated seek
+        ([25, 38, 95], [25, 38, 95]),
+    ],
+)
+def test_decode_frames_sequentially_keyframe_pts(extract_pts, expected_seeks):
+    container = _FakeContainer(num_frames=100, gop=10)
+    frames = _decode_frames_sequentially(
+        container, None, extract_pts, 1000, keyframe_pts=np.arange(0, 100, 10)
+    )
+    assert [frame.pts for frame in frames] == extract_pts
+    assert container.seeks == expected_seeks
+
+
+def test_decode_frames_sequentially_end_of_stream():
+    container = _FakeContainer(num_frames=10, gop=10)
+    frames = _decode_frames_sequentially(container, None, [3, 50], 100)
+    assert [frame.pts for frame in frames] == [3]
+
+
+def _make_rois() -> Rois:
+    return Rois(
+        original_width=1920,
+        original_height=1080,
+        segments=[
+            {
+                "speakers": [0],
+                "start_time": 0.0,
+                "end_time": 5.0,
+                "roi": Rect(100, 200, 300, 300),
+            },
+            {
+                "speakers": [1],
+                "start_time": 5.0,
+                "end_time": 9.5,
+                "roi": Rect(1500, 100, 200, 250),
+            },
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    "aspect_ratio, expected_dims, expected_xs",
+    [
+        ((9, 16), (607, 1080), [0, 1297]),
+        ((1, 1), (1080, 1080), [0, 1060]),
+        ((4, 5), (864, 1080), [0, 1168]),
+    ],
+)
+def test_calc_crops(aspect_ratio, expected_dims, expected_xs):
+    resizer = Resizer()
+    crops = resizer.calc_crops(_make_rois(), aspect_ratio)
+    assert (crops.crop_width, crops.crop_height) == expected_dims
+    assert [segment.x for segment in crops.segments] == expected_xs
+    assert [segment.y for segment in crops.segments] == [0, 0]
+
+
+def test_rois_json_round_trip(tmp_path):
+    rois = _make_rois()
+    json_file = rois.store_as_json_file(str(tmp_path / "rois.json"))
+    loaded_rois = Rois.from_json_file(json_file.path)
+    assert loaded_rois == rois
+
+    resizer = Resizer()
+    assert resizer.calc_crops(loaded_rois, (9, 16)) == resizer.calc_crops(rois, (9, 16))
+
+
+def test_calc_crops_from_roi_file_skips_face_models(tmp_path):
+    rois = _make_rois()
+    json_file = rois.store_as_json_file(str(tmp_path / "rois.json"))
+    with patch("clipsai_jp.resize.resizer.get_model_registry") as mock_registry:
+        crops = calc_crops_from_roi_file(json_file.path, [(9, 16), (1, 1)])
+
+    mock_registry.assert_not_called()
+    assert crops[(9, 16)] == Resizer.calc_crops(rois, (9, 16))
+    assert crops[(1, 1)].crop_width == 1080
+
+
+@pytest.mark.parametrize("use_scratch_file", [False, True])
+def test_frame_cache_lru_eviction(use_scratch_file):
+    frames = [np.full((2, 4, 3), i, dtype=np.uint8) for i in range(4)]
+    # room for three frames
+    cache = FrameCache(3 * frames[0].nbytes, use_scratch_file=use_scratch_file)
+    for i in range(3):
+        cache.put((i, 960), frames[i], None)
+    # touch the oldest frame so the second one is evicted next
+    assert cache.get((0, 960))[0][0, 0, 0] == 0
+    cache.put((3, 960), frames[3], None)
+
+    assert (1, 960) not in cache
+    assert len(cache) == 3
+    assert cache.num_bytes == 3 * frames[0].nbytes
+    for i in [0, 2, 3]:
+        frame, face_detection = cache.get((i, 960))
+        np.testing.assert_array_equal(frame, frames[i])
+        assert face_detection is None
+    assert cache.get((0, 480)) is None
+    assert (cache.hits, cache.misses) == (4, 1)
+
+
+def test_frame_cache_skips_frames_over_budget():
+    cache = FrameCache(10)
+    cache.put((0, 960), np.zeros((4, 4, 3), dtype=np.uint8), None)
+    assert len(cache) == 0
+    assert cache.num_bytes == 0
+
+
+def test_detect_faces_at_secs_uses_cache():
+    mock_video_file = MagicMock(spec=VideoFile)
+    mock_video_file.get_width_pixels.return_value = 960
+
+    resizer = Resizer()
+    detection = np.array([[10, 10, 50, 50]])
+    cached_frame = np.full((2, 2, 3), 2, dtype=np.uint8)
+    cache = FrameCache(2**20)
+    cache.put((2000, 960), cached_frame, detection)
+    with patch.object(
+        resizer,
+        "_extract_face_detect_frames",
+        side_effect=lambda video_file, secs, width, frame_pool, sec_bounds, return_pts: (
+            [np.full((2, 2, 3), sec, dtype=np.uint8) for sec in secs],
+            [int(sec * 1000) for sec in secs],
+        ),
+    ) as mock_extract, patch.object(
+        resizer,
+        "_detect_faces",
+        side_effect=lambda frames, width, video_width: [detection] * len(frames),
+    ) as mock_detect:
+        # the cached frame is found by its pts, not by the requested second
+        frames, face_detections, pts = resizer._detect_faces_at_secs(
+            mock_video_file,
+            [2.01, 3.0],
+            960,
+            frame_cache=cache,
+            cached_pts=[2000, None],
+            return_pts=True,
+        )
+
+    assert mock_extract.call_args.args[1] == [3.0]
+    assert len(mock_detect.call_args.args[0]) == 1
+    assert frames[0] is cached_frame
+    assert [frame[0, 0, 0] for frame in frames] == [2, 3]
+    assert pts == [2000, 3000]
+    assert all(face_detection is detection for face_detection in face_detections)
+    # looking frames up never fills the cache
+    assert len(cache) == 1
+
+
+@pytest.mark.parametrize("frames_left, num_samples", [(100, 12), (13, 12), (50, 1)])
+def test_stratified_sample_frames(frames_left, num_samples):
+    samples = _stratified_sample_frames(
+        np.random.default_rng(0), frames_left, num_samples
+    )
+    strata = np.array_split(np.arange(1, frames_left), num_samples)
+    # one sample per stratum
+    assert sorted(
+        [i for i, stratum in enumerate(strata) if np.isin(samples, stratum).any()]
+    ) == list(range(num_samples))
+    # the first samples are spread over the whole segment
+    if num_samples >= 4:
+        assert samples[0] <= strata[0][-1] and samples[1] >= strata[num_samples // 2][0]
+
+
+def test_calc_sample_bounds():
+    bounds = _calc_sample_bounds([3.0, 1.0, 2.0], 0.5, 4.0)
+    np.testing.assert_allclose(bounds, [[2.5, 4.0], [0.5, 1.5], [1.5, 2.5]])
+    assert _calc_sample_bounds([], 0.0, 1.0).shape == (0, 2)
+
+
+@pytest.mark.parametrize("moving_face, expected_num_frames", [(False, 7), (True, 13)])
+def test_calc_rois_by_adaptive_sampling(moving_face, expected_num_frames):
+    mock_video_file = MagicMock(spec=VideoFile)
+    mock_video_file.get_width_pixels.return_value = 960
+    mock_video_file.get_frame_rate.return_value = 30
+
+    def detect_faces_at_secs(
+        video_file, secs, width, frame_cache, frame_pool, sec_bounds, cached_pts
+    ):
+        shifts = [int(sec * 30) * 10 if moving_face else 0 for sec in secs]
+        return (
+            [np.zeros((2, 2, 3), dtype=np.uint8) for _ in secs],
+            [np.array([[100 + shift, 100, 200 + shift, 200]]) for shift in shifts],
+        )
+
+    resizer = Resizer()
+    segments = [
+        {
+            "start_time": 0.0,
+            "end_time": 20.0,
+            "first_face_sec": 0.0,
+            "sample_seed": 0,
+        }
+    ]
+    with patch.object(
+        resizer, "_detect_faces_at_secs", side_effect=detect_faces_at_secs
+    ) as mock_detect:
+        rois = resizer._calc_rois_by_adaptive_sampling(
+            segments, mock_video_file, 13, 960, sample_tolerance=2
+        )
+
+    assert sum(len(call.args[1]) for call in mock_detect.call_args_list) == (
+        expected_num_frames
+    )
+    if not moving_face:
+        assert rois[0] == Rect(100, 100, 100, 100)
+
+
+def test_add_keyframe_face_hints():
+    mock_video_file = MagicMock(spec=VideoFile)
+    mock_video_file.get_width_pixels.return_value = 960
+    mock_video_file.get_height_pixels.return_value = 540
+
+    # keyframes every 2 seconds; frames with a face are marked with 1
+    keyframe_has_face = [0, 0, 1, 1, 0, 0, 0, 0, 1, 1]
+    keyframes = [
+        (2.0 * i, np.full((2, 2, 3), has_face, dtype=np.uint8))
+        for i, has_face in enumerate(keyframe_has_face)
+    ]
+    segments = [
+        # first face keyframe at 4 s -> start after the keyframe at 2 s
+        {"start_time": 0.0, "end_time": 8.0},
+        # no keyframe has a face
+        {"start_time": 8.0, "end_time": 16.0},
+        # no keyframes in the searched interval
+        {"start_time": 16.2, "end_time": 16.9},
+        # face from the search start on
+        {"start_time": 16.9, "end_time": 20.0},
+    ]
+    resizer = Resizer()
+    with patch(
+        "clipsai_jp.resize.resizer.extract_keyframes", return_value=iter(keyframes)
+    ), patch.object(
+        resizer,
+        "_detect_faces",
+        side_effect=lambda frames, width, video_width: [
+            np.array([[0, 0, 1, 1]]) if frame[0, 0, 0] else None for frame in frames
+        ],
+    ):
+        resizer._add_keyframe_face_hints(segments, mock_video_file, 960)
+
+    assert segments[0]["face_search_start"] == 2.0
+    assert segments[1]["face_search_start"] is None
+    assert "face_search_start" not in segments[2]
+    assert segments[3]["face_search_start"] == pytest.approx(16.9 + 3.1 / 8)
+
+
+def test_find_first_sec_with_face_uses_keyframe_hints():
+    mock_video_file = MagicMock(spec=VideoFile)
+    segments = [
+        {"start_time": 0.0, "end_time": 8.0, "face_search_start": 2.0},
+        {"start_time": 8.0, "end_time": 16.0, "face_search_start": None},
+    ]
+
+    def detect_faces_at_secs(
+        video_file, secs, width, frame_pool, sec_bounds, return_pts
+    ):
+        return (
+            [np.full((2, 2, 3), sec, dtype=np.uint8) for sec in secs],
+            [np.array([[0, 0, 1, 1]]) if sec >= 3 else None for sec in secs],
+            [int(sec * 1000) for sec in secs],
+        )
+
+    resizer = Resizer()
+    cache = FrameCache(2**20)
+    with patch.object(resizer, "_calc_n_batches", return_value=1), patch.object(
+        resizer, "_detect_faces_at_secs", side_effect=detect_faces_at_secs
+    ) as mock_detect:
+        segments = resizer._find_first_sec_with_face_for_each_segment(
+            segments, mock_video_file, 960, 8, cache
+        )
+
+    assert mock_detect.call_args_list[0].args[1] == [2.0]
+    assert segments[0]["found_face"] is True
+    assert segments[0]["first_face_sec"] == 3.0
+    assert segments[0]["first_face_pts"] == 3000
+    assert segments[1]["found_face"] is False
+    assert "first_face_pts" not in segments[1]
+    assert all("face_search_start" not in segment for segment in segments)
+    # only the frames at the first faces are cached
+    assert len(cache) == 1
+    assert cache.get((3000, 960))[0][0, 0, 0] == 3
+
+
+def test_calc_mouth_movement_crops_downscaled_frames():
+    # the frames were decoded at half the video's width
+    frames = []
+    for i in range(2):
+        frame = np.zeros((50, 100, 3), dtype=np.uint8)
+        frame[10:30, 20:40] = 10 * (i + 1)
+        frames.append(frame)
+    bounding_box_group = [
+        {"bounding_box": np.array([40, 20, 80, 60]), "frame": i} for i in range(2)
+    ]
+    faces = []
+
+    def calc_mouth_aspect_ratio(face):
+        faces.append(face)
+        return float(face.mean())
+
+    resizer = Resizer()
+    with patch.object(
+        resizer, "_calc_mouth_aspect_ratio", side_effect=calc_mouth_aspect_ratio
+    ):
+        mouth_movement, roi = resizer._calc_mouth_movement(
+            bounding_box_group, frames, frame_scale=0.5
+        )
+
+    # the faces are cropped at the frames' resolution, not the video's
+    assert [face.shape for face in faces] == [(20, 20, 3), (20, 20, 3)]
+    assert mouth_movement == 10
+    # the ROI is in the video's coordinates
+    assert roi == Rect(40, 20, 40, 40)
+
+
+class _InlineExecutor:
+    """
+    Stands in for ProcessPoolExecutor by running the initializer and the mapped
+    function in this process.
+    """
+
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+
+def _fake_extract_face_detect_frames(
+    self, video_file, secs, width, frame_pool=None, sec_bounds=None, return_pts=False
+):
+    # the left face's pixels change with time, the right face's don't
+    frames = []
+    for sec in secs:
+        frame = np.full((108, 192, 3), 50, dtype=np.uint8)
+        frame[:, :96] = int(sec * 37) % 200
+        frames.append(frame)
+    if return_pts:
+        return frames, [int(round(sec * 1000)) for sec in secs]
+    return frames
+
+
+def _fake_detect_faces(self, frames, width, video_width):
+    face_detections = []
+    for frame in frames:
+        shift = int(frame[0, 0, 0]) % 7
+        face_detections.append(
+            np.array([[20 + shift, 20, 60 + shift, 60], [120, 20, 160, 60]])
+        )
+    return face_detections
+
+
+@pytest.mark.parametrize("sample_tolerance", [None, 2])
+def test_analyze_segments_in_parallel_matches_serial(sample_tolerance):
+    mock_video_file = MagicMock(spec=VideoFile)
+    mock_video_file.path = "video.mp4"
+    mock_video_file.get_width_pixels.return_value = 192
+    mock_video_file.get_height_pixels.return_value = 108
+    mock_video_file.get_frame_rate.return_value = 30
+    speaker_segments = [
+        {"speakers": [i % 2], "start_time": 4.0 * i, "end_time": 4.0 * (i + 1)}
+        for i in range(6)
+    ]
+
+    def analyze(n_workers, seed):
+        resizer = Resizer(frame_cache_bytes=2**20)
+        rois = resizer.analyze(
+            mock_video_file,
+            speaker_segments,
+            [],
+            face_detect_width=192,
+            n_workers=n_workers,
+            seed=seed,
+            sample_tolerance=sample_tolerance,
+        )
+        return rois, resizer.calc_crops(rois, (9, 16))
+
+    with patch.object(
+        Resizer, "_extract_face_detect_frames", _fake_extract_face_detect_frames
+    ), patch.object(Resizer, "_detect_faces", _fake_detect_faces), patch.object(
+        Resizer,
+        "_calc_mouth_aspect_ratio",
+        lambda self, face: float(face.mean()) if face.size > 0 else None,
+    ), patch(
+        "clipsai_jp.resize.resizer.ProcessPoolExecutor", _InlineExecutor
+    ), patch(
+        "clipsai_jp.resize.resizer.VideoFile", return_value=mock_video_file
+    ) as mock_video_file_cls, patch(
+        "clipsai_jp.resize.resizer._worker_resizer", None
+    ):
+        serial_rois, serial_crops = analyze(1, seed=0)
+        parallel_rois, parallel_crops = analyze(3, seed=0)
+        worker_resizer = resizer_module._worker_resizer
+
+        # the workers open the video by path and split the frame cache budget
+        mock_video_file_cls.assert_called_with("video.mp4")
+        assert worker_resizer._frame_cache_bytes == 2**20 // 3
+        assert serial_rois == parallel_rois
+        assert serial_crops == parallel_crops
+        # the sampling only depends on the seed
+        assert analyze(1, seed=0)[0] == serial_rois
+
+    assert len(serial_rois.segments) == 6
+    # the face whose mouth moves is chosen
+    assert all(segment["roi"].x < 96 for segment in serial_rois.segments)
+
+
+def test_frame_pool_find_and_pickle():
+    pool = FramePool((2, 4, 3), max_frames=3, max_offset=0.5)
+    for sec in [0.0, 1.0, 2.0, 3.0]:
+        pool.add(sec, np.full((2, 4, 3), sec, dtype=np.uint8))
+    # the pool is full after three frames
+    assert len(pool) == 3
+    # 2.5 is further from the pooled frame at 2 s than 1.6 -> decoded instead
+    np.testing.assert_array_equal(
+        pool.find([0.2, 1.6, 2.5, 2.6, -0.6]), [0, 2, -1, -1, -1]
+    )
+    # pooled frames outside a second's bounds or scene don't stand in for it
+    np.testing.assert_array_equal(
+        pool.find([0.9, 1.2], [[0.0, 1.0], [1.0, 2.0]]), [-1, 1]
+    )
+    pool.scene_changes = [1.5]
+    np.testing.assert_array_equal(pool.find([0.2, 1.6, 2.1]), [0, -1, 2])
+
+    # unpickled pools map the same scratch file without owning it
+    unpickled_pool = pickle.loads(pickle.dumps(pool))
+    assert unpickled_pool.path == pool.path
+    assert unpickled_pool[1][0, 0, 0] == 1
+    np.testing.assert_array_equal(unpickled_pool.scene_changes, [1.5])
+    unpickled_pool.close()
+    assert os.path.exists(pool.path)
+    pool.close()
+    assert not os.path.exists(pool.path)
+
+
+def test_extract_face_detect_frames_uses_frame_pool():
     mock_video_file = MagicMock(spec=VideoFile)
-    mock_video_file.get_width_pixels.return_value = 1000
-    mock_video_file.get_height_pixels.return_value = 1000
+    mock_video_file.get_width_pixels.return_value = 8
+    mock_video_file.get_height_pixels.return_value = 4
 
+    pool = FramePool((4, 8, 3), max_frames=2, max_offset=0.5)
+    pool.add(1.0, np.full((4, 8, 3), 1, dtype=np.uint8))
+    pool.add(2.0, np.full((4, 8, 3), 2, dtype=np.uint8))
     resizer = Resizer()
-    merged_segments = resizer._merge_identical_segments(segments, mock_video_file)
-    assert merged_segments == expected
+    with patch(
+        "clipsai_jp.resize.resizer.extract_frames",
+        side_effect=lambda video_file, secs, **kwargs: [
+            np.full((4, 8, 3), 9, dtype=np.uint8) for _ in secs
+        ],
+    ) as mock_extract:
+        frames = resizer._extract_face_detect_frames(
+            mock_video_file,
+            [2.2, 5.0, 0.9, 1.2],
+            960,
+            pool,
+            [(2.0, 6.0), (2.0, 6.0), (0.0, 0.95), (0.95, 2.0)],
+        )
+    pool.close()
+
+    # the frame at 1 s is outside the bounds of 0.9 and stands in for 1.2
+    assert mock_extract.call_args.args[1] == [5.0, 0.9]
+    assert [frame[0, 0, 0] for frame in frames] == [2, 9, 9, 1]
+
+
+@pytest.mark.parametrize("frame_skip", [0, 2])
+def test_scene_cut_detector_maps_cuts_to_frame_secs(frame_skip):
+    detector = _SceneCutDetector(fps=25, min_scene_duration=0.25, width=640, height=360)
+    assert detector.frame_dims == (256, 144)
+    # the video starts at 0.5 s and cuts from black to white at frame 100
+    for frame_num in range(0, 200, frame_skip + 1):
+        frame = np.full((144, 256, 3), 255 if frame_num >= 100 else 0, np.uint8)
+        detector.process_frame(frame_num, 0.5 + frame_num / 25, frame)
+
+    # the cut is reported at the first analyzed frame of the new scene
+    first_analyzed = int(np.ceil(100 / (frame_skip + 1)) * (frame_skip + 1))
+    assert detector.finish() == [round(0.5 + first_analyzed / 25, 6)]
+
+
+def test_detect_scenes_invalid_frame_skip():
+    with pytest.raises(VideoProcessingError):
+        detect_scenes(MagicMock(spec=VideoFile), frame_skip=-1)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run_stages(max_workers):
+    # with two workers each stage waits for the other one to start
+    barrier = threading.Barrier(max_workers, timeout=10)
+
+    def stage(result):
+        if max_workers > 1:
+            barrier.wait()
+        return result
+
+    results, timings = _run_stages(
+        {"diarize": lambda: stage([1]), "detect_scenes": lambda: stage([2.0])},
+        max_workers,
+    )
+    assert results == {"diarize": [1], "detect_scenes": [2.0]}
+    assert list(timings) == ["diarize", "detect_scenes"]
+
+
+def test_run_stages_waits_for_every_stage_before_raising():
+    finished = []
+
+    def failing_stage():
+        raise ResizerError("failed")
+
+    def slow_stage():
+        time.sleep(0.1)
+        finished.append(True)
+
+    with pytest.raises(ResizerError):
+        _run_stages({"diarize": failing_stage, "detect_scenes": slow_stage}, 2)
+    assert finished == [True]
+
+
+def test_resize_to_aspect_ratios_invalid_stage_threads():
+    with pytest.raises(ResizerError):
+        resize_to_aspect_ratios("video.mp4", "token", stage_threads=0)
+
+
+@pytest.mark.parametrize(
+    "cpu_budget, stage_threads, expected",
+    [
+        (None, 2, {"diarize": None, "detect_scenes": None}),
+        (8, 1, {"diarize": 8, "detect_scenes": 8}),
+        (8, 2, {"diarize": 4, "detect_scenes": 4}),
+        (5, 2, {"diarize": 3, "detect_scenes": 2}),
+        (1, 2, {"diarize": 1, "detect_scenes": 1}),
+    ],
+)
+def test_split_cpu_budget(cpu_budget, stage_threads, expected):
+    assert _split_cpu_budget(cpu_budget, stage_threads) == expected
+
+
+def test_resize_to_aspect_ratios_invalid_cpu_budget():
+    with pytest.raises(ResizerError):
+        resize_to_aspect_ratios("video.mp4", "token", cpu_budget=0)
+
+
+def test_resize_to_aspect_ratios_splits_cpu_budget(tmp_path):
+    resize_module = sys.modules["clipsai_jp.resize.resize"]
+    num_threads = torch.get_num_threads()
+    diarize_threads = []
+
+    def diarize(*args, **kwargs):
+        diarize_threads.append(torch.get_num_threads())
+        return [{"speakers": [0], "start_time": 0.0, "end_time": 5.0}]
+
+    with patch.object(resize_module, "AudioVideoFile") as mock_media, patch.object(
+        resize_module, "Resizer"
+    ), patch.object(resize_module, "PyannoteDiarizer") as mock_diarizer, patch.object(
+        resize_module, "detect_scenes", return_value=[2.5]
+    ) as mock_detect_scenes:
+        mock_media.return_value = MagicMock(spec=AudioVideoFile)
+        mock_diarizer.return_value.diarize.side_effect = diarize
+        resize_to_aspect_ratios(
+            str(tmp_path / "video.mp4"),
+            "token",
+            aspect_ratios=[(9, 16)],
+            stage_threads=2,
+            cpu_budget=5,
+        )
+
+    assert diarize_threads == [3]
+    assert mock_detect_scenes.call_args.kwargs["num_threads"] == 2
+    # the process-wide thread count is restored
+    assert torch.get_num_threads() == num_threads
+
+
+def test_artifact_cache_round_trip_and_eviction(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=50)
+    params = {"min_scene_duration": 0.25}
+    assert cache.get("detect_scenes", "abc", params) is None
+
+    cache.put("detect_scenes", "abc", params, [1.5, 3.0])
+    assert cache.get("detect_scenes", "abc", params) == [1.5, 3.0]
+    assert cache.get("detect_scenes", "abc", {"min_scene_duration": 0.5}) is None
+    assert cache.get("detect_scenes", "def", params) is None
+
+    # age the entry so it's the least recently used one
+    entry_path = cache._get_entry_path("detect_scenes", "abc", params)
+    os.utime(entry_path, ns=(0, 0))
+    cache.put("diarize", "abc", {}, [[0, 1.0, 2.0]] * 3)
+    assert cache.get("detect_scenes", "abc", params) is None
+    assert cache.get("diarize", "abc", {}) is not None
+
+
+def test_artifact_cache_fingerprint_follows_content(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    video_path = tmp_path / "video.mp4"
+    copy_path = tmp_path / "copy.mp4"
+    video_path.write_bytes(b"video")
+    copy_path.write_bytes(b"video")
+    fingerprint = cache.fingerprint(str(video_path))
+    assert cache.fingerprint(str(video_path)) == fingerprint
+    assert cache.fingerprint(str(copy_path)) == fingerprint
+
+    video_path.write_bytes(b"edited video")
+    assert cache.fingerprint(str(video_path)) != fingerprint
+
+
+def test_resize_to_aspect_ratios_reuses_cached_artifacts(tmp_path):
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"video")
+    resize_module = sys.modules["clipsai_jp.resize.resize"]
+    speaker_segments = [{"speakers": [0], "start_time": 0.0, "end_time": 5.0}]
+    with patch.object(resize_module, "AudioVideoFile") as mock_media, patch.object(
+        resize_module, "Resizer"
+    ) as mock_resizer, patch.object(
+        resize_module, "PyannoteDiarizer"
+    ) as mock_diarizer, patch.object(
+        resize_module, "detect_scenes", return_value=[2.5]
+    ) as mock_detect_scenes:
+        mock_media.return_value = MagicMock(spec=AudioVideoFile, path=str(video_path))
+        mock_diarizer.return_value.diarize.return_value = speaker_segments
+        for face_detect_margin in [20, 40]:
+            resize_to_aspect_ratios(
+                str(video_path),
+                "token",
+                aspect_ratios=[(9, 16)],
+                face_detect_margin=face_detect_margin,
+                artifact_cache_dir=str(tmp_path / "cache"),
+            )
+
+    mock_diarizer.return_value.diarize.assert_called_once()
+    mock_detect_scenes.assert_called_once()
+    for call in mock_resizer.return_value.analyze.call_args_list:
+        assert call.kwargs["speaker_segments"] == speaker_segments
+        assert call.kwargs["scene_changes"] == [2.5]
@@ -1,14 +1,26 @@
 import pytest
-from unittest.mock import patch
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
 from datetime import datetime
+import sys
 
+import numpy as np
+from faster_whisper.transcribe import Segment, Word
+
+from clipsai_jp.filesys.file import File
 from clipsai_jp.filesys.json_file import JSONFile
 from clipsai_jp.media.audio_file import AudioFile
 from clipsai_jp.media.audiovideo_file import AudioVideoFile
 from clipsai_jp.media.editor import MediaEditor
 from clipsai_jp.media.exceptions import MediaEditorError
+from clipsai_jp.transcribe.char_table import CharInfoView, CharTable
 from clipsai_jp.transcribe.exceptions import TranscriptionError
-from clipsai_jp.transcribe.transcriber import TranscriberConfigManager
+from clipsai_jp.transcribe.transcriber import (
+    Transcriber,
+    TranscriberConfigManager,
+    _plan_transcription_chunks,
+    _shift_segment,
+)
 from clipsai_jp.transcribe.transcription import Transcription
 
 
@@ -157,3 +169,477 @@ def test_invalid_times_exception():
     transcription = Transcription(valid_transcription_data)
     with pytest.raises(TranscriptionError):
         transcription.get_char_info(start_time=-1, end_time=5)
+
+
+def _make_transcription(chars, times):
+    data = dict(
+        valid_transcription_data,
+        char_info=[
+            {"char": char, "start_time": start, "end_time": end, "speaker": None}
+            for char, (start, end) in zip(chars, times)
+        ],
+    )
+    # avoid depending on the NLTK punkt data being downloaded
+    with patch(
+        "clipsai_jp.transcribe.transcription.sent_tokenize",
+        side_effect=lambda text: [text.strip()],
+    ):
+        transcription = Transcription(data)
+        # the sentences are split on first use
+        transcription.get_sentence_info()
+    return transcription
+
+
+def test_get_char_info_returns_view_of_char_columns():
+    transcription = _make_transcription(
+        "ab cd", [(0.0, 0.1), (0.1, 0.2), (0.2, 0.3), (0.3, 0.4), (0.4, 0.5)]
+    )
+    char_info = transcription.get_char_info()
+
+    assert len(char_info) == 5
+    assert char_info[-1] == {
+        "char": "d",
+        "start_time": 0.4,
+        "end_time": 0.5,
+        "speaker": None,
+        "work_index": 1,
+        "sentence_index": 0,
+    }
+    assert [char["char"] for char in char_info[1:4]] == ["b", " ", "c"]
+    assert char_info[1:4][0]["char"] == "b"
+    assert transcription.get_char_info(0.25, 0.45) == char_info[2:5]
+    # the returned dicts are copies
+    char_info[0]["char"] = "x"
+    assert transcription.get_char_info()[0]["char"] == "a"
+
+
+@pytest.mark.parametrize(
+    "target_time, type_of_time, expected_index",
+    [
+        # within a character
+        (0.15, "start", 1),
+        (0.15, "end", 1),
+        # in the gap between the 2nd and 3rd characters
+        (0.25, "start", 2),
+        (0.25, "end", 1),
+        # characters touching at the target time
+        (0.1, "start", 1),
+        (0.1, "end", 0),
+    ],
+)
+def test_find_char_index_searches_times(target_time, type_of_time, expected_index):
+    transcription = _make_transcription("abc", [(0.0, 0.1), (0.1, 0.2), (0.3, 0.4)])
+    assert transcription.find_char_index(target_time, type_of_time) == expected_index
+
+
+@pytest.mark.parametrize("type_of_time", ["start", "end"])
+def test_find_indices_matches_find_index(type_of_time):
+    transcription = _make_transcription(
+        "ab cd", [(0.0, 0.1), (0.1, 0.2), (0.25, 0.3), (0.3, 0.3), (0.4, 0.5)]
+    )
+    target_times = np.array([0.0, 0.05, 0.1, 0.22, 0.3, 0.35, 0.5])
+
+    for kind in ["char", "word", "sentence"]:
+        find_index = getattr(transcription, "find_{}_index".format(kind))
+        find_indices = getattr(transcription, "find_{}_indices".format(kind))
+        assert find_indices(target_times, type_of_time).tolist() == [
+            find_index(target_time, type_of_time) for target_time in target_times
+        ]
+
+
+def test_find_indices_out_of_range_exception():
+    transcription = _make_transcription("ab", [(0.0, 0.1), (0.1, 0.2)])
+    with pytest.raises(TranscriptionError):
+        transcription.find_char_indices(np.array([0.1, 0.3]), "start")
+
+
+def test_derived_levels_are_built_on_first_use():
+    data = dict(
+        valid_transcription_data,
+        char_info=[
+            {"char": "a", "start_time": 0.0, "end_time": 0.1, "speaker": None},
+            {"char": "b", "start_time": 0.1, "end_time": 0.2, "speaker": None},
+        ],
+    )
+    with patch(
+        "clipsai_jp.transcribe.transcription.sent_tokenize", return_value=["ab"]
+    ) as mock_sent_tokenize:
+        transcription = Transcription(data)
+        assert transcription.text == "ab"
+        assert transcription.find_char_index(0.15, "start") == 1
+        char_info = transcription.get_char_info()
+        assert len(char_info) == 2
+        assert len(transcription.get_char_info(0.0, 0.2)) == 2
+        mock_sent_tokenize.assert_not_called()
+
+        assert char_info[1]["sentence_index"] == 0
+        mock_sent_tokenize.assert_called_once()
+        sentences = transcription.sentences
+        mock_sent_tokenize.assert_called_once()
+
+    assert isinstance(sentences, tuple)
+    assert transcription.sentences is sentences
+    assert transcription.words is transcription.words
+
+
+def test_disabled_level_raises():
+    data = dict(
+        valid_transcription_data,
+        char_info=[
+            {"char": "a", "start_time": 0.0, "end_time": 0.1, "speaker": None},
+        ],
+    )
+    transcription = Transcription(data, derive_sentences=False)
+
+    assert transcription.get_char_info()[0]["sentence_index"] is None
+    assert transcription.get_char_info()[0]["work_index"] == 0
+    with pytest.raises(TranscriptionError):
+        transcription.get_sentence_info()
+    with pytest.raises(TranscriptionError):
+        transcription.find_sentence_index(0.05, "start")
+
+
+def test_store_as_binary_file_round_trips(tmp_path):
+    transcription = _make_transcription(
+        "ab cd. e", [(0.0, 0.1), (0.1, 0.2), (0.2, 0.3), (0.3, 0.4), (0.4, 0.5)] * 2
+    )
+    binary_file = transcription.store_as_binary_file(
+        str(tmp_path / "transcription.transcript")
+    )
+
+    # loading doesn't split the text into sentences again
+    with patch(
+        "clipsai_jp.transcribe.transcription.sent_tokenize",
+        side_effect=AssertionError,
+    ):
+        loaded = Transcription(File(binary_file.path))
+
+    assert loaded.text == transcription.text
+    assert loaded.end_time == transcription.end_time
+    assert loaded.created_time == transcription.created_time
+    assert loaded.get_char_info() == transcription.get_char_info()
+    assert loaded.get_word_info() == transcription.get_word_info()
+    assert loaded.get_sentence_info() == transcription.get_sentence_info()
+    assert loaded.find_word_index(0.25, "end") == transcription.find_word_index(
+        0.25, "end"
+    )
+
+
+def test_init_with_invalid_binary_file(tmp_path):
+    file_path = tmp_path / "transcription.transcript"
+    file_path.write_bytes(b"not a transcription")
+    with pytest.raises(TranscriptionError):
+        Transcription(File(str(file_path)))
+
+
+def test_slice_rebases_and_offsets_range():
+    transcription = _make_transcription(
+        "ab cd ef",
+        [(i * 0.1, (i + 1) * 0.1) for i in range(8)],
+    )
+    sliced = transcription.slice(0.35, 0.7)
+
+    assert sliced.text == "cd e"
+    assert sliced.start_time == 0.0
+    assert sliced.end_time == pytest.approx(0.35)
+    char_info = sliced.get_char_info()
+    assert char_info[0]["start_time"] == 0.0
+    assert char_info[0]["end_time"] == pytest.approx(0.05)
+    assert [char["work_index"] for char in char_info] == [0, 0, 1, 1]
+    assert sliced.get_word_info() == [
+        {
+            "word": "cd",
+            "start_char": 0,
+            "end_char": 2,
+            "start_time": 0.0,
+            "end_time": pytest.approx(0.15),
+            "speaker": None,
+        },
+        {
+            "word": "e",
+            "start_char": 3,
+            "end_char": 4,
+            "start_time": pytest.approx(0.25),
+            "end_time": pytest.approx(0.35),
+            "speaker": None,
+        },
+    ]
+    assert sliced.find_word_index(0.3, "start") == 1
+    assert sliced.get_sentence_info()[0]["sentence"] == "cd e"
+    # the parent is unchanged
+    assert transcription.text == "ab cd ef"
+    assert transcription.get_word_info()[1]["word"] == "cd"
+
+    # the range ends in the space before "ef", which has the word index of "ef"
+    sliced = transcription.slice(0.35, 0.55)
+    assert sliced.text == "cd "
+    assert [char["work_index"] for char in sliced.get_char_info()] == [0, 0, None]
+    assert [word["word"] for word in sliced.get_word_info()] == ["cd"]
+    assert [sentence["sentence"] for sentence in sliced.get_sentence_info()] == ["cd "]
+
+    # the range ends in the space before the second sentence, which has its index
+    data = dict(
+        valid_transcription_data,
+        char_info=[
+            {
+                "char": char,
+                "start_time": i * 0.1,
+                "end_time": (i + 1) * 0.1,
+                "speaker": None,
+            }
+            for i, char in enumerate("ab. cd.")
+        ],
+    )
+    with patch(
+        "clipsai_jp.transcribe.transcription.sent_tokenize",
+        return_value=["ab.", "cd."],
+    ):
+        sliced = Transcription(data).slice(0.05, 0.35)
+        sentence_info = sliced.get_sentence_info()
+    assert [sentence["sentence"] for sentence in sentence_info] == ["ab."]
+    assert sliced.get_char_info()[-1]["sentence_index"] is None
+
+
+def test_slice_without_chars_raises():
+    transcription = _make_transcription("ab", [(0.0, 0.1), (0.3, 0.4)])
+    with pytest.raises(TranscriptionError):
+        transcription.slice(0.15, 0.25)
+
+
+def test_char_table_round_trips_char_info():
+    char_info = [
+        {"char": "a", "start_time": 0.0, "end_time": 0.1, "speaker": 0},
+        # characters longer than a code point, ex: combining marks
+        {"char": "e\u0301", "start_time": None, "end_time": None, "speaker": None},
+        {"char": "b", "start_time": 0.2, "end_time": 0.3, "speaker": 1},
+    ]
+    table = CharTable.from_char_info(char_info)
+
+    assert table.text == "ae\u0301b"
+    assert table.get_chars() == ["a", "e\u0301", "b"]
+    assert table.has_missing_times()
+    assert list(CharInfoView(table)) == [
+        dict(char, work_index=None, sentence_index=None) for char in char_info
+    ]
+    assert CharInfoView(table)[1]["char"] == "e\u0301"
+    assert CharInfoView(table, 1)[1]["char"] == "b"
+
+
+def _speech(start, end):
+    return {"start": start, "end": end}
+
+
+@pytest.mark.parametrize(
+    "speech_timestamps, num_samples, expected_chunks",
+    [
+        # cut in the middle of the gaps between speech
+        ([_speech(10, 30), _speech(40, 70)], 100, [(0, 35), (35, 75)]),
+        # silent chunks are skipped
+        ([_speech(100, 500), _speech(2000, 2100)], 3000, [(0, 600), (1850, 2450)]),
+        # speech longer than a chunk is cut
+        ([_speech(500, 2000)], 2200, [(500, 1100), (1100, 1700), (1700, 2200)]),
+        ([], 100, []),
+    ],
+)
+def test_plan_transcription_chunks(speech_timestamps, num_samples, expected_chunks):
+    max_chunk_samples = 600 if num_samples > 1000 else 40
+    chunks = _plan_transcription_chunks(
+        speech_timestamps, num_samples, max_chunk_samples
+    )
+    assert chunks == expected_chunks
+    assert all(end - start <= max_chunk_samples for start, end in chunks)
+
+
+class _InlineExecutor:
+    """
+    Stands in for ProcessPoolExecutor and runs everything in the test process.
+    """
+
+    # the most calls submitted and not yet run at once
+    max_pending = 0
+
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        initializer(*initargs)
+        self.num_pending = 0
+        _InlineExecutor.instance = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+    def submit(self, fn, *args):
+        future = _InlineFuture(self, fn, args)
+        self.num_pending += 1
+        self.max_pending = max(self.max_pending, self.num_pending)
+        return future
+
+    def shutdown(self, cancel_futures=False):
+        pass
+
+
+class _InlineFuture:
+    """
+    Runs a submitted call when its result is asked for.
+    """
+
+    def __init__(self, executor, fn, args):
+        self._executor = executor
+        self._fn = fn
+        self._args = args
+
+    def result(self):
+        self._executor.num_pending -= 1
+        return self._fn(*self._args)
+
+
+def _make_segment(text, start, end):
+    words = [Word(start=start, end=end, word=text, probability=1.0)]
+    return Segment(
+        id=0,
+        seek=0,
+        start=start,
+        end=end,
+        text=text,
+        tokens=[],
+        avg_logprob=0.0,
+        compression_ratio=1.0,
+        no_speech_prob=0.0,
+        words=words,
+        temperature=0.0,
+    )
+
+
+@pytest.mark.parametrize("use_npy_file", [False, True])
+def test_transcribe_in_chunks_offsets_segments(use_npy_file, tmp_path):
+    transcriber_module = sys.modules["clipsai_jp.transcribe.transcriber"]
+    transcriber = Transcriber.__new__(Transcriber)
+    transcriber._model_size = "tiny"
+    transcriber._device = "cpu"
+    transcriber._precision = "int8"
+
+    # five sentences with pauses between them -> five chunks
+    sample_rate = 16000
+    speech_timestamps = [
+        _speech((10 * i + 1) * sample_rate, (10 * i + 4) * sample_rate)
+        for i in range(5)
+    ]
+    audio = np.zeros(50 * sample_rate, dtype=np.float32)
+    if use_npy_file:
+        np.save(tmp_path / "audio.npy", audio)
+        audio = np.load(tmp_path / "audio.npy", mmap_mode="r")
+    worker_model = MagicMock()
+    worker_model.transcribe.side_effect = lambda audio, **kwargs: (
+        iter([_make_segment("はい", 1.0, 2.0)]),
+        MagicMock(language="ja"),
+    )
+
+    def init_worker_model(*args):
+        transcriber_module._worker_model = worker_model
+
+    with patch.object(
+        transcriber_module, "get_speech_timestamps", return_value=speech_timestamps
+    ), patch.object(
+        transcriber_module, "ProcessPoolExecutor", _InlineExecutor
+    ), patch.object(
+        transcriber_module, "_init_worker_model", init_worker_model
+    ), patch.object(
+        transcriber_module,
+        "_transcribe_chunk_in_worker",
+        wraps=transcriber_module._transcribe_chunk_in_worker,
+    ) as mock_transcribe_chunk:
+        segments, languages = zip(
+            *transcriber._transcribe_in_chunks(audio, None, 2, 10.0)
+        )
+
+    assert languages == ("ja",) * 5
+    chunk_lengths = [
+        len(call.args[0]) / sample_rate
+        for call in worker_model.transcribe.call_args_list
+    ]
+    assert chunk_lengths == [7.5, 10.0, 10.0, 10.0, 9.5]
+    assert [segment.start for segment in segments] == [1.0, 8.5, 18.5, 28.5, 38.5]
+    assert [segment.words[0].start for segment in segments] == [
+        1.0,
+        8.5,
+        18.5,
+        28.5,
+        38.5,
+    ]
+    # at most two chunks per worker are queued at a time
+    assert _InlineExecutor.instance.max_pending == 4
+    # the workers map the cached audio file instead of being sent the chunks
+    sent_audio = mock_transcribe_chunk.call_args_list[0].args[0]
+    if use_npy_file:
+        assert sent_audio == str(tmp_path / "audio.npy")
+    else:
+        assert len(sent_audio) == 7.5 * sample_rate
+
+
+def test_transcriber_loads_model_on_first_use():
+    transcriber_module = sys.modules["clipsai_jp.transcribe.transcriber"]
+    with patch.object(transcriber_module, "get_model_registry") as mock_registry:
+        transcriber = Transcriber(model_size="tiny", device="cpu", precision="int8")
+        mock_registry.assert_not_called()
+
+        assert transcriber.load_model() is transcriber.load_model()
+    mock_registry.return_value.get.assert_called_once()
+
+
+def test_shift_segment_supports_named_tuples():
+    # faster-whisper 1.0.x segments and words are NamedTuples
+    NamedWord = namedtuple("NamedWord", ["start", "end", "word", "probability"])
+    NamedSegment = namedtuple("NamedSegment", ["start", "end", "text", "words"])
+    segment = NamedSegment(1.0, 2.0, "はい", [NamedWord(1.0, 2.0, "はい", 1.0)])
+
+    shifted = _shift_segment(segment, 5.0)
+
+    assert (shifted.start, shifted.end) == (6.0, 7.0)
+    assert (shifted.words[0].start, shifted.words[0].end) == (6.0, 7.0)
+    assert segment.start == 1.0
+
+
+def test_transcribe_stream_yields_segments_as_decoded(mock_media_editor):
+    transcriber = Transcriber.__new__(Transcriber)
+    transcriber._config_manager = TranscriberConfigManager()
+    transcriber._model = MagicMock()
+    mock_media_editor.return_value.instantiate_as_temporal_media_file.return_value = (
+        MagicMock(spec=AudioFile, path="audio.mp3")
+    )
+    decoded = []
+
+    def decode_segments():
+        # the second segment overlaps the first one's trailing space
+        for segment in [
+            _make_segment("はい", 0.0, 1.0),
+            _make_segment(" ", 1.0, 1.0),
+            _make_segment("そう", 1.05, 2.0),
+        ]:
+            decoded.append(segment)
+            yield segment
+
+    transcriber._model.transcribe.return_value = (
+        decode_segments(),
+        MagicMock(language="ja"),
+    )
+    batches = transcriber.transcribe_stream("audio.mp3")
+
+    first_batch = next(batches)
+    assert len(decoded) == 1
+    assert [char["char"] for char in first_batch] == ["は", "い"]
+
+    other_batches = list(batches)
+    # the space after the first segment waits for the (empty) second segment
+    assert [[char["char"] for char in batch] for batch in other_batches] == [
+        [" "],
+        ["そ", "う"],
+    ]
+    char_info = first_batch + [char for batch in other_batches for char in batch]
+    times = [(char["start_time"], char["end_time"]) for char in char_info]
+    assert times[2] == (1.0, 1.0)
+    assert all(start <= end for start, end in times)
+    assert all(times[i][1] <= times[i + 1][0] for i in range(len(times) - 1))